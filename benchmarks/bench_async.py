@@ -0,0 +1,99 @@
+import asyncio
+import random
+import sys
+import time
+from orphism.core.OrphismAsyncDB import AsyncAudioDB
+from orphism.core.OrphismDB import AudioDBSqlite
+from orphism.core.OrphismRecords import AUDIO_FILE_SUMMARY_COLUMNS
+
+# Throughput of AsyncAudioDB under concurrent load, against one blocking
+# connection serving the same requests one after another
+
+CLIENTS = (1, 8, 64)
+REQUESTS_PER_CLIENT = 50
+WRITE_RATIO = 0.1
+
+
+def _requests(size, count, seed=0, write_ratio=0.0):
+    """Mix of point lookups, page reads and play events"""
+    rng = random.Random(seed)
+    requests = []
+    for _ in range(count):
+        roll = rng.random()
+        if roll < write_ratio:
+            requests.append(('play', rng.randint(1, size)))
+        elif roll < 0.6:
+            requests.append(('get', rng.randint(1, size)))
+        else:
+            requests.append(('page', rng.randint(0, max(0, size - 100))))
+    return requests
+
+
+def _serve_blocking(db, requests):
+    for kind, value in requests:
+        if kind == 'get':
+            db.get_audio_file(value)
+        elif kind == 'page':
+            db.get_all_audio_files(limit=100, offset=value, columns=AUDIO_FILE_SUMMARY_COLUMNS)
+        else:
+            db.record_play(value)
+
+
+async def _serve_async(db, requests):
+    for kind, value in requests:
+        if kind == 'get':
+            await db.get_audio_file(value)
+        elif kind == 'page':
+            await db.get_all_audio_files(limit=100, offset=value, columns=AUDIO_FILE_SUMMARY_COLUMNS)
+        else:
+            await db.record_play(value)
+
+
+async def _loop_lag(stop):
+    """Longest delay of a 1 ms timer, i.e. how long the event loop was blocked"""
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.001)
+        worst = max(worst, time.perf_counter() - start - 0.001)
+    return worst
+
+
+def run(db_path, size, measure):
+    loop = asyncio.new_event_loop()
+    db = AsyncAudioDB(db_path)
+    loop.run_until_complete(db.open())
+    blocking = AudioDBSqlite(db_path)
+    blocking.connect()
+    try:
+        for mode, write_ratio in (('read', 0.0), ('mixed', WRITE_RATIO)):
+            for clients in CLIENTS:
+                workloads = [_requests(size, REQUESTS_PER_CLIENT, seed, write_ratio)
+                             for seed in range(clients)]
+                operations = clients * REQUESTS_PER_CLIENT
+                lags = []
+
+                async def serve_concurrently():
+                    stop = asyncio.Event()
+                    lag = asyncio.ensure_future(_loop_lag(stop))
+                    await asyncio.gather(*(_serve_async(db, workload) for workload in workloads))
+                    stop.set()
+                    lags.append(await lag)
+
+                measure(f"async.{mode}.clients_{clients}",
+                        lambda: loop.run_until_complete(serve_concurrently()), operations)
+                measure(f"async.{mode}.blocking_{clients}",
+                        lambda: [_serve_blocking(blocking, workload) for workload in workloads],
+                        operations)
+                print(f"{'':<32} event loop blocked at most {max(lags) * 1000:.2f} ms",
+                      file=sys.stderr)
+
+        async def stream():
+            async for _ in db.iter_pages(page_size=1000, columns=AUDIO_FILE_SUMMARY_COLUMNS):
+                pass
+
+        measure("async.stream_pages", lambda: loop.run_until_complete(stream()), size)
+    finally:
+        blocking.disconnect()
+        loop.run_until_complete(db.close())
+        loop.close()
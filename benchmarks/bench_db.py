@@ -0,0 +1,85 @@
+from orphism.core.OrphismDB import AudioDBSqlite
+
+# Core database benchmarks; every function gets a populated library
+
+
+def bench_paged_reads(db, size, measure):
+    """Pages of 100 rows at the start, middle and end of the library"""
+    for label, offset in (('start', 0), ('middle', size // 2), ('end', max(0, size - 100))):
+        measure(f"db.page_read.{label}", lambda: db.get_all_audio_files(limit=100, offset=offset), 1)
+    measure("db.page_read.by_filename",
+            lambda: db.get_all_audio_files(limit=100, order_by="filename", order="ASC"), 1)
+
+
+def bench_full_read(db, size, measure):
+    """Fetch the whole library, as the views do on refresh"""
+    if size <= 100000:
+        measure("db.full_read", db.get_all_audio_files, size)
+
+
+def bench_search(db, size, measure):
+    measure("db.search.filename_like", lambda: db.execute_query(
+        "SELECT id, filename FROM audio_files WHERE filename LIKE ? LIMIT 100", ('%river echo%',)
+    ), 1)
+    measure("db.search.favorites", lambda: db.execute_query(
+        "SELECT id FROM audio_files WHERE favorite = 1 ORDER BY play_count DESC LIMIT 100"
+    ), 1)
+
+
+def bench_playlists(db, size, measure):
+    playlist_id = db.create_playlist("benchmark")
+    audio_ids = iter(range(1, size + 1))
+
+    def add_items():
+        for _ in range(200):
+            db.add_to_playlist(playlist_id, next(audio_ids))
+
+    measure("db.playlist.add_item", add_items, 200, repeat=1)
+    measure("db.playlist.read", lambda: db.execute_query(
+        "SELECT a.* FROM playlist_items p JOIN audio_files a ON a.id = p.audio_id "
+        "WHERE p.playlist_id = ? ORDER BY p.position", (playlist_id,)
+    ), 200)
+
+
+def bench_inserts(db, size, measure):
+    """Single-row inserts with a commit each, and one batched upsert"""
+    counter = iter(range(10 ** 9))
+
+    def single_inserts():
+        for _ in range(500):
+            i = next(counter)
+            db.add_audio_file(f"single {i}.mp3", f"/bench/single/{i}.mp3", size=i, format="MP3")
+
+    def batch_upsert():
+        first = next(counter) * 10000
+        db.apply_library_changes([
+            {'filename': f"batch {i}.flac", 'filepath': f"/bench/batch/{i}.flac",
+             'size': i, 'format': "FLAC"}
+            for i in range(first, first + 10000)
+        ])
+
+    measure("db.insert.single_row", single_inserts, 500, repeat=1)
+    measure("db.insert.batch_upsert", batch_upsert, 10000, repeat=1)
+
+
+# Read-only benchmarks first, mutating ones last
+BENCHMARKS = (bench_paged_reads, bench_full_read, bench_search, bench_playlists, bench_inserts)
+
+
+def run(db_path, size, measure):
+    """
+    Run all core database benchmarks.
+
+    Args:
+        db_path (str): Synthetic library database
+        size (int): Number of tracks in the library
+        measure (callable): measure(name, fn, operations, repeat=None)
+    """
+    db = AudioDBSqlite(db_path)
+    if not db.connect():
+        raise RuntimeError(f"Cannot open {db_path}")
+    try:
+        for benchmark in BENCHMARKS:
+            benchmark(db, size, measure)
+    finally:
+        db.disconnect()
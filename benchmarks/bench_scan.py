@@ -0,0 +1,39 @@
+import os
+import shutil
+from PySide6.QtCore import QCoreApplication
+from orphism.core.OrphismDB import AudioDBSqlite
+from orphism.core.OrphismDBWorker import OrphismDBWorker
+from orphism.core.OrphismLibraryWatcher import OrphismLibraryWatcher
+from benchmarks.synthetic_library import write_audio_files
+
+# Folder import through the library watcher, using real WAV/FLAC files
+
+
+def run(db_path, workdir, file_count, measure):
+    """
+    Time the initial import of a folder of synthetic audio files.
+
+    Args:
+        db_path (str): Database to import into
+        workdir (str): Scratch directory for the audio files
+        file_count (int): Number of files to write and import
+        measure (callable): measure(name, fn, operations, repeat=None)
+    """
+    app = QCoreApplication.instance() or QCoreApplication([])
+    folder = os.path.join(workdir, "audio")
+    shutil.rmtree(folder, ignore_errors=True)
+    write_audio_files(folder, file_count, seconds=0.25)
+
+    db = AudioDBSqlite(db_path)
+    db.initialize_database()
+    db.disconnect()
+
+    worker = OrphismDBWorker(db_path)
+    worker.start()
+    watcher = OrphismLibraryWatcher(worker)
+    try:
+        measure("scan.initial_import", lambda: watcher.add_folder(folder).result(), file_count, repeat=1)
+    finally:
+        watcher.stop()
+        worker.stop()
+        app.processEvents()
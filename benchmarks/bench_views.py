@@ -0,0 +1,55 @@
+import os
+
+# Widgets are measured offscreen so the suite runs on CI machines
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtWidgets import QApplication, QWidget
+from orphism.core.OrphismDB import AudioDBSqlite
+from orphism.core.OrphismDisplay import OrphismDisplayCache
+from orphism.core.OrphismRecords import AUDIO_FILE_SUMMARY_COLUMNS
+from orphism.client.gui.OrphismMediaDisplayPanel import OrphismMediaDisplayPanel
+
+# Largest library the views are refreshed with; item widgets beyond that
+# only measure Qt allocation
+MAX_VIEW_ROWS = 100000
+
+
+class _PanelHost(QWidget):
+    """Stands in for the main window, which owns the database"""
+
+    def __init__(self, db):
+        super().__init__()
+        self.db = db
+
+
+def run(db_path, size, measure):
+    """
+    Time OrphismMediaDisplayPanel.refreshData on a synthetic library, and
+    the display string formatting it relies on.
+
+    Args:
+        db_path (str): Synthetic library database
+        size (int): Number of tracks in the library
+        measure (callable): measure(name, fn, operations, repeat=None)
+    """
+    if size > MAX_VIEW_ROWS:
+        return
+    app = QApplication.instance() or QApplication([])
+    db = AudioDBSqlite(db_path)
+    db.connect()
+    host = _PanelHost(db)
+    panel = OrphismMediaDisplayPanel(host)
+    try:
+        measure("views.refresh", panel.refreshData, size)
+        measure("views.refresh_cold",
+                lambda: (panel.display_cache.clear(), panel.refreshData()), size)
+        
+        audio_files = db.get_all_audio_files(columns=AUDIO_FILE_SUMMARY_COLUMNS)
+        cache = OrphismDisplayCache()
+        measure("views.format_cold", lambda: OrphismDisplayCache().rows(audio_files), size)
+        measure("views.format_warm", lambda: cache.rows(audio_files), size)
+    finally:
+        panel.deleteLater()
+        host.deleteLater()
+        app.processEvents()
+        db.disconnect()
@@ -0,0 +1,148 @@
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from benchmarks.synthetic_library import build_library
+
+# Benchmark runner: python -m benchmarks.run_benchmarks --sizes 10000 100000
+
+DEFAULT_SIZES = (10000, 100000, 1000000)
+DEFAULT_REPEAT = 5
+SUITES = ('db', 'views', 'scan', 'async')
+
+
+def _git_commit():
+    """Commit the results belong to, so runs can be compared across history"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Recorder:
+    """Times benchmark functions and collects the results"""
+
+    def __init__(self, repeat=DEFAULT_REPEAT):
+        self.repeat = repeat
+        self.results = []
+        self.size = None
+
+    def measure(self, name, fn, operations, repeat=None):
+        """
+        Run fn several times and keep the best and median timings.
+
+        Args:
+            name (str): Benchmark name
+            fn (callable): Code to time
+            operations (int): Operations performed by one call of fn
+            repeat (int): Number of runs, defaults to the recorder setting
+        """
+        timings = []
+        for _ in range(repeat or self.repeat):
+            start = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - start)
+        best = min(timings)
+        result = {
+            'name': name,
+            'size': self.size,
+            'operations': operations,
+            'best_s': round(best, 6),
+            'median_s': round(statistics.median(timings), 6),
+            'ops_per_s': round(operations / best, 1) if best > 0 else None,
+            'runs': len(timings),
+        }
+        self.results.append(result)
+        print(f"{name:<32} {self.size:>9} {best * 1000:>12.3f} ms {result['ops_per_s'] or 0:>14.1f} ops/s",
+              file=sys.stderr)
+
+
+def compare(results, baseline):
+    """
+    Print the change of every benchmark against an earlier run.
+
+    Args:
+        results (dict): Current run
+        baseline (dict): Earlier run loaded from JSON
+    """
+    previous = {(r['name'], r['size']): r for r in baseline['results']}
+    print(f"Compared with {baseline.get('commit') or 'unknown commit'}:", file=sys.stderr)
+    for result in results['results']:
+        before = previous.get((result['name'], result['size']))
+        if before and before['best_s']:
+            change = (result['best_s'] - before['best_s']) / before['best_s'] * 100
+            print(f"{result['name']:<32} {result['size']:>9} {change:>+8.1f}%", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="AudioDB benchmark suite")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES),
+                        help="library sizes in tracks")
+    parser.add_argument("--suites", nargs="+", choices=SUITES, default=list(SUITES))
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--audio-files", type=int, default=200,
+                        help="synthetic WAV/FLAC files for the scan suite")
+    parser.add_argument("--workdir", help="scratch directory, defaults to a temporary one")
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--compare", help="earlier JSON results to compare with")
+    args = parser.parse_args(argv)
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="audiodb-bench-")
+    os.makedirs(workdir, exist_ok=True)
+    recorder = Recorder(args.repeat)
+
+    for size in args.sizes:
+        recorder.size = size
+        db_path = os.path.join(workdir, f"library-{size}.sqlite")
+        start = time.perf_counter()
+        build_library(db_path, size)
+        print(f"Built {size} track library in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+        if 'views' in args.suites:
+            from benchmarks import bench_views
+            bench_views.run(db_path, size, recorder.measure)
+        if 'db' in args.suites:
+            from benchmarks import bench_db
+            bench_db.run(db_path, size, recorder.measure)
+        if 'async' in args.suites:
+            from benchmarks import bench_async
+            bench_async.run(db_path, size, recorder.measure)
+
+    if 'scan' in args.suites:
+        from benchmarks import bench_scan
+        recorder.size = args.audio_files
+        bench_scan.run(os.path.join(workdir, "scan.sqlite"), workdir, args.audio_files, recorder.measure)
+
+    results = {
+        'commit': _git_commit(),
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+        'results': recorder.results,
+    }
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            compare(results, json.load(f))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
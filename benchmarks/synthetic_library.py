@@ -0,0 +1,247 @@
+import math
+import os
+import random
+import sqlite3
+import struct
+import wave
+from datetime import datetime, timedelta
+from orphism.core.OrphismDB import AudioDBSqlite
+
+# Synthetic libraries and audio files for the benchmark suite
+
+FORMATS = ('MP3', 'FLAC', 'WAV', 'OGG')
+WORDS = ('night', 'river', 'echo', 'glass', 'summer', 'drift', 'signal', 'north',
+         'velvet', 'static', 'ember', 'hollow', 'tide', 'paper', 'neon', 'orbit')
+TAG_NAMES = ('rock', 'jazz', 'ambient', 'classical', 'electronic', 'folk', 'live',
+             'remaster', 'demo', 'soundtrack', 'vocal', 'instrumental')
+
+
+def generate_tracks(count, seed=0):
+    """
+    Generate rows for the audio_files table.
+
+    Args:
+        count (int): Number of tracks
+        seed (int): Random seed, so every run sees the same library
+
+    Yields:
+        tuple: (filename, filepath, duration, size, format, bitrate,
+            sample_rate, channels, date_added, last_played, play_count, favorite)
+    """
+    rng = random.Random(seed)
+    start = datetime(2015, 1, 1)
+    for i in range(count):
+        fmt = FORMATS[i % len(FORMATS)]
+        title = f"{rng.choice(WORDS)} {rng.choice(WORDS)} {i:07d}"
+        filename = f"{title}.{fmt.lower()}"
+        duration = rng.uniform(30, 900)
+        bitrate = 1411 if fmt in ('FLAC', 'WAV') else rng.choice((128, 192, 256, 320))
+        played = rng.random() < 0.4
+        yield (
+            filename,
+            f"/music/artist{i % 5000:04d}/album{i % 50:02d}/{filename}",
+            duration,
+            int(duration * bitrate * 125),
+            fmt,
+            bitrate,
+            rng.choice((44100, 48000, 96000)),
+            2,
+            start + timedelta(minutes=i),
+            start + timedelta(days=rng.randint(0, 3650)) if played else None,
+            rng.randint(1, 200) if played else 0,
+            1 if rng.random() < 0.05 else 0,
+        )
+
+
+def build_library(db_path, tracks, playlists=None, tags=None, seed=0, batch_size=50000):
+    """
+    Create a database populated with a synthetic library.
+
+    Rows are written with executemany in large transactions so that building
+    a 1M-track library takes seconds rather than measuring the slow path.
+
+    Args:
+        db_path (str): Database file to create; an existing file is replaced
+        tracks (int): Number of tracks
+        playlists (int): Number of playlists, defaults to one per 1000 tracks
+        tags (int): Number of tag assignments per track on average (0-3)
+        seed (int): Random seed
+        batch_size (int): Rows per transaction
+
+    Returns:
+        str: db_path
+    """
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+
+    db = AudioDBSqlite(db_path)
+    db.initialize_database()
+    db.disconnect()
+
+    rng = random.Random(seed)
+    playlists = max(1, tracks // 1000) if playlists is None else playlists
+    tags = 1 if tags is None else tags
+
+    connection = sqlite3.connect(db_path)
+    try:
+        insert = ('INSERT INTO audio_files (filename, filepath, duration, size, format, bitrate, '
+                  'sample_rate, channels, date_added, last_played, play_count, favorite) '
+                  'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)')
+        batch = []
+        for row in generate_tracks(tracks, seed):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                connection.executemany(insert, batch)
+                connection.commit()
+                batch.clear()
+        connection.executemany(insert, batch)
+
+        connection.executemany("INSERT INTO tags (name) VALUES (?)", [(name,) for name in TAG_NAMES])
+        if tags:
+            connection.executemany(
+                "INSERT OR IGNORE INTO audio_tags (audio_id, tag_id) VALUES (?, ?)",
+                ((audio_id, rng.randint(1, len(TAG_NAMES)))
+                 for audio_id in range(1, tracks + 1) for _ in range(rng.randint(0, 2 * tags)))
+            )
+
+        now = datetime.now()
+        connection.executemany(
+            "INSERT INTO playlists (name, description, date_created, last_modified) VALUES (?, ?, ?, ?)",
+            [(f"Playlist {i}", None, now, now) for i in range(playlists)]
+        )
+        connection.executemany(
+            "INSERT OR IGNORE INTO playlist_items (playlist_id, audio_id, position, date_added) "
+            "VALUES (?, ?, ?, ?)",
+            ((playlist_id, rng.randint(1, tracks), position, now)
+             for playlist_id in range(1, playlists + 1) for position in range(1, 51))
+        )
+        connection.commit()
+    finally:
+        connection.close()
+    return db_path
+
+
+def _sine_samples(seconds, sample_rate, channels, frequency=440.0):
+    """16-bit signed samples of a sine tone, interleaved per channel"""
+    total = int(seconds * sample_rate)
+    step = 2 * math.pi * frequency / sample_rate
+    samples = []
+    for n in range(total):
+        value = int(12000 * math.sin(n * step))
+        samples.extend([value] * channels)
+    return samples
+
+
+def write_wav(path, seconds=1.0, sample_rate=44100, channels=2):
+    """
+    Write a 16-bit PCM WAV file containing a sine tone.
+
+    Args:
+        path (str): Output file
+        seconds (float): Duration
+        sample_rate (int): Sample rate in Hz
+        channels (int): Number of channels
+    """
+    samples = _sine_samples(seconds, sample_rate, channels)
+    with wave.open(path, 'wb') as f:
+        f.setnchannels(channels)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(struct.pack(f'<{len(samples)}h', *samples))
+
+
+def _crc8(data):
+    crc = 0
+    for byte in data:
+        crc ^= byte
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x07) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+    return crc
+
+
+def _crc16(data):
+    crc = 0
+    for byte in data:
+        crc ^= byte << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x8005) & 0xFFFF if crc & 0x8000 else (crc << 1) & 0xFFFF
+    return crc
+
+
+def _utf8_number(value):
+    """FLAC frame numbers use the UTF-8 variable length encoding"""
+    if value < 0x80:
+        return bytes([value])
+    length = 2
+    while value >= 1 << (5 * length + 1):
+        length += 1
+    out = []
+    for _ in range(length - 1):
+        out.append(0x80 | (value & 0x3F))
+        value >>= 6
+    out.append(((0xFF00 >> length) & 0xFF) | value)
+    return bytes(reversed(out))
+
+
+def write_flac(path, seconds=1.0, sample_rate=44100, channels=2, block_size=4096):
+    """
+    Write a valid 16-bit FLAC file containing a sine tone.
+
+    Frames use uncompressed VERBATIM subframes, which keeps the encoder tiny
+    while still exercising a real FLAC container for decoder benchmarks.
+
+    Args:
+        path (str): Output file
+        seconds (float): Duration
+        sample_rate (int): Sample rate in Hz
+        channels (int): Number of channels (1-8)
+        block_size (int): Samples per channel in each frame
+    """
+    samples = _sine_samples(seconds, sample_rate, channels)
+    total = len(samples) // channels
+
+    streaminfo = struct.pack('>HH', block_size, block_size) + b'\x00' * 6
+    packed = (sample_rate << 44) | ((channels - 1) << 41) | (15 << 36) | total
+    streaminfo += packed.to_bytes(8, 'big') + b'\x00' * 16
+
+    with open(path, 'wb') as f:
+        f.write(b'fLaC')
+        f.write(bytes([0x80]) + len(streaminfo).to_bytes(3, 'big') + streaminfo)
+
+        for frame_number, first in enumerate(range(0, total, block_size)):
+            count = min(block_size, total - first)
+            header = bytes([0xFF, 0xF8, 0x70, (channels - 1) << 4])
+            header += _utf8_number(frame_number) + struct.pack('>H', count - 1)
+            header += bytes([_crc8(header)])
+
+            frame = bytearray(header)
+            block = samples[first * channels:(first + count) * channels]
+            for channel in range(channels):
+                frame.append(0x02)  # VERBATIM subframe, no wasted bits
+                frame += struct.pack(f'>{count}h', *block[channel::channels])
+            frame += struct.pack('>H', _crc16(frame))
+            f.write(frame)
+
+
+def write_audio_files(directory, count, seconds=1.0, seed=0):
+    """
+    Write a folder of small WAV and FLAC files.
+
+    Args:
+        directory (str): Output folder, created if missing
+        count (int): Number of files
+        seconds (float): Duration of every file
+
+    Returns:
+        list: Paths of the written files
+    """
+    os.makedirs(directory, exist_ok=True)
+    rng = random.Random(seed)
+    paths = []
+    for i in range(count):
+        writer, ext = (write_flac, 'flac') if i % 2 else (write_wav, 'wav')
+        path = os.path.join(directory, f"{rng.choice(WORDS)}_{i:05d}.{ext}")
+        writer(path, seconds=seconds)
+        paths.append(path)
+    return paths
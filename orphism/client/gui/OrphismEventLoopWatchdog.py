@@ -0,0 +1,83 @@
+import sys
+import threading
+import time
+import traceback
+from PySide6.QtCore import QObject, QTimer, Qt, Signal
+
+
+class OrphismEventLoopWatchdog(QObject):
+    """
+    Measures how late the GUI thread gets back to its event loop.
+
+    A timer ticking every INTERVAL_MS records how late each tick arrived as
+    the 'eventloop.latency' span. A monitor thread notices ticks overdue by
+    STALL_MS while the GUI thread is still blocked and captures its stack;
+    the stall is recorded with that stack once the loop runs again.
+    """
+    INTERVAL_MS = 100
+    STALL_MS = 250
+
+    # Emitted on the GUI thread after a stall: (milliseconds blocked)
+    stallDetected = Signal(float)
+
+    def __init__(self, profiler, parent=None):
+        """
+        Args:
+            profiler (OrphismProfiler): Receives latencies and stalls
+            parent: Parent QObject living on the GUI thread
+        """
+        super().__init__(parent)
+        self.profiler = profiler
+        self.timer = QTimer(self)
+        self.timer.setTimerType(Qt.PreciseTimer)
+        self.timer.timeout.connect(self._tick)
+        self._thread_id = threading.get_ident()
+        self._last_tick = time.perf_counter()
+        # (tick the stall followed, GUI thread stack) from the monitor
+        self._stalled = None
+        self._stopped = threading.Event()
+        self._monitor = None
+
+    def start(self):
+        if self.isRunning():
+            return
+        self._last_tick = time.perf_counter()
+        self._stalled = None
+        self._stopped.clear()
+        self.timer.start(self.INTERVAL_MS)
+        self._monitor = threading.Thread(target=self._watch, name='OrphismEventLoopWatchdog', daemon=True)
+        self._monitor.start()
+
+    def stop(self):
+        self.timer.stop()
+        self._stopped.set()
+        if self._monitor is not None:
+            self._monitor.join()
+            self._monitor = None
+
+    def isRunning(self):
+        return self.timer.isActive()
+
+    def _tick(self):
+        now = time.perf_counter()
+        late_ms = max(0.0, (now - self._last_tick) * 1000 - self.INTERVAL_MS)
+        previous, self._last_tick = self._last_tick, now
+        self.profiler.record('eventloop.latency', late_ms, now - late_ms / 1000)
+        if late_ms < self.STALL_MS:
+            return
+        stalled, self._stalled = self._stalled, None
+        self.profiler.record_stall(late_ms, stalled[1] if stalled and stalled[0] == previous else [])
+        self.stallDetected.emit(late_ms)
+
+    def _watch(self):
+        """Monitor thread: capture the GUI thread's stack while it is blocked"""
+        limit = (self.INTERVAL_MS + self.STALL_MS) / 1000
+        while not self._stopped.wait(self.STALL_MS / 2000):
+            last_tick = self._last_tick
+            if time.perf_counter() - last_tick < limit:
+                continue
+            if self._stalled is not None and self._stalled[0] == last_tick:
+                continue
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is not None:
+                self._stalled = (last_tick, traceback.format_stack(frame))
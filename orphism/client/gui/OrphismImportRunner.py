@@ -0,0 +1,96 @@
+from PySide6.QtCore import QObject, Signal
+from orphism.core.OrphismConstants import IMPORT_RUNNING
+from orphism.core.OrphismImport import OrphismImporter
+
+
+class OrphismImportRunner(QObject):
+    """
+    Runs import jobs on the database worker, one checkpoint per job.
+
+    Each step is queued as its own worker job, so plays, edits and folder
+    syncs queued meanwhile run between checkpoints. Jobs run one after
+    another; stopping leaves the current one resumable from its last
+    checkpoint.
+    """
+
+    # Emitted after every checkpoint: (job ID, files imported, folders queued)
+    progressChanged = Signal(int, int, int)
+    # Emitted when a job stops: (job ID, status), status '' if it failed
+    jobFinished = Signal(int, str)
+    # Results from the worker thread, delivered to the GUI thread
+    _jobsQueued = Signal(list)
+    _stepFinished = Signal(int, str, object)
+
+    def __init__(self, db_worker, parent=None):
+        """
+        Args:
+            db_worker: Running OrphismDBWorker
+            parent: Parent QObject
+        """
+        super().__init__(parent)
+        self.db_worker = db_worker
+        self.importer = OrphismImporter()
+        self._waiting = []
+        self._current = None
+        self._stopped = False
+        self._jobsQueued.connect(self._onJobsQueued)
+        self._stepFinished.connect(self._onStepFinished)
+
+    def importFolder(self, path):
+        """Create an import job for a folder and run it after the queued ones"""
+        self.db_worker.submit(self.importer.start, path).add_done_callback(
+            lambda f: self._jobsQueued.emit([] if f.exception() or f.result() is None else [f.result()])
+        )
+
+    def resumeJobs(self):
+        """Continue the jobs an earlier session left unfinished"""
+        self.db_worker.submit(self.importer.unfinished).add_done_callback(
+            lambda f: self._jobsQueued.emit([] if f.exception() else f.result())
+        )
+
+    def isRunning(self):
+        return self._current is not None
+
+    def pending(self):
+        """
+        Returns:
+            int: Number of jobs running or waiting to run
+        """
+        return len(self._waiting) + (self._current is not None)
+
+    def stop(self):
+        """Stop after the running step; unfinished jobs resume next time"""
+        self._stopped = True
+        self._waiting.clear()
+
+    def _onJobsQueued(self, job_ids):
+        self._waiting.extend(job_id for job_id in job_ids
+                             if job_id != self._current and job_id not in self._waiting)
+        self._next()
+
+    def _next(self):
+        if self._current is None and self._waiting and not self._stopped:
+            self._current = self._waiting.pop(0)
+            self._submitStep(self._current)
+
+    def _submitStep(self, job_id):
+        self.db_worker.submit(self._step, job_id).add_done_callback(
+            lambda f: self._stepFinished.emit(job_id, '', None) if f.exception()
+            else self._stepFinished.emit(job_id, *f.result())
+        )
+
+    def _step(self, db, job_id):
+        """Worker thread: one checkpoint and the job's state after it"""
+        status = self.importer.step(db, job_id)
+        return status or '', self.importer.job(db, job_id)
+
+    def _onStepFinished(self, job_id, status, job):
+        if job is not None:
+            self.progressChanged.emit(job_id, job.files_imported, job.dirs_pending)
+        if status == IMPORT_RUNNING and not self._stopped:
+            self._submitStep(job_id)
+            return
+        self._current = None
+        if status != IMPORT_RUNNING:
+            self.jobFinished.emit(job_id, status)
+        self._next()
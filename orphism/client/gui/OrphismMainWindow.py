@@ -5,20 +5,46 @@ from PySide6.QtWidgets import (
     QStackedWidget, 
     QHBoxLayout, 
     QFrame, 
-    QLabel, 
     QFileDialog, 
     QMessageBox, 
     QScrollArea, 
-    QVBoxLayout
+    QVBoxLayout,
+    QListWidget,
+    QListWidgetItem,
+    QSplitter
 )
-from PySide6.QtCore import Qt, QTranslator
+from PySide6.QtCore import Qt, QEvent, QTimer, Signal
 import os
+from orphism.core.OrphismConstants import IMPORT_DONE, IMPORT_PAUSED
+from orphism.core.OrphismDBWorker import OrphismDBWorker
+from orphism.core.OrphismDisplay import OrphismDisplayCache
+from orphism.core.OrphismLocalization import OrphismLocalizationManager
+from orphism.core.OrphismLibraryWatcher import OrphismLibraryWatcher
+from orphism.core.OrphismPlayback import OrphismPlaybackEngine
+from orphism.core.OrphismProfiler import get_profiler
+from orphism.core.OrphismUndo import OrphismUndoJournal
+from orphism.client.gui.OrphismEventLoopWatchdog import OrphismEventLoopWatchdog
+from orphism.client.gui.OrphismImportRunner import OrphismImportRunner
+from orphism.client.gui.OrphismMaintenanceThread import OrphismMaintenanceThread
+from orphism.client.gui.OrphismPerformanceOverlay import OrphismPerformanceOverlay
+from orphism.core.OrphismSmartPlaylist import (
+    OrphismSmartPlaylistCache, FAVORITES_DEFINITION, RECENT_DEFINITION
+)
+from orphism.client.gui.OrphismSmartPlaylistView import OrphismSmartPlaylistView
 
 
 
 class OrphismMainWindow(QMainWindow):
     LEFT_PANEL_MIN_WIDTH = 200
     SNAP_THRESHOLD = 50
+    # Due maintenance runs shortly after start-up and then hourly
+    MAINTENANCE_FIRST_DELAY_MS = 60 * 1000
+    MAINTENANCE_INTERVAL_MS = 60 * 60 * 1000
+    # Watcher batches arriving within this window share one view refresh
+    LIBRARY_REFRESH_DELAY_MS = 2000
+    
+    # Emitted from the database worker after an edit, undo or redo
+    _journalChanged = Signal(str)
 
     def __init__(self):
         super().__init__()
@@ -30,11 +56,60 @@ class OrphismMainWindow(QMainWindow):
         # Initialize database tables
         self.db.initialize_database()
         
+        # Background writer and folder watcher keeping the library in sync
+        self.db_worker = OrphismDBWorker(self.db.db_path)
+        self.db_worker.start()
+        self.library_watcher = OrphismLibraryWatcher(self.db_worker, self)
+        
+        # Folder imports, checkpointed so they survive restarts
+        self.import_runner = OrphismImportRunner(self.db_worker, self)
+        
+        # Smart playlist results, re-queried only when their columns change
+        self.smart_playlist_cache = OrphismSmartPlaylistCache(self.db)
+        
+        # Display strings of tracks, formatted once for all views
+        self.display_cache = OrphismDisplayCache()
+        
+        # Gapless playback; decodes on its own thread and records plays on the worker
+        self.playback_engine = OrphismPlaybackEngine(self.db_worker, parent=self)
+        
+        # Undo history of edits; edits and undos run on the worker
+        self.undo_journal = OrphismUndoJournal()
+        self._journalChanged.connect(self.onJournalChanged)
+        
         self.initializeUI()
+        
+        self.library_changes = [0, 0]
+        self.library_refresh_timer = QTimer(self)
+        self.library_refresh_timer.setSingleShot(True)
+        self.library_refresh_timer.setInterval(self.LIBRARY_REFRESH_DELAY_MS)
+        self.library_refresh_timer.timeout.connect(self.onLibraryRefresh)
+        self.library_watcher.libraryChanged.connect(self.onLibraryChanged)
+        self.library_watcher.resume()
+        self.import_runner.progressChanged.connect(self.onImportProgress)
+        self.import_runner.jobFinished.connect(self.onImportFinished)
+        self.import_runner.resumeJobs()
+        self.playback_engine.trackStarted.connect(self.onTrackStarted)
+        
+        # Backups and housekeeping on their own connection and thread
+        self.maintenance_thread = None
+        self.maintenance_timer = QTimer(self)
+        self.maintenance_timer.timeout.connect(self.runMaintenance)
+        self.maintenance_timer.timeout.connect(
+            lambda: self.maintenance_timer.setInterval(self.MAINTENANCE_INTERVAL_MS)
+        )
+        self.maintenance_timer.start(self.MAINTENANCE_FIRST_DELAY_MS)
+        
+        # Opt-in instrumentation, switched on from the View menu or by $AUDIODB_PROFILE
+        self.profiler = get_profiler()
+        self.watchdog = OrphismEventLoopWatchdog(self.profiler, self)
+        self.performance_overlay = OrphismPerformanceOverlay(self.profiler, self)
+        self.statusBar.insertPermanentWidget(0, self.performance_overlay)
+        self.menuBar.overlay_action.setChecked(self.profiler.enabled)
 
     def initializeUI(self):
         """Initialize all UI components"""
-        self.setWindowTitle("AudioDB")
+        self.setWindowTitle(self.tr("AudioDB"))
         self.setupWindowSize()
         
         # Setup components
@@ -54,18 +129,14 @@ class OrphismMainWindow(QMainWindow):
         self.library_widget = QWidget()
         self.setupSplitInterface(self.library_widget)
         
-        # Add placeholder widgets for other tabs
+        # Smart playlist tabs
         self.playlists_widget = QWidget()
-        self.playlists_widget.setLayout(QVBoxLayout())
-        self.playlists_widget.layout().addWidget(QLabel("Playlists - Coming Soon"))
-        
-        self.favorites_widget = QWidget()
-        self.favorites_widget.setLayout(QVBoxLayout())
-        self.favorites_widget.layout().addWidget(QLabel("Favorites - Coming Soon"))
+        self.setupPlaylistsInterface(self.playlists_widget)
         
-        self.recent_widget = QWidget()
-        self.recent_widget.setLayout(QVBoxLayout())
-        self.recent_widget.layout().addWidget(QLabel("Recent - Coming Soon"))
+        self.favorites_widget = OrphismSmartPlaylistView(self.smart_playlist_cache, FAVORITES_DEFINITION,
+                                                         display_cache=self.display_cache)
+        self.recent_widget = OrphismSmartPlaylistView(self.smart_playlist_cache, RECENT_DEFINITION,
+                                                      display_cache=self.display_cache)
         
         # Add all widgets to the stacked widget
         self.main_content.addWidget(self.library_widget)
@@ -75,6 +146,14 @@ class OrphismMainWindow(QMainWindow):
         
         # Connect tab bar to stacked widget
         self.main_tab_bar.currentChanged.connect(self.main_content.setCurrentIndex)
+        self.main_tab_bar.currentChanged.connect(self.refreshCurrentPlaylist)
+        
+        # Double-clicking a track plays the list it is shown in
+        for table in (self.media_display_panel.table_view, self.playlist_view.table_view,
+                      self.favorites_widget.table_view, self.recent_widget.table_view):
+            table.cellDoubleClicked.connect(
+                lambda row, _, table=table: self.playTable(table, row)
+            )
         
         # Create central layout
         central_widget = QWidget()
@@ -86,6 +165,65 @@ class OrphismMainWindow(QMainWindow):
         # Add tab bar and content to layout
         main_layout.addWidget(self.main_tab_bar)
         main_layout.addWidget(self.main_content)
+        
+        self.refreshLibraryStats()
+        self.updateUndoActions()
+
+    def refreshLibraryStats(self):
+        """Show library totals; a single-row read regardless of library size"""
+        self.showLibraryStats(self.db.get_library_stats())
+
+    def showLibraryStats(self, stats):
+        """Show library totals read earlier"""
+        self.library_stats = stats
+        self.statusBar.showLibraryStats(stats)
+        
+        favorites = stats.favorite_count if stats else 0
+        played = stats.played_count if stats else 0
+        self.favorites_widget.summary_label.setText(self.tr("%d favorite tracks") % favorites)
+        self.recent_widget.summary_label.setText(self.tr("%d played tracks") % played)
+
+    def refreshCurrentPlaylist(self):
+        """Bring the visible smart playlist up to date; cheap when nothing changed"""
+        current = self.main_content.currentWidget()
+        if isinstance(current, OrphismSmartPlaylistView):
+            current.refresh()
+        elif current is self.playlists_widget:
+            self.playlist_view.refresh()
+
+    def setupPlaylistsInterface(self, parent_widget):
+        """Setup the smart playlist list and the view of the selected playlist"""
+        layout = QHBoxLayout(parent_widget)
+        layout.setContentsMargins(0, 0, 0, 0)
+        
+        # Smart playlists carry their definition, regular playlists their ID
+        self.playlist_list = QListWidget()
+        for playlist in self.db.get_smart_playlists():
+            item = QListWidgetItem(playlist.name)
+            item.setData(Qt.UserRole, playlist.definition)
+            self.playlist_list.addItem(item)
+        for playlist in self.db.get_playlists():
+            item = QListWidgetItem(playlist.name)
+            item.setData(Qt.UserRole + 1, playlist.id)
+            self.playlist_list.addItem(item)
+        
+        self.playlist_view = OrphismSmartPlaylistView(self.smart_playlist_cache,
+                                                      display_cache=self.display_cache)
+        self.playlist_list.currentItemChanged.connect(self.onPlaylistSelected)
+        
+        splitter = QSplitter(Qt.Horizontal)
+        splitter.addWidget(self.playlist_list)
+        splitter.addWidget(self.playlist_view)
+        splitter.setStretchFactor(1, 1)
+        layout.addWidget(splitter)
+
+    def onPlaylistSelected(self, item, previous=None):
+        """Show the smart or regular playlist selected in the list"""
+        playlist_id = item.data(Qt.UserRole + 1) if item else None
+        if playlist_id is not None:
+            self.playlist_view.setPlaylist(playlist_id)
+        else:
+            self.playlist_view.setDefinition(item.data(Qt.UserRole) if item else None)
 
     def setupWindowSize(self):
         """Set default window size based on screen dimensions"""
@@ -152,9 +290,241 @@ class OrphismMainWindow(QMainWindow):
                 self.statusBar.showMessage(self.tr(f"Added file: {file_info['filename']}"))
                 # Refresh the display
                 self.media_display_panel.refreshData()
+                self.refreshLibraryStats()
             else:
                 QMessageBox.warning(self, self.tr("Error"), self.tr("Failed to add file to database"))
 
+    def watchFolder(self):
+        """Choose a folder whose audio files are kept in sync with the library"""
+        folder = QFileDialog.getExistingDirectory(self, self.tr("Watch Folder"))
+        
+        if folder:
+            self.library_watcher.add_folder(folder)
+            self.statusBar.showMessage(self.tr("Scanning folder: %s") % folder)
+
+    def importFolder(self):
+        """Choose a folder tree to import as a resumable job"""
+        folder = QFileDialog.getExistingDirectory(self, self.tr("Import Folder"))
+        
+        if folder:
+            self.import_runner.importFolder(folder)
+            self.statusBar.showMessage(self.tr("Importing folder: %s") % folder)
+
+    def onImportProgress(self, job_id, files, queued):
+        """Show import progress; totals are a single-row read"""
+        self.statusBar.showMessage(
+            self.tr("Importing: %d files added, %d folders left") % (files, queued)
+        )
+        self.refreshLibraryStats()
+
+    def onImportFinished(self, job_id, status):
+        """Refresh the views once an import stopped"""
+        if status == IMPORT_DONE:
+            self.statusBar.showMessage(self.tr("Import finished"))
+        elif status == IMPORT_PAUSED:
+            self.statusBar.showMessage(self.tr("Import paused; the folder is not available"))
+        else:
+            self.statusBar.showMessage(self.tr("Import failed; it will be resumed on the next start"))
+        self.refreshViews()
+
+    def onLibraryChanged(self, updated, deleted):
+        """Schedule a refresh after the watcher wrote a batch of changes"""
+        self.library_changes[0] += updated
+        self.library_changes[1] += deleted
+        # Not restarted by later batches, so a long sync still refreshes regularly
+        if not self.library_refresh_timer.isActive():
+            self.library_refresh_timer.start()
+
+    def onLibraryRefresh(self):
+        """Refresh views once for all batches written since the last refresh"""
+        updated, deleted = self.library_changes
+        self.library_changes = [0, 0]
+        self.statusBar.showMessage(
+            self.tr("Library updated: %d added or changed, %d removed") % (updated, deleted)
+        )
+        self.refreshViews()
+
+    def refreshViews(self):
+        """Re-read the library table, totals and the visible playlist"""
+        self.media_display_panel.refreshData()
+        self.refreshLibraryStats()
+        self.refreshCurrentPlaylist()
+
+    def currentTable(self):
+        """Track table of the current tab"""
+        current = self.main_content.currentWidget()
+        if current is self.library_widget:
+            return self.media_display_panel.table_view
+        if current is self.playlists_widget:
+            return self.playlist_view.table_view
+        return current.table_view
+
+    def selectedAudioIds(self):
+        """IDs of the tracks selected in the current table"""
+        table = self.currentTable()
+        rows = sorted({index.row() for index in table.selectedIndexes()})
+        items = [table.item(row, 0) for row in rows]
+        return [item.data(Qt.UserRole) for item in items
+                if item is not None and item.data(Qt.UserRole) is not None]
+
+    def runEdit(self, edit, audio_ids, label, **kwargs):
+        """
+        Apply an OrphismUndoJournal edit on the database worker
+        
+        Args:
+            edit (callable): Journal method, called as edit(db, audio_ids, label=label, **kwargs)
+            audio_ids (list): Tracks to edit
+            label (str): Description shown in the Edit menu and status bar
+        """
+        future = self.db_worker.submit(edit, audio_ids, label=label, **kwargs)
+        future.add_done_callback(lambda f: self._journalChanged.emit(
+            "" if f.exception() or not f.result() else label
+        ))
+
+    def setSelectedFavorite(self, favorite):
+        """Add the selected tracks to or remove them from the favorites"""
+        audio_ids = self.selectedAudioIds()
+        if audio_ids:
+            label = (self.tr("Add %d tracks to Favorites") if favorite
+                     else self.tr("Remove %d tracks from Favorites")) % len(audio_ids)
+            self.runEdit(self.undo_journal.update_audio_files, audio_ids, label, favorite=int(favorite))
+
+    def deleteSelected(self):
+        """Remove the selected tracks from the library; undoable"""
+        audio_ids = self.selectedAudioIds()
+        if audio_ids:
+            self.runEdit(self.undo_journal.delete_audio_files, audio_ids,
+                         self.tr("Remove %d tracks from Library") % len(audio_ids))
+
+    def undo(self):
+        """Revert the latest edit in the background"""
+        future = self.db_worker.submit(self.undo_journal.undo)
+        future.add_done_callback(lambda f: self._journalChanged.emit(
+            "" if f.exception() or f.result() is None else self.tr("Undone: %s") % f.result()
+        ))
+
+    def redo(self):
+        """Apply the latest undone edit again in the background"""
+        future = self.db_worker.submit(self.undo_journal.redo)
+        future.add_done_callback(lambda f: self._journalChanged.emit(
+            "" if f.exception() or f.result() is None else self.tr("Redone: %s") % f.result()
+        ))
+
+    def onJournalChanged(self, message):
+        """Show the result of an edit, undo or redo and refresh the views"""
+        self.updateUndoActions()
+        if message:
+            self.statusBar.showMessage(message)
+            self.refreshViews()
+
+    def updateUndoActions(self):
+        """Show what Undo and Redo would do in the Edit menu"""
+        self.menuBar.updateUndoActions(self.undo_journal.undo_label(), self.undo_journal.redo_label())
+
+    def playCurrent(self):
+        """Play the selected playlist, or the track list of the current tab"""
+        current = self.main_content.currentWidget()
+        if current is self.playlists_widget and self.playlist_view.playlist_id is not None:
+            self.playback_engine.play_playlist(self.playlist_view.playlist_id)
+            return
+        table = self.currentTable()
+        self.playTable(table, max(table.currentRow(), 0))
+
+    def playTable(self, table, row):
+        """Play the tracks of a table, starting at a row"""
+        audio_ids = [table.item(i, 0).data(Qt.UserRole) for i in range(table.rowCount())
+                     if table.item(i, 0) is not None]
+        if audio_ids:
+            self.playback_engine.play_audio_ids(audio_ids, min(row, len(audio_ids) - 1))
+
+    def togglePause(self):
+        """Pause or resume playback"""
+        if self.playback_engine.state == OrphismPlaybackEngine.PAUSED:
+            self.playback_engine.resume()
+        else:
+            self.playback_engine.pause()
+
+    def onTrackStarted(self, audio_id):
+        """Show the track that became audible"""
+        _, filepath = self.playback_engine.queue[self.playback_engine.current_index]
+        self.statusBar.showMessage(self.tr("Playing: %s") % os.path.basename(filepath))
+
+    def runMaintenance(self, task=None):
+        """
+        Run a maintenance task, or every due one, in the background
+        
+        Args:
+            task (str): Task name from OrphismMaintenance, None for due tasks
+        """
+        if self.maintenance_thread is not None and self.maintenance_thread.isRunning():
+            if task is not None:
+                self.statusBar.showMessage(self.tr("Maintenance is already running"))
+            return
+        
+        self.maintenance_thread = OrphismMaintenanceThread(self.db.db_path, task, self)
+        self.maintenance_thread.progressChanged.connect(self.onMaintenanceProgress)
+        self.maintenance_thread.tasksFinished.connect(self.onMaintenanceFinished)
+        self.maintenance_thread.start()
+
+    def onMaintenanceProgress(self, task, done, total):
+        """Show how far a backup has copied"""
+        if total:
+            self.statusBar.showMessage(self.tr("Backing up library: %d%%") % (100 * done // total))
+
+    def onMaintenanceFinished(self, results):
+        """Report finished tasks; failed checks are shown in a dialog"""
+        if not results:
+            return
+        
+        failed = [(task, message) for task, ok, message in results if not ok]
+        if not failed:
+            self.statusBar.showMessage(
+                self.tr("Maintenance finished: %s") % ", ".join(task for task, _, _ in results)
+            )
+            return
+        
+        self.statusBar.showMessage(self.tr("Maintenance failed"))
+        QMessageBox.warning(
+            self,
+            self.tr("Maintenance"),
+            "\n".join(f"{task}: {message}" for task, message in failed)
+        )
+
+    def setPerformanceOverlay(self, enabled):
+        """Start or stop timing spans and the event loop, shown in the status bar"""
+        if enabled:
+            self.profiler.enable()
+            self.watchdog.start()
+            self.performance_overlay.start()
+        else:
+            self.watchdog.stop()
+            self.performance_overlay.stop()
+            self.profiler.disable()
+
+    def setProfiling(self, enabled):
+        """Start or stop a cProfile and tracemalloc capture of the GUI thread"""
+        if enabled:
+            self.profiler.start_capture()
+            self.statusBar.showMessage(self.tr("Profiling; stop it from the View menu before exporting"))
+        elif self.profiler.stop_capture() is not None:
+            self.statusBar.showMessage(self.tr("Profile captured; export it from the View menu"))
+
+    def exportPerformanceData(self):
+        """Save collected timings, stalls and the last capture for offline analysis"""
+        path, _ = QFileDialog.getSaveFileName(
+            self, self.tr("Export Performance Data"), "audiodb-profile.json", self.tr("JSON files (*.json)")
+        )
+        if not path:
+            return
+        try:
+            written = self.profiler.export(path)
+        except OSError as e:
+            QMessageBox.warning(self, self.tr("Export Performance Data"), str(e))
+            return
+        self.statusBar.showMessage(
+            self.tr("Performance data saved: %s") % ", ".join(os.path.basename(f) for f in written)
+        )
+
     def showAboutDialog(self):
         """Show about dialog"""
         QMessageBox.about(
@@ -164,57 +534,41 @@ class OrphismMainWindow(QMainWindow):
         )
 
     def changeLanguage(self, language):
-        """Change the application language"""
-        app = QApplication.instance()
-        
-        if hasattr(app, 'translator'):
-            app.removeTranslator(app.translator)
-        
-        app.translator = QTranslator()
-        
-        if language == 'en':
-            pass  # English is default
-        elif language == 'ru':
-            translation_file = os.path.join('translations', 'audiodb_ru.qm')
-            if os.path.exists(translation_file):
-                app.translator.load(translation_file)
-                app.installTranslator(app.translator)
-        
-        self.updateTranslations()
+        """Change the application language; widgets relabel themselves"""
+        manager = OrphismLocalizationManager.instance(QApplication.instance())
+        if not manager.change_language(language):
+            self.statusBar.showMessage(self.tr("No translation available for %s") % language)
 
-    def updateTranslations(self):
-        """Update all translatable strings in the interface"""
+    def changeEvent(self, event):
+        """Relabel the window in place when the language changes"""
+        if event.type() == QEvent.LanguageChange:
+            self.retranslateUi()
+        super().changeEvent(event)
+
+    def retranslateUi(self):
+        """Set the window's own texts in the current language, without reading the database"""
         self.setWindowTitle(self.tr("AudioDB"))
         self.statusBar.showMessage(self.tr("Ready"))
-        
-        # Clear and recreate menu
-        self.menuBar.clear()
-        self.menuBar.setupMenus()
-        
-        # Update main tab bar
-        tab_texts = [self.tr("Library"), self.tr("Playlists"), 
-                     self.tr("Favorites"), self.tr("Recent")]
-        for i, text in enumerate(tab_texts):
-            if i < self.main_tab_bar.count():
-                self.main_tab_bar.setTabText(i, text)
-        
-        # Update view mode bar
-        for i in range(self.media_display_panel.view_mode_bar.count()):
-            if i == 0:
-                self.media_display_panel.view_mode_bar.setTabText(i, self.tr("Tiles"))
-            elif i == 1:
-                self.media_display_panel.view_mode_bar.setTabText(i, self.tr("Table"))
-        
-        # Update table headers
-        self.media_display_panel.table_view.setHorizontalHeaderLabels([
-            self.tr("Name"), self.tr("Duration"), self.tr("Size"), self.tr("Format")
-        ])
-        
-        # Refresh data display
-        self.media_display_panel.refreshData()
+        if hasattr(self, 'library_stats'):
+            self.showLibraryStats(self.library_stats)
 
     def closeEvent(self, event):
         """Handle window close event"""
+        # Stop playback and syncing, then let queued writes finish
+        if hasattr(self, 'playback_engine'):
+            self.playback_engine.stop()
+        if hasattr(self, 'watchdog'):
+            self.watchdog.stop()
+        if getattr(self, 'maintenance_thread', None) is not None:
+            self.maintenance_thread.cancel()
+            self.maintenance_thread.wait()
+        if hasattr(self, 'library_watcher'):
+            self.library_watcher.stop()
+        if hasattr(self, 'import_runner'):
+            self.import_runner.stop()
+        if hasattr(self, 'db_worker'):
+            self.db_worker.stop()
+        
         # Close database connection
         if hasattr(self, 'db') and self.db:
             self.db.disconnect()
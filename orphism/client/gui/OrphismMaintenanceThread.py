@@ -0,0 +1,39 @@
+from PySide6.QtCore import QThread, Signal
+from orphism.core.OrphismMaintenance import OrphismMaintenance
+
+
+class OrphismMaintenanceThread(QThread):
+    """
+    Runs backups and housekeeping off the GUI thread.
+
+    Emits progressChanged(task, done, total) while a backup copies pages and
+    tasksFinished(results) with the (task, ok, message) of every task run.
+    """
+    progressChanged = Signal(str, int, int)
+    tasksFinished = Signal(list)
+
+    def __init__(self, db_path, task=None, parent=None):
+        """
+        Args:
+            db_path (str): Path to the SQLite database file
+            task (str): Task to run now, or None for every due task
+        """
+        super().__init__(parent)
+        self.task = task
+        self.maintenance = OrphismMaintenance(db_path)
+
+    def run(self):
+        results = []
+        # Report back even when a task raised
+        try:
+            if self.task is None:
+                results = self.maintenance.run_due(progress=self.progressChanged.emit)
+            else:
+                result = self.maintenance.run_task(self.task, progress=self.progressChanged.emit)
+                results = [result] if result else []
+        finally:
+            self.tasksFinished.emit(results)
+
+    def cancel(self):
+        """Stop at the next step of the running task"""
+        self.maintenance.cancel()
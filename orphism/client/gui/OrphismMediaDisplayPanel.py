@@ -8,7 +8,10 @@ from PySide6.QtWidgets import (
     QTabBar,
     QGridLayout
 )
-from PySide6.QtCore import Qt, QSize
+from PySide6.QtCore import Qt, QEvent, QSize
+from orphism.core.OrphismDisplay import OrphismDisplayCache
+from orphism.core.OrphismProfiler import get_profiler
+from orphism.core.OrphismRecords import AUDIO_FILE_SUMMARY_COLUMNS
 
 class OrphismMediaDisplayPanel(QWidget):
 
@@ -22,6 +25,8 @@ class OrphismMediaDisplayPanel(QWidget):
 
         self.db = parent.db if hasattr(parent, 'db') else None
 
+        self.display_cache = parent.display_cache if hasattr(parent, 'display_cache') else OrphismDisplayCache()
+
         self.setupPanel()
     
 
@@ -40,6 +45,28 @@ class OrphismMediaDisplayPanel(QWidget):
         
         # Connect tab bar switching
         self.view_mode_bar.currentChanged.connect(self.content_stack.setCurrentIndex)
+        
+        self.retranslateUi()
+    
+
+    def changeEvent(self, event):
+
+        """Relabel tabs and headers in place when the language changes"""
+
+        if event.type() == QEvent.LanguageChange:
+            self.retranslateUi()
+        super().changeEvent(event)
+    
+
+    def retranslateUi(self):
+
+        """Set the view mode and column labels in the current language"""
+
+        self.view_mode_bar.setTabText(0, self.tr("Tiles"))
+        self.view_mode_bar.setTabText(1, self.tr("Table"))
+        self.table_view.setHorizontalHeaderLabels([
+            self.tr("Name"), self.tr("Duration"), self.tr("Size"), self.tr("Format")
+        ])
     
     def createViewModeBar(self):
 
@@ -47,9 +74,9 @@ class OrphismMediaDisplayPanel(QWidget):
 
         view_mode_bar = QTabBar()
 
-        view_mode_bar.addTab(self.tr("Tiles"))
+        view_mode_bar.addTab("")
 
-        view_mode_bar.addTab(self.tr("Table"))
+        view_mode_bar.addTab("")
 
         view_mode_bar.setExpanding(False)
 
@@ -120,7 +147,6 @@ class OrphismMediaDisplayPanel(QWidget):
         """Create the table view for displaying media items as a table"""
         table_view = QTableWidget()
         table_view.setColumnCount(4)
-        table_view.setHorizontalHeaderLabels(["Name", "Duration", "Size", "Format"])
         
         # Populate with dummy data for now
         table_view.setRowCount(12)
@@ -135,34 +161,33 @@ class OrphismMediaDisplayPanel(QWidget):
         """Refresh the display with data from the database"""
         if not self.db:
             return
-            
+        with get_profiler().span('view.refresh_library'):
+            self._populate()
+    
+    def _populate(self):
         # Clear existing data
         self.tile_view.clear()
         self.table_view.setRowCount(0)
         
         # Get audio files from database
-        audio_files = self.db.get_all_audio_files()
+        audio_files = self.db.get_all_audio_files(columns=AUDIO_FILE_SUMMARY_COLUMNS)
+        
+        # Display strings are shared with the other views and formatted
+        # only for rows that changed since they were last shown
+        display_rows = self.display_cache.rows(audio_files)
         
         # Update tile view
-        for audio in audio_files:
-            duration_str = f"{int(audio['duration'] // 60)}:{int(audio['duration'] % 60):02d}" if audio['duration'] else "Unknown"
-            size_str = f"{audio['size'] / (1024*1024):.2f}MB" if audio['size'] else "Unknown"
-            
-            item = QListWidgetItem(f"{audio['filename']}\nDuration: {duration_str}\nSize: {size_str}")
+        for audio, row in zip(audio_files, display_rows):
+            item = QListWidgetItem(row[4])
             item.setSizeHint(QSize(150, 100))
-            item.setData(Qt.UserRole, audio['id'])  # Store ID for later reference
+            item.setData(Qt.UserRole, audio.id)  # Store ID for later reference
             self.tile_view.addItem(item)
         
         # Update table view
         self.table_view.setRowCount(len(audio_files))
-        for row, audio in enumerate(audio_files):
-            duration_str = f"{int(audio['duration'] // 60)}:{int(audio['duration'] % 60):02d}" if audio['duration'] else "Unknown"
-            size_str = f"{audio['size'] / (1024*1024):.2f}MB" if audio['size'] else "Unknown"
-            
-            self.table_view.setItem(row, 0, QTableWidgetItem(audio['filename']))
-            self.table_view.setItem(row, 1, QTableWidgetItem(duration_str))
-            self.table_view.setItem(row, 2, QTableWidgetItem(size_str))
-            self.table_view.setItem(row, 3, QTableWidgetItem(audio['format'] or "Unknown"))
+        for row, (audio, display) in enumerate(zip(audio_files, display_rows)):
+            for column in range(4):
+                self.table_view.setItem(row, column, QTableWidgetItem(display[column]))
             
             # Store ID in the first column for reference
-            self.table_view.item(row, 0).setData(Qt.UserRole, audio['id'])
\ No newline at end of file
+            self.table_view.item(row, 0).setData(Qt.UserRole, audio.id)
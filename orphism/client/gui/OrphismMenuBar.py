@@ -3,15 +3,17 @@ from PySide6.QtWidgets import (
     QListWidgetItem, QTableWidget, QHBoxLayout, QSplitter, QTabBar, QFrame, QLabel,
     QGridLayout, QStatusBar, QFileDialog, QMessageBox, QScrollArea, QVBoxLayout
 )
-from PySide6.QtCore import Qt, QTranslator, QSize
-from PySide6.QtGui import QAction
+from PySide6.QtCore import Qt, QEvent, QTranslator, QSize
+from PySide6.QtGui import QAction, QKeySequence
 import os
+from orphism.core.OrphismMaintenance import BACKUP
 
 class OrphismMenuBar(QMenuBar):
     """Encapsulates the menu bar functionality"""
     def __init__(self, parent=None):
         super().__init__(parent)
         self.parent = parent
+        self._undo_labels = (None, None)
         self.setupMenus()
     
     def setupMenus(self):
@@ -19,62 +21,209 @@ class OrphismMenuBar(QMenuBar):
         self.createFileMenu()
         self.createEditMenu()
         self.createViewMenu()
+        self.createPlaybackMenu()
         self.createLanguageMenu()
         self.createHelpMenu()
+        self.retranslateUi()
+    
+    def changeEvent(self, event):
+        """Relabel menus and actions in place when the language changes"""
+        if event.type() == QEvent.LanguageChange:
+            self.retranslateUi()
+        super().changeEvent(event)
+    
+    def retranslateUi(self):
+        """Set every menu and action text in the current language"""
+        self.file_menu.setTitle(self.tr('File'))
+        self.open_action.setText(self.tr('Open'))
+        self.open_action.setStatusTip(self.tr('Open file'))
+        self.watch_action.setText(self.tr('Watch Folder...'))
+        self.watch_action.setStatusTip(self.tr('Keep a folder in sync with the library'))
+        self.import_action.setText(self.tr('Import Folder...'))
+        self.import_action.setStatusTip(self.tr('Add the audio files of a folder tree; resumed if interrupted'))
+        self.save_action.setText(self.tr('Save'))
+        self.save_action.setStatusTip(self.tr('Save file'))
+        self.backup_action.setText(self.tr('Back Up Library'))
+        self.backup_action.setStatusTip(self.tr('Copy the library database to the backup folder'))
+        self.maintenance_action.setText(self.tr('Run Maintenance'))
+        self.maintenance_action.setStatusTip(self.tr('Back up, compact and check the library if due'))
+        self.exit_action.setText(self.tr('Exit'))
+        self.exit_action.setStatusTip(self.tr('Exit application'))
+        
+        self.edit_menu.setTitle(self.tr('Edit'))
+        self.updateUndoActions(*self._undo_labels)
+        self.favorite_action.setText(self.tr('Add to Favorites'))
+        self.unfavorite_action.setText(self.tr('Remove from Favorites'))
+        self.delete_action.setText(self.tr('Remove from Library'))
+        self.delete_action.setStatusTip(self.tr('Remove the selected tracks from the library'))
+        
+        self.view_menu.setTitle(self.tr('View'))
+        self.fullscreen_action.setText(self.tr('Fullscreen'))
+        self.overlay_action.setText(self.tr('Performance Overlay'))
+        self.overlay_action.setStatusTip(self.tr('Time database calls, view refreshes and the event loop'))
+        self.capture_action.setText(self.tr('Profile Python'))
+        self.capture_action.setStatusTip(self.tr('Record a cProfile and tracemalloc capture'))
+        self.export_profile_action.setText(self.tr('Export Performance Data...'))
+        self.export_profile_action.setStatusTip(self.tr('Save timings, stalls and captures for offline analysis'))
+        
+        self.playback_menu.setTitle(self.tr('Playback'))
+        self.play_action.setText(self.tr('Play'))
+        self.play_action.setStatusTip(self.tr('Play the selected playlist or track list'))
+        self.pause_action.setText(self.tr('Pause/Resume'))
+        self.previous_action.setText(self.tr('Previous'))
+        self.next_action.setText(self.tr('Next'))
+        self.stop_action.setText(self.tr('Stop'))
+        
+        # Language names stay in their own language
+        self.language_menu.setTitle(self.tr('Language'))
+        
+        self.help_menu.setTitle(self.tr('Help'))
+        self.about_action.setText(self.tr('About'))
     
     def createFileMenu(self):
         """Create the File menu"""
-        file_menu = self.addMenu(self.tr('File'))
+        self.file_menu = self.addMenu('')
+        
+        self.open_action = QAction(self)
+        self.open_action.triggered.connect(self.parent.openFile)
+        self.file_menu.addAction(self.open_action)
         
-        open_action = QAction(self.tr('Open'), self)
-        open_action.setStatusTip(self.tr('Open file'))
-        open_action.triggered.connect(self.parent.openFile)
-        file_menu.addAction(open_action)
+        self.watch_action = QAction(self)
+        self.watch_action.triggered.connect(self.parent.watchFolder)
+        self.file_menu.addAction(self.watch_action)
         
-        save_action = QAction(self.tr('Save'), self)
-        save_action.setStatusTip(self.tr('Save file'))
-        file_menu.addAction(save_action)
+        self.import_action = QAction(self)
+        self.import_action.triggered.connect(self.parent.importFolder)
+        self.file_menu.addAction(self.import_action)
         
-        file_menu.addSeparator()
+        self.save_action = QAction(self)
+        self.file_menu.addAction(self.save_action)
         
-        exit_action = QAction(self.tr('Exit'), self)
-        exit_action.setStatusTip(self.tr('Exit application'))
-        exit_action.triggered.connect(self.parent.close)
-        file_menu.addAction(exit_action)
+        self.file_menu.addSeparator()
+        
+        self.backup_action = QAction(self)
+        self.backup_action.triggered.connect(lambda: self.parent.runMaintenance(BACKUP))
+        self.file_menu.addAction(self.backup_action)
+        
+        self.maintenance_action = QAction(self)
+        self.maintenance_action.triggered.connect(lambda: self.parent.runMaintenance())
+        self.file_menu.addAction(self.maintenance_action)
+        
+        self.file_menu.addSeparator()
+        
+        self.exit_action = QAction(self)
+        self.exit_action.triggered.connect(self.parent.close)
+        self.file_menu.addAction(self.exit_action)
 
     def createEditMenu(self):
         """Create the Edit menu"""
-        edit_menu = self.addMenu(self.tr('Edit'))
+        self.edit_menu = self.addMenu('')
+        
+        self.undo_action = QAction(self)
+        self.undo_action.setShortcut(QKeySequence.Undo)
+        self.undo_action.triggered.connect(self.parent.undo)
+        self.edit_menu.addAction(self.undo_action)
+        
+        self.redo_action = QAction(self)
+        self.redo_action.setShortcut(QKeySequence.Redo)
+        self.redo_action.triggered.connect(self.parent.redo)
+        self.edit_menu.addAction(self.redo_action)
+        
+        self.edit_menu.addSeparator()
         
-        undo_action = QAction(self.tr('Undo'), self)
-        edit_menu.addAction(undo_action)
+        self.favorite_action = QAction(self)
+        self.favorite_action.triggered.connect(lambda: self.parent.setSelectedFavorite(True))
+        self.edit_menu.addAction(self.favorite_action)
         
-        redo_action = QAction(self.tr('Redo'), self)
-        edit_menu.addAction(redo_action)
+        self.unfavorite_action = QAction(self)
+        self.unfavorite_action.triggered.connect(lambda: self.parent.setSelectedFavorite(False))
+        self.edit_menu.addAction(self.unfavorite_action)
+        
+        self.delete_action = QAction(self)
+        self.delete_action.setShortcut(QKeySequence.Delete)
+        self.delete_action.triggered.connect(self.parent.deleteSelected)
+        self.edit_menu.addAction(self.delete_action)
+    
+    def updateUndoActions(self, undo_label, redo_label):
+        """
+        Name the edits Undo and Redo would revert or repeat
+        
+        Args:
+            undo_label (str): Label of the latest edit, or None
+            redo_label (str): Label of the latest undone edit, or None
+        """
+        self._undo_labels = (undo_label, redo_label)
+        self.undo_action.setEnabled(undo_label is not None)
+        self.undo_action.setText(self.tr('Undo %s') % undo_label if undo_label else self.tr('Undo'))
+        self.redo_action.setEnabled(redo_label is not None)
+        self.redo_action.setText(self.tr('Redo %s') % redo_label if redo_label else self.tr('Redo'))
 
     def createViewMenu(self):
         """Create the View menu"""
-        view_menu = self.addMenu(self.tr('View'))
+        self.view_menu = self.addMenu('')
+        
+        self.fullscreen_action = QAction(self)
+        self.view_menu.addAction(self.fullscreen_action)
+        
+        self.view_menu.addSeparator()
+        
+        self.overlay_action = QAction(self)
+        self.overlay_action.setCheckable(True)
+        self.overlay_action.toggled.connect(self.parent.setPerformanceOverlay)
+        self.view_menu.addAction(self.overlay_action)
+        
+        self.capture_action = QAction(self)
+        self.capture_action.setCheckable(True)
+        self.capture_action.toggled.connect(self.parent.setProfiling)
+        self.view_menu.addAction(self.capture_action)
+        
+        self.export_profile_action = QAction(self)
+        self.export_profile_action.triggered.connect(self.parent.exportPerformanceData)
+        self.view_menu.addAction(self.export_profile_action)
+
+    def createPlaybackMenu(self):
+        """Create the Playback menu"""
+        self.playback_menu = self.addMenu('')
+        engine = self.parent.playback_engine
+        
+        self.play_action = QAction(self)
+        self.play_action.triggered.connect(self.parent.playCurrent)
+        self.playback_menu.addAction(self.play_action)
+        
+        self.pause_action = QAction(self)
+        self.pause_action.triggered.connect(self.parent.togglePause)
+        self.playback_menu.addAction(self.pause_action)
+        
+        self.playback_menu.addSeparator()
+        
+        self.previous_action = QAction(self)
+        self.previous_action.triggered.connect(engine.previous)
+        self.playback_menu.addAction(self.previous_action)
+        
+        self.next_action = QAction(self)
+        self.next_action.triggered.connect(engine.next)
+        self.playback_menu.addAction(self.next_action)
         
-        fullscreen_action = QAction(self.tr('Fullscreen'), self)
-        view_menu.addAction(fullscreen_action)
+        self.stop_action = QAction(self)
+        self.stop_action.triggered.connect(engine.stop)
+        self.playback_menu.addAction(self.stop_action)
 
     def createLanguageMenu(self):
         """Create the Language menu"""
-        language_menu = self.addMenu(self.tr('Language'))
+        self.language_menu = self.addMenu('')
         
         english_action = QAction('English', self)
         english_action.triggered.connect(lambda: self.parent.changeLanguage('en'))
-        language_menu.addAction(english_action)
+        self.language_menu.addAction(english_action)
         
         russian_action = QAction('Русский', self)
         russian_action.triggered.connect(lambda: self.parent.changeLanguage('ru'))
-        language_menu.addAction(russian_action)
+        self.language_menu.addAction(russian_action)
 
     def createHelpMenu(self):
         """Create the Help menu"""
-        help_menu = self.addMenu(self.tr('Help'))
+        self.help_menu = self.addMenu('')
         
-        about_action = QAction(self.tr('About'), self)
-        about_action.triggered.connect(self.parent.showAboutDialog)
-        help_menu.addAction(about_action)
\ No newline at end of file
+        self.about_action = QAction(self)
+        self.about_action.triggered.connect(self.parent.showAboutDialog)
+        self.help_menu.addAction(self.about_action)
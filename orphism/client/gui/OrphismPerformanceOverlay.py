@@ -0,0 +1,62 @@
+import tracemalloc
+from PySide6.QtWidgets import QLabel
+from PySide6.QtCore import QEvent, QTimer
+from orphism.core.OrphismProfiler import memory_usage
+
+
+class OrphismPerformanceOverlay(QLabel):
+    """
+    Status bar readout of event loop and database latency, queue depths and
+    memory, refreshed while shown from the spans of the last few seconds.
+    """
+    UPDATE_INTERVAL_MS = 1000
+    WINDOW_SECONDS = 5
+
+    def __init__(self, profiler, parent=None):
+        """
+        Args:
+            profiler (OrphismProfiler): Source of the latencies
+            parent: Main window owning db_worker, library_watcher and import_runner
+        """
+        super().__init__(parent)
+        self.profiler = profiler
+        self.main_window = parent
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.updateReadout)
+        self.hide()
+
+    def start(self):
+        self.updateReadout()
+        self.show()
+        self.timer.start(self.UPDATE_INTERVAL_MS)
+
+    def stop(self):
+        self.timer.stop()
+        self.hide()
+
+    def changeEvent(self, event):
+        if event.type() == QEvent.LanguageChange and self.timer.isActive():
+            self.updateReadout()
+        super().changeEvent(event)
+
+    def updateReadout(self):
+        """Render the latest measurements"""
+        loop = self.profiler.recent('eventloop.latency', self.WINDOW_SECONDS)
+        queries = self.profiler.recent('db.query', self.WINDOW_SECONDS)
+        parts = [
+            self.tr("UI %.0f ms") % max(loop, default=0.0),
+            self.tr("DB %.2f ms avg, %.1f ms max") % (
+                sum(queries) / len(queries) if queries else 0.0, max(queries, default=0.0)
+            ),
+            self.tr("Queued %d db, %d sync, %d import") % (
+                self.main_window.db_worker.pending(),
+                self.main_window.library_watcher.pending(),
+                self.main_window.import_runner.pending()
+            ),
+        ]
+        memory = memory_usage()
+        if memory is not None:
+            parts.append(self.tr("%.0f MB") % (memory / 1024 ** 2))
+        if tracemalloc.is_tracing():
+            parts.append(self.tr("%.0f MB traced") % (tracemalloc.get_traced_memory()[0] / 1024 ** 2))
+        self.setText(" | ".join(parts))
@@ -0,0 +1,95 @@
+from PySide6.QtWidgets import (
+    QWidget,
+    QLabel,
+    QTableWidget,
+    QTableWidgetItem,
+    QVBoxLayout
+)
+from PySide6.QtCore import Qt, QEvent
+from orphism.core.OrphismDisplay import OrphismDisplayCache
+from orphism.core.OrphismProfiler import get_profiler
+
+class OrphismSmartPlaylistView(QWidget):
+    """Table of the tracks matched by a smart playlist, or of a regular playlist"""
+    def __init__(self, cache, definition=None, parent=None, display_cache=None):
+        super().__init__(parent)
+        self.cache = cache
+        self.display_cache = display_cache or OrphismDisplayCache()
+        self.definition = definition
+        self.playlist_id = None
+        self._shown = None
+        self.setupView()
+    
+    def setupView(self):
+        """Setup the summary line and the track table"""
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        
+        self.summary_label = QLabel()
+        layout.addWidget(self.summary_label)
+        
+        self.table_view = QTableWidget()
+        self.table_view.setColumnCount(4)
+        layout.addWidget(self.table_view)
+        self.retranslateUi()
+    
+    def changeEvent(self, event):
+        """Relabel the headers in place when the language changes"""
+        if event.type() == QEvent.LanguageChange:
+            self.retranslateUi()
+        super().changeEvent(event)
+    
+    def retranslateUi(self):
+        """Set the column labels in the current language"""
+        self.table_view.setHorizontalHeaderLabels([
+            self.tr("Name"), self.tr("Duration"), self.tr("Size"), self.tr("Format")
+        ])
+    
+    def setDefinition(self, definition):
+        """
+        Show another smart playlist
+        
+        Args:
+            definition (dict|str): Rule definition, or None to clear the view
+        """
+        self.definition = definition
+        self.playlist_id = None
+        self._shown = None
+        self.refresh()
+    
+    def setPlaylist(self, playlist_id):
+        """
+        Show the items of a regular playlist
+        
+        Args:
+            playlist_id (int): ID of the playlist
+        """
+        self.definition = None
+        self.playlist_id = playlist_id
+        self._shown = None
+        self.refresh()
+    
+    def refresh(self):
+        """Re-render only if the cached result changed since the last refresh"""
+        with get_profiler().span('view.refresh_playlist'):
+            self._populate()
+    
+    def _populate(self):
+        if self.playlist_id is not None:
+            tracks = self.cache.db.get_playlist_tracks(self.playlist_id, self.cache.columns)
+        elif self.definition is not None:
+            tracks = self.cache.get(self.definition)
+        else:
+            self._shown = None
+            self.table_view.setRowCount(0)
+            return
+        
+        if tracks is self._shown:
+            return
+        self._shown = tracks
+        
+        self.table_view.setRowCount(len(tracks))
+        for row, (audio, display) in enumerate(zip(tracks, self.display_cache.rows(tracks))):
+            for column in range(4):
+                self.table_view.setItem(row, column, QTableWidgetItem(display[column]))
+            self.table_view.item(row, 0).setData(Qt.UserRole, audio.id)
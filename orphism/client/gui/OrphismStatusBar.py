@@ -2,16 +2,48 @@ from PySide6.QtWidgets import (
     QLabel,
     QStatusBar
 )
+from PySide6.QtCore import QEvent
 
 class OrphismStatusBar(QStatusBar):
     """Encapsulates the status bar functionality"""
     def __init__(self, parent=None):
         super().__init__(parent)
+        self.stats = None
         self.setupStatusBar()
     
     def setupStatusBar(self):
         """Setup the application status bar"""
         self.showMessage(self.tr("Ready"))
         
+        self.library_label = QLabel()
+        self.addPermanentWidget(self.library_label)
+        
         version_label = QLabel("AudioDB v0.0.3")
-        self.addPermanentWidget(version_label)
\ No newline at end of file
+        self.addPermanentWidget(version_label)
+    
+    def changeEvent(self, event):
+        """Re-render the totals shown last when the language changes"""
+        if event.type() == QEvent.LanguageChange:
+            self.showLibraryStats(self.stats)
+        super().changeEvent(event)
+    
+    def showLibraryStats(self, stats):
+        """
+        Show library totals next to the version label
+        
+        Args:
+            stats: Record from AudioDBSqlite.get_library_stats, or None
+        """
+        self.stats = stats
+        if stats is None:
+            self.library_label.clear()
+            return
+        
+        total_seconds = int(stats.total_duration)
+        hours, remainder = divmod(total_seconds, 3600)
+        self.library_label.setText(
+            self.tr("%d tracks, %d:%02d:%02d, %.2f GB") % (
+                stats.track_count, hours, remainder // 60, remainder % 60,
+                stats.total_size / (1024 ** 3)
+            )
+        )
@@ -1,7 +1,7 @@
 from PySide6.QtWidgets import (
     QTabBar
 )
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QEvent
 
 class OrphismTabBar(QTabBar):
     """Custom tab bar for the main application"""
@@ -13,8 +13,24 @@ class OrphismTabBar(QTabBar):
         self.setElideMode(Qt.ElideRight)
         self.setMovable(True)
         
-        # Add default tabs
-        self.addTab(self.tr("Library"))
-        self.addTab(self.tr("Playlists"))
-        self.addTab(self.tr("Favorites"))
-        self.addTab(self.tr("Recent"))
\ No newline at end of file
+        # Add default tabs; the key names a tab wherever it was moved to
+        for key in ("library", "playlists", "favorites", "recent"):
+            self.setTabData(self.addTab(""), key)
+        self.retranslateUi()
+    
+    def changeEvent(self, event):
+        """Relabel the tabs in place when the language changes"""
+        if event.type() == QEvent.LanguageChange:
+            self.retranslateUi()
+        super().changeEvent(event)
+    
+    def retranslateUi(self):
+        """Set the tab texts in the current language"""
+        texts = {
+            "library": self.tr("Library"),
+            "playlists": self.tr("Playlists"),
+            "favorites": self.tr("Favorites"),
+            "recent": self.tr("Recent"),
+        }
+        for index in range(self.count()):
+            self.setTabText(index, texts[self.tabData(index)])
\ No newline at end of file
@@ -0,0 +1,270 @@
+import asyncio
+import os
+import queue
+from orphism.core.OrphismDB import AudioDBSqlite
+from orphism.core.OrphismDBWorker import OrphismDBWorker
+from orphism.core.OrphismLogging import get_logger
+from orphism.core.OrphismRecords import AUDIO_FILE_COLUMNS
+
+# Connections serving reads; WAL lets them run next to the writer
+DEFAULT_READERS = min(4, os.cpu_count() or 1)
+
+# Rows per transaction when ingesting, and transactions queued at once
+INGEST_BATCH_SIZE = 5000
+INGEST_MAX_PENDING = 2
+
+
+class AsyncAudioDB:
+    """
+    asyncio facade over AudioDBSqlite for embedding the catalog in a service.
+
+    AudioDBSqlite methods block and an instance must stay on one thread, so
+    every call runs on a database thread owning its own connection: writes
+    on a single OrphismDBWorker, which keeps them ordered, reads on a pool
+    of read-only workers sharing one job queue. Coroutines only wait for
+    the result, the event loop is never blocked by SQLite.
+
+    Usage:
+        async with AsyncAudioDB("audiodb.sqlite") as db:
+            audio = await db.get_audio_file(1)
+            async for page in db.iter_pages(page_size=500):
+                ...
+    """
+
+    def __init__(self, db_path="audiodb.sqlite", readers=DEFAULT_READERS):
+        """
+        Initialize the facade; call open() before use.
+
+        Args:
+            db_path (str): Path to the SQLite database file
+            readers (int): Number of read connections
+        """
+        self.db_path = db_path
+        self.logger = get_logger('AsyncAudioDB')
+        self.writer = OrphismDBWorker(db_path, name="AsyncAudioDB-writer")
+        jobs = queue.Queue()
+        self.readers = [
+            OrphismDBWorker(db_path, jobs=jobs, read_only=True, name=f"AsyncAudioDB-reader-{i}")
+            for i in range(max(1, readers))
+        ]
+
+    async def open(self):
+        """
+        Start the database threads and create missing tables.
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        self.writer.start()
+        # Tables must exist before read-only connections look at them
+        if not await self._write(AudioDBSqlite.initialize_database):
+            self.logger.error("Cannot open database %s", self.db_path)
+            return False
+        for reader in self.readers:
+            reader.start()
+        return True
+
+    async def close(self):
+        """Finish queued jobs and stop the database threads"""
+        for reader in self.readers:
+            reader.stop(wait=False)
+        self.writer.stop(wait=False)
+        threads = [thread for thread in self.readers + [self.writer] if thread.is_alive()]
+        await asyncio.get_running_loop().run_in_executor(
+            None, lambda: [thread.join() for thread in threads]
+        )
+
+    async def __aenter__(self):
+        if not await self.open():
+            await self.close()
+            raise RuntimeError(f"Cannot open database {self.db_path}")
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def pending(self):
+        """
+        Returns:
+            tuple: Queued (writes, reads)
+        """
+        return self.writer.pending(), self.readers[0].pending()
+
+    def _read(self, fn, *args, **kwargs):
+        # Readers share one queue, submitting through any of them reaches the pool
+        return asyncio.wrap_future(self.readers[0].submit(fn, *args, **kwargs))
+
+    def _write(self, fn, *args, **kwargs):
+        return asyncio.wrap_future(self.writer.submit(fn, *args, **kwargs))
+
+    # Reads
+
+    async def get_audio_file(self, file_id):
+        """See AudioDBSqlite.get_audio_file"""
+        return await self._read(AudioDBSqlite.get_audio_file, file_id)
+
+    async def get_all_audio_files(self, limit=None, offset=0, order_by="date_added", order="DESC",
+                                  columns=AUDIO_FILE_COLUMNS):
+        """See AudioDBSqlite.get_all_audio_files"""
+        return await self._read(AudioDBSqlite.get_all_audio_files, limit, offset, order_by, order, columns)
+
+    async def get_audio_files_by_id(self, file_ids, columns=AUDIO_FILE_COLUMNS):
+        """See AudioDBSqlite.get_audio_files_by_id"""
+        return await self._read(AudioDBSqlite.get_audio_files_by_id, list(file_ids), columns)
+
+    async def get_playlist_tracks(self, playlist_id, columns=('id', 'filepath')):
+        """See AudioDBSqlite.get_playlist_tracks"""
+        return await self._read(AudioDBSqlite.get_playlist_tracks, playlist_id, columns)
+
+    async def get_library_stats(self):
+        """See AudioDBSqlite.get_library_stats"""
+        return await self._read(AudioDBSqlite.get_library_stats)
+
+    async def get_format_stats(self):
+        """See AudioDBSqlite.get_format_stats"""
+        return await self._read(AudioDBSqlite.get_format_stats)
+
+    async def get_most_played(self, limit=10, columns=AUDIO_FILE_COLUMNS):
+        """See AudioDBSqlite.get_most_played"""
+        return await self._read(AudioDBSqlite.get_most_played, limit, columns)
+
+    async def execute_query(self, query, parameters=None):
+        """
+        Run a custom query; SELECT and PRAGMA statements go to the read pool,
+        everything else to the writer
+
+        Returns:
+            list: Query results as records
+        """
+        if query.strip().upper().startswith(("SELECT", "PRAGMA")):
+            return await self._read(AudioDBSqlite.execute_query, query, parameters)
+        return await self._write(AudioDBSqlite.execute_query, query, parameters)
+
+    async def iter_pages(self, page_size=1000, columns=AUDIO_FILE_COLUMNS):
+        """
+        Stream the library in ID order, one page at a time.
+
+        Pages are read by ID range, so late pages cost as much as early
+        ones, and the next page is fetched while the caller works on the
+        current one.
+
+        Args:
+            page_size (int): Records per page
+            columns (tuple): Columns to select, must include 'id'
+
+        Yields:
+            list: Records of one page
+        """
+        id_index = columns.index('id')
+        next_page = self._read(AudioDBSqlite.get_audio_files_after, 0, page_size, columns)
+        try:
+            while True:
+                page = await next_page
+                if not page:
+                    return
+                next_page = None
+                if len(page) == page_size:
+                    next_page = self._read(AudioDBSqlite.get_audio_files_after,
+                                           page[-1][id_index], page_size, columns)
+                yield page
+                if next_page is None:
+                    return
+        finally:
+            if next_page is not None:
+                next_page.cancel()
+
+    async def iter_audio_files(self, page_size=1000, columns=AUDIO_FILE_COLUMNS):
+        """
+        Stream the library in ID order, one record at a time.
+
+        Yields:
+            Record: Audio file with the requested columns
+        """
+        async for page in self.iter_pages(page_size, columns):
+            for audio in page:
+                yield audio
+
+    # Writes
+
+    async def add_audio_file(self, filename, filepath, duration=None, size=None,
+                             format=None, bitrate=None, sample_rate=None, channels=None):
+        """See AudioDBSqlite.add_audio_file"""
+        return await self._write(AudioDBSqlite.add_audio_file, filename, filepath, duration, size,
+                                 format, bitrate, sample_rate, channels)
+
+    async def update_audio_file(self, file_id, **kwargs):
+        """See AudioDBSqlite.update_audio_file"""
+        return await self._write(AudioDBSqlite.update_audio_file, file_id, **kwargs)
+
+    async def delete_audio_file(self, file_id):
+        """See AudioDBSqlite.delete_audio_file"""
+        return await self._write(AudioDBSqlite.delete_audio_file, file_id)
+
+    async def create_playlist(self, name, description=None):
+        """See AudioDBSqlite.create_playlist"""
+        return await self._write(AudioDBSqlite.create_playlist, name, description)
+
+    async def add_to_playlist(self, playlist_id, audio_id, position=None):
+        """See AudioDBSqlite.add_to_playlist"""
+        return await self._write(AudioDBSqlite.add_to_playlist, playlist_id, audio_id, position)
+
+    async def record_play(self, audio_id, played_at=None):
+        """See AudioDBSqlite.record_play"""
+        return await self._write(AudioDBSqlite.record_play, audio_id, played_at)
+
+    async def apply_library_changes(self, upserts=(), deletes=(), moves=()):
+        """See AudioDBSqlite.apply_library_changes"""
+        return await self._write(AudioDBSqlite.apply_library_changes,
+                                 list(upserts), list(deletes), list(moves))
+
+    async def ingest(self, files, batch_size=INGEST_BATCH_SIZE):
+        """
+        Bulk insert or update audio files.
+
+        Files are written in transactions of batch_size rows. At most
+        INGEST_MAX_PENDING transactions are queued, so a fast producer waits
+        for the writer instead of buffering the whole input.
+
+        Args:
+            files: Iterable or async iterable of dicts with filename,
+                filepath, size and format; existing rows are matched by filepath
+            batch_size (int): Rows per transaction
+
+        Returns:
+            int: Number of rows written
+
+        Raises:
+            RuntimeError: If a batch could not be written
+        """
+        pending = []
+        written = 0
+
+        async def drain(limit):
+            nonlocal written
+            while len(pending) > limit:
+                count, future = pending.pop(0)
+                if not await future:
+                    raise RuntimeError("Failed to write a batch of audio files")
+                written += count
+
+        async def flush(batch):
+            pending.append((len(batch), self._write(AudioDBSqlite.apply_library_changes, batch)))
+            await drain(INGEST_MAX_PENDING)
+
+        batch = []
+        if hasattr(files, '__aiter__'):
+            async for file in files:
+                batch.append(file)
+                if len(batch) >= batch_size:
+                    await flush(batch)
+                    batch = []
+        else:
+            for file in files:
+                batch.append(file)
+                if len(batch) >= batch_size:
+                    await flush(batch)
+                    batch = []
+        if batch:
+            await flush(batch)
+        await drain(0)
+        return written
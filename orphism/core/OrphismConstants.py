@@ -0,0 +1,9 @@
+# Application-wide constants
+
+# File extensions recognised as audio files when scanning folders
+AUDIO_FILE_EXTENSIONS = ('.mp3', '.wav', '.ogg', '.flac')
+
+# Import job states; running and paused jobs are resumed from their queue
+IMPORT_RUNNING = 'running'
+IMPORT_PAUSED = 'paused'
+IMPORT_DONE = 'done'
@@ -1,7 +1,52 @@
 import sqlite3
 import os
+import json
+import threading
+import time
 from datetime import datetime
-import logging
+from orphism.core.OrphismConstants import IMPORT_RUNNING, IMPORT_DONE
+from orphism.core.OrphismLogging import setup_logging, get_logger
+from orphism.core.OrphismProfiler import get_profiler
+from orphism.core.OrphismQueryStats import OrphismQueryStats, QUERY_STATS_ENV, stats_from_environment
+from orphism.core.OrphismRecords import AudioFile, AUDIO_FILE_COLUMNS, record_type
+from orphism.core.OrphismSmartPlaylist import (
+    compile_definition, parse_definition, SmartPlaylistError, ROWS_VERSION, TAGS_VERSION
+)
+
+# Columns that callers may sort by or update; anything else is rejected
+# before it reaches SQL text
+UPDATABLE_COLUMNS = frozenset(AUDIO_FILE_COLUMNS) - {'id'}
+ORDER_DIRECTIONS = ('ASC', 'DESC')
+
+# Size of the sqlite3 prepared statement cache per connection
+STATEMENT_CACHE_SIZE = 256
+
+# Columns aggregated into library_stats; updates touching only other
+# columns (renames, moves) do not fire the statistics triggers
+LIBRARY_STATS_COLUMNS = ('duration', 'size', 'format', 'play_count', 'favorite', 'last_played')
+
+
+def _library_stats_delta(row, sign):
+    """Statements adding (sign '+') or removing ('-') one row from the statistics"""
+    return f'''
+                UPDATE library_stats SET
+                    track_count = track_count {sign} 1,
+                    total_duration = total_duration {sign} COALESCE({row}.duration, 0),
+                    total_size = total_size {sign} COALESCE({row}.size, 0),
+                    total_plays = total_plays {sign} COALESCE({row}.play_count, 0),
+                    favorite_count = favorite_count {sign} (COALESCE({row}.favorite, 0) != 0),
+                    played_count = played_count {sign} ({row}.last_played IS NOT NULL)
+                WHERE id = 1;
+                INSERT INTO library_format_stats (format, track_count, total_duration, total_size)
+                VALUES (COALESCE({row}.format, ''), {sign}1, {sign}COALESCE({row}.duration, 0),
+                        {sign}COALESCE({row}.size, 0))
+                ON CONFLICT (format) DO UPDATE SET
+                    track_count = track_count + excluded.track_count,
+                    total_duration = total_duration + excluded.total_duration,
+                    total_size = total_size + excluded.total_size;
+                DELETE FROM library_format_stats
+                WHERE format = COALESCE({row}.format, '') AND track_count <= 0;
+    '''
 
 class AudioDBSqlite:
     """
@@ -9,6 +54,11 @@ class AudioDBSqlite:
     Handles database connection, table creation, and CRUD operations.
     """
     
+    # SQL text per statement shape; a bounded set of shapes keeps every
+    # statement in the sqlite3 prepared statement cache
+    _select_statements = {}
+    _update_statements = {}
+    
     def __init__(self, db_path="audiodb.sqlite"):
         """
         Initialize the database connection.
@@ -20,42 +70,35 @@ class AudioDBSqlite:
         self.connection = None
         self.cursor = None
         self.logger = self._setup_logger()
+        self.query_stats = stats_from_environment()
+        self.profiler = get_profiler()
         
     def _setup_logger(self):
         """Set up logging for database operations"""
-        logger = logging.getLogger('AudioDBSqlite')
-        logger.setLevel(logging.DEBUG)
-        
-        # Create handler if it doesn't exist
-        if not logger.handlers:
-            handler = logging.StreamHandler()
-            formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-            handler.setFormatter(formatter)
-            logger.addHandler(handler)
-            
-            # Add file handler
-            if not os.path.exists('logs'):
-                os.makedirs('logs')
-            file_handler = logging.FileHandler('logs/database.log')
-            file_handler.setFormatter(formatter)
-            logger.addHandler(file_handler)
-            
-        return logger
+        setup_logging()
+        return get_logger('AudioDBSqlite')
     
     def connect(self):
         """Establish connection to the SQLite database"""
         try:
-            self.connection = sqlite3.connect(self.db_path)
-            self.connection.row_factory = sqlite3.Row  # Return rows as dictionaries
+            self.connection = sqlite3.connect(self.db_path, cached_statements=STATEMENT_CACHE_SIZE)
             self.cursor = self.connection.cursor()
-            self.logger.info(f"Connected to database: {self.db_path}")
+            # New databases can return free pages in small steps (see
+            # OrphismMaintenance); this must precede the switch to WAL and
+            # has no effect on existing files
+            self.cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            # WAL lets the GUI keep reading while background workers write
+            self.cursor.execute("PRAGMA journal_mode=WAL")
+            self.cursor.execute("PRAGMA foreign_keys=ON")
+            self.logger.info("Connected to database: %s", self.db_path)
             return True
         except sqlite3.Error as e:
-            self.logger.error(f"Database connection error: {e}")
+            self.logger.error("Database connection error: %s", e)
             return False
     
     def disconnect(self):
         """Close the database connection"""
+        self._dump_query_stats()
         if self.connection:
             self.connection.close()
             self.connection = None
@@ -131,14 +174,350 @@ class AudioDBSqlite:
             )
             ''')
             
+            # Create maintenance log table (last run of every maintenance task)
+            self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS maintenance_log (
+                task TEXT PRIMARY KEY,
+                last_run TIMESTAMP NOT NULL,
+                result TEXT
+            )
+            ''')
+            
+            # Create watched folders table (library roots kept in sync)
+            self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS watched_folders (
+                path TEXT PRIMARY KEY,
+                date_added TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            ''')
+            
+            # Create import jobs and their queues of folders left to scan
+            self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS import_jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                root TEXT NOT NULL,
+                status TEXT NOT NULL,
+                files_imported INTEGER DEFAULT 0,
+                dirs_scanned INTEGER DEFAULT 0,
+                date_created TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                last_checkpoint TIMESTAMP,
+                error TEXT
+            )
+            ''')
+            self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS import_queue (
+                job_id INTEGER NOT NULL,
+                path TEXT NOT NULL,
+                PRIMARY KEY (job_id, path),
+                FOREIGN KEY (job_id) REFERENCES import_jobs (id) ON DELETE CASCADE
+            ) WITHOUT ROWID
+            ''')
+            
+            # Path lookups drive upserts and directory diffs
+            self.cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_audio_files_filepath ON audio_files (filepath)"
+            )
+            
+            # Default ordering of library pages
+            self.cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_audio_files_date_added ON audio_files (date_added)"
+            )
+            
+            # Most played lists
+            self.cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_audio_files_play_count ON audio_files (play_count)"
+            )
+            
+            self._initialize_library_stats()
+            self._initialize_smart_playlists()
+            
             self.connection.commit()
             self.logger.info("Database tables initialized successfully")
             return True
         except sqlite3.Error as e:
             self.connection.rollback()
-            self.logger.error(f"Error initializing database: {e}")
+            self.logger.error("Error initializing database: %s", e)
             return False
     
+    def _initialize_library_stats(self):
+        """Create the statistics tables and the triggers that maintain them"""
+        self.cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'library_stats'"
+        )
+        created = self.cursor.fetchone() is None
+        
+        # Single-row table of library totals
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS library_stats (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            track_count INTEGER NOT NULL DEFAULT 0,
+            total_duration REAL NOT NULL DEFAULT 0,
+            total_size INTEGER NOT NULL DEFAULT 0,
+            total_plays INTEGER NOT NULL DEFAULT 0,
+            favorite_count INTEGER NOT NULL DEFAULT 0,
+            played_count INTEGER NOT NULL DEFAULT 0
+        )
+        ''')
+        self.cursor.execute("INSERT OR IGNORE INTO library_stats (id) VALUES (1)")
+        
+        # Totals per audio format ('' for files without a format)
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS library_format_stats (
+            format TEXT PRIMARY KEY,
+            track_count INTEGER NOT NULL DEFAULT 0,
+            total_duration REAL NOT NULL DEFAULT 0,
+            total_size INTEGER NOT NULL DEFAULT 0
+        )
+        ''')
+        
+        self.cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_audio_files_stats_insert
+        AFTER INSERT ON audio_files
+        BEGIN {_library_stats_delta('NEW', '+')} END
+        ''')
+        self.cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_audio_files_stats_delete
+        AFTER DELETE ON audio_files
+        BEGIN {_library_stats_delta('OLD', '-')} END
+        ''')
+        self.cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_audio_files_stats_update
+        AFTER UPDATE OF {', '.join(LIBRARY_STATS_COLUMNS)} ON audio_files
+        BEGIN {_library_stats_delta('OLD', '-')} {_library_stats_delta('NEW', '+')} END
+        ''')
+        
+        # Libraries created before the statistics existed start from a full count
+        if created:
+            self._rebuild_library_stats()
+    
+    def _initialize_smart_playlists(self):
+        """Create smart playlist storage, rule indexes and column version counters"""
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS smart_playlists (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            definition TEXT NOT NULL,
+            date_created TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_modified TIMESTAMP
+        )
+        ''')
+        
+        # Indexes for the common rules: favorites by play count, recently played, format
+        self.cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_audio_files_favorite ON audio_files (favorite, play_count)"
+        )
+        self.cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_audio_files_last_played ON audio_files (last_played)"
+        )
+        self.cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_audio_files_format ON audio_files (format)"
+        )
+        
+        # Version counter per column, bumped only when a value really changes,
+        # so cached smart playlist results know when they are stale
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS column_versions (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+        ''')
+        versioned = [column for column in AUDIO_FILE_COLUMNS if column != 'id']
+        self.cursor.executemany(
+            "INSERT OR IGNORE INTO column_versions (name) VALUES (?)",
+            [(name,) for name in versioned + [ROWS_VERSION, TAGS_VERSION]]
+        )
+        changed = " OR ".join(
+            f"(name = '{column}' AND OLD.{column} IS NOT NEW.{column})" for column in versioned
+        )
+        self.cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_audio_files_version_update
+        AFTER UPDATE ON audio_files
+        BEGIN
+            UPDATE column_versions SET version = version + 1 WHERE {changed};
+        END
+        ''')
+        for table, event, name in (('audio_files', 'INSERT', ROWS_VERSION),
+                                   ('audio_files', 'DELETE', ROWS_VERSION),
+                                   ('audio_tags', 'INSERT', TAGS_VERSION),
+                                   ('audio_tags', 'DELETE', TAGS_VERSION)):
+            self.cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_version_{event.lower()}
+            AFTER {event} ON {table}
+            BEGIN
+                UPDATE column_versions SET version = version + 1 WHERE name = '{name}';
+            END
+            ''')
+    
+    def _rebuild_library_stats(self):
+        """Recompute the statistics tables from audio_files"""
+        self.cursor.execute('''
+        UPDATE library_stats SET
+            (track_count, total_duration, total_size, total_plays, favorite_count, played_count) = (
+                SELECT COUNT(*), COALESCE(SUM(duration), 0), COALESCE(SUM(size), 0),
+                       COALESCE(SUM(play_count), 0), COALESCE(SUM(favorite != 0), 0),
+                       COUNT(last_played)
+                FROM audio_files
+            )
+        WHERE id = 1
+        ''')
+        self.cursor.execute("DELETE FROM library_format_stats")
+        self.cursor.execute('''
+        INSERT INTO library_format_stats (format, track_count, total_duration, total_size)
+        SELECT COALESCE(format, ''), COUNT(*), COALESCE(SUM(duration), 0), COALESCE(SUM(size), 0)
+        FROM audio_files
+        GROUP BY COALESCE(format, '')
+        ''')
+    
+    # Statement execution
+    
+    def _execute(self, query, parameters=()):
+        """Execute a statement, timing it when query statistics or the profiler are enabled"""
+        if self.query_stats is None and not self.profiler.enabled:
+            return self.cursor.execute(query, parameters)
+        start = time.perf_counter()
+        self.cursor.execute(query, parameters)
+        self._record_query(query, parameters, start, self.cursor.rowcount)
+        return self.cursor
+    
+    def _executemany(self, query, seq_of_parameters):
+        """Execute a statement for every parameter set in one call"""
+        if self.query_stats is None and not self.profiler.enabled:
+            return self.cursor.executemany(query, seq_of_parameters)
+        seq_of_parameters = list(seq_of_parameters)
+        start = time.perf_counter()
+        self.cursor.executemany(query, seq_of_parameters)
+        self._record_query(query, seq_of_parameters[:1], start, self.cursor.rowcount, many=True)
+        return self.cursor
+    
+    def _fetchall(self, query, parameters=()):
+        """Execute a query and fetch all rows; fetching counts towards its time"""
+        if self.query_stats is None and not self.profiler.enabled:
+            return self.cursor.execute(query, parameters).fetchall()
+        start = time.perf_counter()
+        rows = self.cursor.execute(query, parameters).fetchall()
+        self._record_query(query, parameters, start, len(rows))
+        return rows
+    
+    def _fetchone(self, query, parameters=()):
+        """Execute a query and fetch the first row"""
+        if self.query_stats is None and not self.profiler.enabled:
+            return self.cursor.execute(query, parameters).fetchone()
+        start = time.perf_counter()
+        row = self.cursor.execute(query, parameters).fetchone()
+        self._record_query(query, parameters, start, 0 if row is None else 1)
+        return row
+    
+    def _record_query(self, query, parameters, start, rows, many=False):
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.profiler.record('db.query', elapsed_ms, start)
+        stats = self.query_stats
+        if stats is None:
+            return
+        plan = None
+        if stats.is_slow(elapsed_ms) and stats.needs_plan(query):
+            plan = self._explain(query, parameters[0] if many and parameters else parameters)
+        stats.record(query, elapsed_ms, rows, parameters, plan)
+    
+    def _explain(self, query, parameters):
+        """Capture the query plan on a separate cursor so results stay intact"""
+        try:
+            plan = self.connection.execute("EXPLAIN QUERY PLAN " + query, parameters or ()).fetchall()
+            return [row[-1] for row in plan]
+        except sqlite3.Error:
+            return None
+    
+    # Query statistics
+    
+    def enable_query_stats(self, slow_threshold_ms=100, explain=True):
+        """
+        Start timing every statement executed through this connection
+        
+        Args:
+            slow_threshold_ms (float): Statements taking longer go to the slow-query log
+            explain (bool): Capture EXPLAIN QUERY PLAN for slow statements
+        """
+        self.query_stats = OrphismQueryStats(slow_threshold_ms=slow_threshold_ms, explain=explain)
+    
+    def disable_query_stats(self):
+        """Stop timing statements and drop collected statistics"""
+        self.query_stats = None
+    
+    def stats(self):
+        """
+        Get collected statement timings
+        
+        Returns:
+            dict: Summary from OrphismQueryStats, or None when disabled
+        """
+        return self.query_stats.summary() if self.query_stats else None
+    
+    def _dump_query_stats(self):
+        """Write statistics to $AUDIODB_QUERY_STATS when it names a directory"""
+        dump_dir = os.environ.get(QUERY_STATS_ENV)
+        if not self.query_stats or not dump_dir or not os.path.isdir(dump_dir):
+            return
+        path = os.path.join(
+            dump_dir, f"querystats-{os.getpid()}-{threading.get_ident()}.json"
+        )
+        try:
+            self.query_stats.dump(path)
+        except OSError as e:
+            self.logger.error("Error writing query statistics to %s: %s", path, e)
+    
+    # Statement shapes
+    
+    @classmethod
+    def _select_statement(cls, columns, where=None, order_by=None, order="ASC", paged=False,
+                          tie_break=False):
+        """
+        Get the SELECT text for a statement shape.
+        
+        Args:
+            columns (tuple): Columns to select from audio_files
+            where (str): Fixed WHERE clause with placeholders
+            order_by (str): Validated column to order by
+            order (str): Validated direction
+            paged (bool): Append LIMIT ? OFFSET ?
+            tie_break (bool): Order rows with equal order_by values by id
+            
+        Returns:
+            str: SQL text, identical for every call with the same shape
+        """
+        key = (tuple(columns), where, order_by, order, paged, tie_break)
+        query = cls._select_statements.get(key)
+        if query is None:
+            unknown = set(key[0]) - set(AUDIO_FILE_COLUMNS)
+            if unknown:
+                raise sqlite3.OperationalError(f"no such column: {', '.join(sorted(unknown))}")
+            query = f"SELECT {', '.join(key[0])} FROM audio_files"
+            if where:
+                query += f" WHERE {where}"
+            if order_by:
+                query += f" ORDER BY {order_by} {order}"
+                if tie_break and order_by != 'id':
+                    query += f", id {order}"
+            if paged:
+                query += " LIMIT ? OFFSET ?"
+            cls._select_statements[key] = query
+        return query
+    
+    @classmethod
+    def _update_statement(cls, columns):
+        """
+        Get the UPDATE text for a sorted tuple of column names.
+        
+        Raises:
+            sqlite3.OperationalError: If a column cannot be updated
+        """
+        query = cls._update_statements.get(columns)
+        if query is None:
+            unknown = set(columns) - UPDATABLE_COLUMNS
+            if unknown:
+                raise sqlite3.OperationalError(f"cannot update column: {', '.join(sorted(unknown))}")
+            set_clause = ", ".join(f"{column} = ?" for column in columns)
+            query = cls._update_statements[columns] = f"UPDATE audio_files SET {set_clause} WHERE id = ?"
+        return query
+    
     # CRUD operations for audio files
     
     def add_audio_file(self, filename, filepath, duration=None, size=None, 
@@ -163,7 +542,7 @@ class AudioDBSqlite:
             return None
             
         try:
-            self.cursor.execute('''
+            self._execute('''
             INSERT INTO audio_files (filename, filepath, duration, size, format, 
                                     bitrate, sample_rate, channels, date_added)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
@@ -172,11 +551,11 @@ class AudioDBSqlite:
             
             self.connection.commit()
             last_id = self.cursor.lastrowid
-            self.logger.info(f"Added audio file: {filename} (ID: {last_id})")
+            self.logger.debug("Added audio file: %s (ID: %s)", filename, last_id)
             return last_id
         except sqlite3.Error as e:
             self.connection.rollback()
-            self.logger.error(f"Error adding audio file {filename}: {e}")
+            self.logger.error("Error adding audio file %s: %s", filename, e)
             return None
     
     def get_audio_file(self, file_id):
@@ -187,20 +566,20 @@ class AudioDBSqlite:
             file_id (int): ID of the audio file
             
         Returns:
-            dict: Audio file data or None if not found
+            AudioFile: Audio file record or None if not found
         """
         if not self.connection and not self.connect():
             return None
             
         try:
-            self.cursor.execute("SELECT * FROM audio_files WHERE id = ?", (file_id,))
-            result = self.cursor.fetchone()
-            return dict(result) if result else None
+            result = self._fetchone(self._select_statement(AUDIO_FILE_COLUMNS, where="id = ?"), (file_id,))
+            return AudioFile._new(result) if result else None
         except sqlite3.Error as e:
-            self.logger.error(f"Error retrieving audio file ID {file_id}: {e}")
+            self.logger.error("Error retrieving audio file ID %s: %s", file_id, e)
             return None
     
-    def get_all_audio_files(self, limit=None, offset=0, order_by="date_added", order="DESC"):
+    def get_all_audio_files(self, limit=None, offset=0, order_by="date_added", order="DESC",
+                            columns=AUDIO_FILE_COLUMNS, tie_break=False):
         """
         Get all audio files with optional pagination
         
@@ -209,26 +588,55 @@ class AudioDBSqlite:
             offset (int): Number of records to skip
             order_by (str): Column to order by
             order (str): Order direction (ASC or DESC)
+            columns (tuple): Columns to select, e.g. AUDIO_FILE_SUMMARY_COLUMNS
+                for views that do not need the full row
+            tie_break (bool): Order rows with equal order_by values by id in
+                the same direction, for a deterministic total order
             
         Returns:
-            list: List of audio files as dictionaries
+            list: Records with the requested columns (AudioFile by default)
         """
         if not self.connection and not self.connect():
             return []
             
+        order = order.upper()
+        if order_by not in AUDIO_FILE_COLUMNS or order not in ORDER_DIRECTIONS:
+            self.logger.error("Invalid ordering for audio files: %s %s", order_by, order)
+            return []
+            
         try:
-            query = f"SELECT * FROM audio_files ORDER BY {order_by} {order}"
-            
-            if limit is not None:
-                query += f" LIMIT {limit} OFFSET {offset}"
-                
-            self.cursor.execute(query)
-            results = self.cursor.fetchall()
-            return [dict(row) for row in results]
+            query = self._select_statement(columns, order_by=order_by, order=order, paged=limit is not None,
+                                           tie_break=tie_break)
+            parameters = (limit, offset) if limit is not None else ()
+            results = self._fetchall(query, parameters)
+            return record_type(columns).from_rows(results)
         except sqlite3.Error as e:
-            self.logger.error(f"Error retrieving audio files: {e}")
+            self.logger.error("Error retrieving audio files: %s", e)
             return []
-    
+
+    def get_audio_files_after(self, after_id=0, limit=1000, columns=AUDIO_FILE_COLUMNS):
+        """
+        Get the next page of audio files in ID order. Seeking past the last
+        seen ID costs the same on every page, unlike an OFFSET.
+
+        Args:
+            after_id (int): Last ID of the previous page, 0 for the first page
+            limit (int): Maximum number of records to return
+            columns (tuple): Columns to select, must include 'id'
+
+        Returns:
+            list: Records ordered by ID
+        """
+        if not self.connection and not self.connect():
+            return []
+
+        try:
+            query = self._select_statement(columns, where="id > ?", order_by="id", paged=True)
+            return record_type(columns).from_rows(self._fetchall(query, (after_id, limit, 0)))
+        except sqlite3.Error as e:
+            self.logger.error("Error retrieving audio files after ID %s: %s", after_id, e)
+            return []
+
     def update_audio_file(self, file_id, **kwargs):
         """
         Update audio file properties
@@ -247,21 +655,18 @@ class AudioDBSqlite:
             return False
             
         try:
-            set_clause = ", ".join([f"{key} = ?" for key in kwargs.keys()])
-            values = list(kwargs.values())
+            columns = tuple(sorted(kwargs))
+            values = [kwargs[column] for column in columns]
             values.append(file_id)
             
-            self.cursor.execute(
-                f"UPDATE audio_files SET {set_clause} WHERE id = ?", 
-                values
-            )
+            self._execute(self._update_statement(columns), values)
             
             self.connection.commit()
-            self.logger.info(f"Updated audio file ID {file_id}")
+            self.logger.debug("Updated audio file ID %s", file_id)
             return True
         except sqlite3.Error as e:
             self.connection.rollback()
-            self.logger.error(f"Error updating audio file ID {file_id}: {e}")
+            self.logger.error("Error updating audio file ID %s: %s", file_id, e)
             return False
     
     def delete_audio_file(self, file_id):
@@ -278,13 +683,13 @@ class AudioDBSqlite:
             return False
             
         try:
-            self.cursor.execute("DELETE FROM audio_files WHERE id = ?", (file_id,))
+            self._execute("DELETE FROM audio_files WHERE id = ?", (file_id,))
             self.connection.commit()
-            self.logger.info(f"Deleted audio file ID {file_id}")
+            self.logger.debug("Deleted audio file ID %s", file_id)
             return True
         except sqlite3.Error as e:
             self.connection.rollback()
-            self.logger.error(f"Error deleting audio file ID {file_id}: {e}")
+            self.logger.error("Error deleting audio file ID %s: %s", file_id, e)
             return False
     
     # Playlist operations
@@ -305,18 +710,18 @@ class AudioDBSqlite:
             
         try:
             now = datetime.now()
-            self.cursor.execute(
+            self._execute(
                 "INSERT INTO playlists (name, description, date_created, last_modified) VALUES (?, ?, ?, ?)",
                 (name, description, now, now)
             )
             
             self.connection.commit()
             last_id = self.cursor.lastrowid
-            self.logger.info(f"Created playlist: {name} (ID: {last_id})")
+            self.logger.info("Created playlist: %s (ID: %s)", name, last_id)
             return last_id
         except sqlite3.Error as e:
             self.connection.rollback()
-            self.logger.error(f"Error creating playlist {name}: {e}")
+            self.logger.error("Error creating playlist %s: %s", name, e)
             return None
     
     def add_to_playlist(self, playlist_id, audio_id, position=None):
@@ -337,31 +742,120 @@ class AudioDBSqlite:
         try:
             # If position is not specified, add to the end
             if position is None:
-                self.cursor.execute(
+                position = self._fetchone(
                     "SELECT COALESCE(MAX(position), 0) + 1 FROM playlist_items WHERE playlist_id = ?",
                     (playlist_id,)
-                )
-                position = self.cursor.fetchone()[0]
+                )[0]
             
-            self.cursor.execute(
+            self._execute(
                 "INSERT INTO playlist_items (playlist_id, audio_id, position, date_added) VALUES (?, ?, ?, ?)",
                 (playlist_id, audio_id, position, datetime.now())
             )
             
             # Update the last_modified timestamp of the playlist
-            self.cursor.execute(
+            self._execute(
                 "UPDATE playlists SET last_modified = ? WHERE id = ?",
                 (datetime.now(), playlist_id)
             )
             
             self.connection.commit()
-            self.logger.info(f"Added audio ID {audio_id} to playlist ID {playlist_id} at position {position}")
+            self.logger.debug("Added audio ID %s to playlist ID %s at position %s",
+                              audio_id, playlist_id, position)
             return True
         except sqlite3.Error as e:
             self.connection.rollback()
-            self.logger.error(f"Error adding audio to playlist: {e}")
+            self.logger.error("Error adding audio to playlist: %s", e)
             return False
-    
+
+    def get_playlists(self):
+        """
+        Get all playlists
+
+        Returns:
+            list: Records with id and name
+        """
+        return self.execute_query("SELECT id, name FROM playlists ORDER BY name")
+
+    def get_audio_files_by_id(self, file_ids, columns=AUDIO_FILE_COLUMNS):
+        """
+        Get several audio files at once
+
+        Args:
+            file_ids (list): IDs of the audio files
+            columns (tuple): Columns to select, must include 'id'
+
+        Returns:
+            list: Records in the order of file_ids, skipping unknown IDs
+        """
+        if not self.connection and not self.connect():
+            return []
+
+        try:
+            cls = record_type(columns)
+            id_index = columns.index('id')
+            found = {}
+            # Stay below SQLite's default limit of bound parameters
+            for start in range(0, len(file_ids), 500):
+                chunk = file_ids[start:start + 500]
+                query = (f"SELECT {', '.join(columns)} FROM audio_files "
+                         f"WHERE id IN ({', '.join('?' * len(chunk))})")
+                for row in self._fetchall(query, chunk):
+                    found[row[id_index]] = cls._new(row)
+            return [found[file_id] for file_id in file_ids if file_id in found]
+        except sqlite3.Error as e:
+            self.logger.error("Error retrieving audio files by ID: %s", e)
+            return []
+
+    def get_playlist_tracks(self, playlist_id, columns=('id', 'filepath')):
+        """
+        Get the audio files of a playlist in play order
+
+        Args:
+            playlist_id (int): ID of the playlist
+            columns (tuple): audio_files columns to select
+
+        Returns:
+            list: Records ordered by position
+        """
+        if not self.connection and not self.connect():
+            return []
+
+        try:
+            query = (f"SELECT {', '.join('a.' + column for column in columns)} "
+                     "FROM playlist_items p JOIN audio_files a ON a.id = p.audio_id "
+                     "WHERE p.playlist_id = ? ORDER BY p.position")
+            return record_type(columns).from_rows(self._fetchall(query, (playlist_id,)))
+        except sqlite3.Error as e:
+            self.logger.error("Error retrieving tracks of playlist ID %s: %s", playlist_id, e)
+            return []
+
+    def record_play(self, audio_id, played_at=None):
+        """
+        Count a play of an audio file
+
+        Args:
+            audio_id (int): ID of the audio file
+            played_at (datetime): Time of the play, defaults to now
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        if not self.connection and not self.connect():
+            return False
+
+        try:
+            self._execute(
+                "UPDATE audio_files SET play_count = COALESCE(play_count, 0) + 1, last_played = ? WHERE id = ?",
+                (played_at or datetime.now(), audio_id)
+            )
+            self.connection.commit()
+            self.logger.debug("Recorded play of audio ID %s", audio_id)
+            return True
+        except sqlite3.Error as e:
+            self.connection.rollback()
+            self.logger.error("Error recording play of audio ID %s: %s", audio_id, e)
+            return False
+
     def execute_query(self, query, parameters=None):
         """
         Execute a custom SQL query
@@ -371,25 +865,440 @@ class AudioDBSqlite:
             parameters (tuple): Query parameters
             
         Returns:
-            list: Query results as dictionaries
+            list: Query results as records, readable by column name
         """
         if not self.connection and not self.connect():
             return []
             
         try:
-            if parameters:
-                self.cursor.execute(query, parameters)
-            else:
-                self.cursor.execute(query)
-                
             if query.strip().upper().startswith(("SELECT", "PRAGMA")):
-                results = self.cursor.fetchall()
-                return [dict(row) for row in results]
+                results = self._fetchall(query, parameters or ())
+                description = self.cursor.description or ()
+                return record_type(column[0] for column in description).from_rows(results)
             else:
+                self._execute(query, parameters or ())
                 self.connection.commit()
                 return []
         except sqlite3.Error as e:
             if not query.strip().upper().startswith(("SELECT", "PRAGMA")):
                 self.connection.rollback()
-            self.logger.error(f"Error executing query: {e}")
-            return []
\ No newline at end of file
+            self.logger.error("Error executing query: %s", e)
+            return []
+    
+    # Batch operations used by background sync
+    
+    def get_directory_files(self, directory, recursive=False):
+        """
+        Get the audio files stored inside a directory
+        
+        Args:
+            directory (str): Absolute path of the directory
+            recursive (bool): Include files of all subdirectories
+            
+        Returns:
+            dict: Mapping of filepath to size
+        """
+        if not self.connection and not self.connect():
+            return {}
+            
+        prefix = os.path.join(directory, "")
+        query = "SELECT filepath, size FROM audio_files WHERE filepath >= ? AND filepath < ?"
+        parameters = (prefix, prefix + "\uffff")
+        if not recursive:
+            # Range scan on the filepath index, then drop files of subdirectories
+            query += " AND instr(substr(filepath, ?), ?) = 0"
+            parameters += (len(prefix) + 1, os.sep)
+        try:
+            return {row[0]: row[1] for row in self._fetchall(query, parameters)}
+        except sqlite3.Error as e:
+            self.logger.error("Error retrieving files in %s: %s", directory, e)
+            return {}
+    
+    def apply_library_changes(self, upserts=(), deletes=(), moves=()):
+        """
+        Apply a batch of library changes in a single transaction
+        
+        Args:
+            upserts (iterable): Dicts with filename, filepath, size and format;
+                existing rows are matched by filepath
+            deletes (iterable): Filepaths to remove
+            moves (iterable): (old_filepath, new_filepath) pairs; moved rows
+                keep their play statistics
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        if not self.connection and not self.connect():
+            return False
+            
+        upserts, deletes, moves = list(upserts), list(deletes), list(moves)
+        try:
+            self._apply_library_changes(upserts, deletes, moves)
+            self.connection.commit()
+            self.logger.info("Applied library changes: %d upserted, %d moved, %d deleted",
+                             len(upserts), len(moves), len(deletes))
+            return True
+        except sqlite3.Error as e:
+            self.connection.rollback()
+            self.logger.error("Error applying library changes: %s", e)
+            return False
+    
+    def _apply_library_changes(self, upserts, deletes, moves):
+        """Statements of apply_library_changes, left uncommitted"""
+        now = datetime.now()
+        self._executemany(
+            "UPDATE audio_files SET filepath = ?, filename = ? WHERE filepath = ?",
+            [(new, os.path.basename(new), old) for old, new in moves]
+        )
+        self._executemany(
+            "UPDATE audio_files SET filename = ?, size = ?, format = ? WHERE filepath = ?",
+            [(f['filename'], f.get('size'), f.get('format'), f['filepath']) for f in upserts]
+        )
+        self._executemany(
+            "INSERT INTO audio_files (filename, filepath, size, format, date_added) "
+            "SELECT ?, ?, ?, ?, ? WHERE NOT EXISTS "
+            "(SELECT 1 FROM audio_files WHERE filepath = ?)",
+            [(f['filename'], f['filepath'], f.get('size'), f.get('format'), now, f['filepath'])
+             for f in upserts]
+        )
+        self._executemany(
+            "DELETE FROM audio_files WHERE filepath = ?",
+            [(path,) for path in deletes]
+        )
+    
+    # Import jobs
+    
+    def create_import_job(self, root):
+        """
+        Create an import job whose queue holds only its root folder
+        
+        Args:
+            root (str): Absolute path of the folder to import
+            
+        Returns:
+            int: ID of the job, or None if failed
+        """
+        if not self.connection and not self.connect():
+            return None
+            
+        try:
+            self._execute(
+                "INSERT INTO import_jobs (root, status, date_created) VALUES (?, ?, ?)",
+                (root, IMPORT_RUNNING, datetime.now())
+            )
+            job_id = self.cursor.lastrowid
+            self._execute("INSERT INTO import_queue (job_id, path) VALUES (?, ?)", (job_id, root))
+            self.connection.commit()
+            self.logger.info("Created import job %s for %s", job_id, root)
+            return job_id
+        except sqlite3.Error as e:
+            self.connection.rollback()
+            self.logger.error("Error creating import job for %s: %s", root, e)
+            return None
+    
+    def get_import_jobs(self, unfinished=False):
+        """
+        Get import jobs with the number of folders left to scan
+        
+        Args:
+            unfinished (bool): Only jobs that can be resumed
+            
+        Returns:
+            list: Records with id, root, status, files_imported, dirs_scanned,
+                dirs_pending, date_created, last_checkpoint and error
+        """
+        return self.execute_query(
+            "SELECT id, root, status, files_imported, dirs_scanned, "
+            "(SELECT COUNT(*) FROM import_queue q WHERE q.job_id = j.id) AS dirs_pending, "
+            "date_created, last_checkpoint, error FROM import_jobs j "
+            "WHERE status != ? ORDER BY id", (IMPORT_DONE if unfinished else '',)
+        )
+    
+    def get_import_queue(self, job_id, limit=1000):
+        """
+        Get folders an import job still has to scan
+        
+        Args:
+            job_id (int): ID of the job
+            limit (int): Maximum number of folders
+            
+        Returns:
+            list: Folder paths
+        """
+        if not self.connection and not self.connect():
+            return []
+            
+        try:
+            return [row[0] for row in self._fetchall(
+                "SELECT path FROM import_queue WHERE job_id = ? LIMIT ?", (job_id, limit)
+            )]
+        except sqlite3.Error as e:
+            self.logger.error("Error retrieving queue of import job %s: %s", job_id, e)
+            return []
+    
+    def checkpoint_import_job(self, job_id, upserts=(), scanned=(), found=(), status=None, error=None):
+        """
+        Write the files of scanned folders and advance the job's queue in a
+        single transaction, so an interrupted job resumes exactly here
+        
+        Args:
+            job_id (int): ID of the job
+            upserts (iterable): Files as for apply_library_changes
+            scanned (iterable): Folders to remove from the queue
+            found (iterable): Subfolders to add to the queue
+            status (str): New status of the job, None to keep it
+            error (str): Reason the job stopped
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        if not self.connection and not self.connect():
+            return False
+            
+        upserts, scanned = list(upserts), list(scanned)
+        try:
+            self._apply_library_changes(upserts, (), ())
+            self._executemany("DELETE FROM import_queue WHERE job_id = ? AND path = ?",
+                              [(job_id, path) for path in scanned])
+            self._executemany("INSERT OR IGNORE INTO import_queue (job_id, path) VALUES (?, ?)",
+                              [(job_id, path) for path in found])
+            self._execute(
+                "UPDATE import_jobs SET files_imported = files_imported + ?, "
+                "dirs_scanned = dirs_scanned + ?, last_checkpoint = ?, "
+                "status = COALESCE(?, status), error = ? WHERE id = ?",
+                (len(upserts), len(scanned), datetime.now(), status, error, job_id)
+            )
+            self.connection.commit()
+            self.logger.debug("Checkpointed import job %s: %d files, %d folders",
+                              job_id, len(upserts), len(scanned))
+            return True
+        except sqlite3.Error as e:
+            self.connection.rollback()
+            self.logger.error("Error checkpointing import job %s: %s", job_id, e)
+            return False
+    
+    # Watched folder operations
+    
+    def add_watched_folder(self, path):
+        """
+        Register a folder to be kept in sync with the library
+        
+        Args:
+            path (str): Absolute path of the folder
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        if not self.connection and not self.connect():
+            return False
+            
+        try:
+            self._execute(
+                "INSERT OR IGNORE INTO watched_folders (path, date_added) VALUES (?, ?)",
+                (path, datetime.now())
+            )
+            self.connection.commit()
+            self.logger.info("Watching folder: %s", path)
+            return True
+        except sqlite3.Error as e:
+            self.connection.rollback()
+            self.logger.error("Error adding watched folder %s: %s", path, e)
+            return False
+    
+    def get_watched_folders(self):
+        """
+        Get all folders kept in sync with the library
+        
+        Returns:
+            list: Folder paths
+        """
+        if not self.connection and not self.connect():
+            return []
+            
+        try:
+            return [row[0] for row in self._fetchall("SELECT path FROM watched_folders ORDER BY date_added")]
+        except sqlite3.Error as e:
+            self.logger.error("Error retrieving watched folders: %s", e)
+            return []
+    
+    # Library statistics
+    
+    def get_library_stats(self):
+        """
+        Get library totals maintained by triggers, a single-row read
+        
+        Returns:
+            Record: track_count, total_duration, total_size, total_plays,
+                favorite_count and played_count, or None if failed
+        """
+        if not self.connection and not self.connect():
+            return None
+            
+        columns = ('track_count', 'total_duration', 'total_size', 'total_plays',
+                   'favorite_count', 'played_count')
+        try:
+            row = self._fetchone(f"SELECT {', '.join(columns)} FROM library_stats WHERE id = 1")
+            return record_type(columns)._new(row) if row else None
+        except sqlite3.Error as e:
+            self.logger.error("Error retrieving library statistics: %s", e)
+            return None
+    
+    def get_format_stats(self):
+        """
+        Get track count, duration and size per audio format
+        
+        Returns:
+            list: Records ordered by track count, format '' meaning unknown
+        """
+        return self.execute_query(
+            "SELECT format, track_count, total_duration, total_size "
+            "FROM library_format_stats ORDER BY track_count DESC"
+        )
+    
+    def get_most_played(self, limit=10, columns=AUDIO_FILE_COLUMNS):
+        """
+        Get the most played audio files using the play_count index
+        
+        Args:
+            limit (int): Number of files
+            columns (tuple): Columns to select
+            
+        Returns:
+            list: Records ordered by play count
+        """
+        if not self.connection and not self.connect():
+            return []
+            
+        try:
+            query = self._select_statement(columns, where="play_count > 0", order_by="play_count",
+                                           order="DESC", paged=True)
+            return record_type(columns).from_rows(self._fetchall(query, (limit, 0)))
+        except sqlite3.Error as e:
+            self.logger.error("Error retrieving most played files: %s", e)
+            return []
+    
+    def rebuild_library_stats(self):
+        """
+        Recompute library statistics from scratch, e.g. after editing the
+        database with external tools
+        
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        if not self.connection and not self.connect():
+            return False
+            
+        try:
+            self._rebuild_library_stats()
+            self.connection.commit()
+            self.logger.info("Library statistics rebuilt")
+            return True
+        except sqlite3.Error as e:
+            self.connection.rollback()
+            self.logger.error("Error rebuilding library statistics: %s", e)
+            return False
+    
+    # Smart playlists
+    
+    def create_smart_playlist(self, name, definition):
+        """
+        Create a rule-based playlist
+        
+        Args:
+            name (str): Name of the playlist
+            definition (dict|str): Rule definition, see OrphismSmartPlaylist
+            
+        Returns:
+            int: ID of the new smart playlist, or None if failed
+        """
+        if not self.connection and not self.connect():
+            return None
+            
+        try:
+            # Reject definitions that would fail later when the playlist is shown
+            compile_definition(definition)
+            definition = json.dumps(parse_definition(definition))
+            now = datetime.now()
+            self._execute(
+                "INSERT INTO smart_playlists (name, definition, date_created, last_modified) "
+                "VALUES (?, ?, ?, ?)",
+                (name, definition, now, now)
+            )
+            self.connection.commit()
+            last_id = self.cursor.lastrowid
+            self.logger.info("Created smart playlist: %s (ID: %s)", name, last_id)
+            return last_id
+        except SmartPlaylistError as e:
+            self.logger.error("Invalid smart playlist %s: %s", name, e)
+            return None
+        except sqlite3.Error as e:
+            self.connection.rollback()
+            self.logger.error("Error creating smart playlist %s: %s", name, e)
+            return None
+    
+    def get_smart_playlists(self):
+        """
+        Get all smart playlists
+        
+        Returns:
+            list: Records with id, name and definition (JSON text)
+        """
+        return self.execute_query("SELECT id, name, definition FROM smart_playlists ORDER BY name")
+    
+    def delete_smart_playlist(self, playlist_id):
+        """
+        Delete a smart playlist
+        
+        Args:
+            playlist_id (int): ID of the smart playlist
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        if not self.connection and not self.connect():
+            return False
+            
+        try:
+            self._execute("DELETE FROM smart_playlists WHERE id = ?", (playlist_id,))
+            self.connection.commit()
+            return True
+        except sqlite3.Error as e:
+            self.connection.rollback()
+            self.logger.error("Error deleting smart playlist ID %s: %s", playlist_id, e)
+            return False
+    
+    def get_smart_playlist_tracks(self, compiled, columns):
+        """
+        Run a compiled smart playlist query
+        
+        Args:
+            compiled (CompiledPlaylist): Result of compile_definition
+            columns (tuple): Columns the query selects
+            
+        Returns:
+            list: Records of the matching audio files
+        """
+        if not self.connection and not self.connect():
+            return []
+            
+        try:
+            return record_type(columns).from_rows(self._fetchall(compiled.sql, compiled.parameters))
+        except sqlite3.Error as e:
+            self.logger.error("Error running smart playlist: %s", e)
+            return []
+    
+    def get_column_versions(self):
+        """
+        Get the change counters of audio_files columns
+        
+        Returns:
+            dict: Column (or 'rows'/'tags') to version
+        """
+        if not self.connection and not self.connect():
+            return {}
+            
+        try:
+            return dict(self._fetchall("SELECT name, version FROM column_versions"))
+        except sqlite3.Error as e:
+            self.logger.error("Error retrieving column versions: %s", e)
+            return {}
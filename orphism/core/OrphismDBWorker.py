@@ -0,0 +1,88 @@
+import threading
+import queue
+from concurrent.futures import Future
+from orphism.core.OrphismDB import AudioDBSqlite
+from orphism.core.OrphismLogging import get_logger
+from orphism.core.OrphismProfiler import get_profiler
+
+
+class OrphismDBWorker(threading.Thread):
+    """
+    Background thread that owns its own database connection.
+    Jobs are executed one after another so writes never block the UI thread
+    and never share a connection across threads.
+    """
+    
+    def __init__(self, db_path="audiodb.sqlite", jobs=None, read_only=False, name="OrphismDBWorker"):
+        """
+        Initialize the worker.
+        
+        Args:
+            db_path (str): Path to the SQLite database file
+            jobs (queue.Queue): Job queue shared with other workers forming a
+                pool; every worker then takes the next free job
+            read_only (bool): Reject writes on the worker's connection
+            name (str): Thread name
+        """
+        super().__init__(name=name, daemon=True)
+        self.db_path = db_path
+        self.read_only = read_only
+        self._queue = queue.Queue() if jobs is None else jobs
+        self.logger = get_logger('OrphismDBWorker')
+        self.profiler = get_profiler()
+    
+    def submit(self, fn, *args, **kwargs):
+        """
+        Queue a job for the worker thread.
+        
+        Args:
+            fn (callable): Called as fn(db, *args, **kwargs) with the worker's
+                AudioDBSqlite instance
+            
+        Returns:
+            Future: Resolves to the return value of fn
+        """
+        future = Future()
+        self._queue.put((future, fn, args, kwargs))
+        return future
+    
+    def pending(self):
+        """
+        Returns:
+            int: Number of jobs waiting to be executed
+        """
+        return self._queue.qsize()
+    
+    def stop(self, wait=True):
+        """
+        Stop the worker after the already queued jobs have run.
+        
+        Args:
+            wait (bool): Block until the thread has finished
+        """
+        self._queue.put(None)
+        if wait and self.is_alive():
+            self.join()
+    
+    def run(self):
+        """Execute queued jobs until stopped"""
+        db = AudioDBSqlite(self.db_path)
+        if db.connect() and self.read_only:
+            db.connection.execute("PRAGMA query_only = ON")
+        try:
+            while True:
+                job = self._queue.get()
+                if job is None:
+                    break
+                future, fn, args, kwargs = job
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    with self.profiler.span('worker.' + getattr(fn, '__name__', 'job')):
+                        result = fn(db, *args, **kwargs)
+                    future.set_result(result)
+                except Exception as e:
+                    self.logger.exception("Database worker job failed: %s", e)
+                    future.set_exception(e)
+        finally:
+            db.disconnect()
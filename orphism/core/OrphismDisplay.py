@@ -0,0 +1,88 @@
+UNKNOWN = "Unknown"
+
+# Rows kept before the cache starts over; rows of deleted tracks are only
+# dropped then
+DEFAULT_MAX_ROWS = 500000
+
+
+class OrphismDisplayCache:
+    """
+    Display strings of audio files, shared by every track view.
+
+    Rows are formatted once and kept per audio file ID together with the
+    record they were made from; a row is formatted again only when its
+    record changed. Views refreshing the same tracks, or the same view
+    refreshing an unchanged library, reuse the strings instead of running
+    the f-strings again.
+
+    Each row is a tuple (filename, duration, size, format, tile_text).
+    """
+
+    def __init__(self, max_rows=DEFAULT_MAX_ROWS):
+        """
+        Initialize an empty cache.
+
+        Args:
+            max_rows (int): Rows kept before the cache is cleared
+        """
+        self.max_rows = max_rows
+        self._rows = {}
+        # Many tracks share a length in seconds; sizes rarely repeat but
+        # cost nothing to remember next to their row
+        self._durations = {None: UNKNOWN}
+
+    def rows(self, audio_files):
+        """
+        Get the display rows of audio files.
+
+        Args:
+            audio_files (list): Records with id, filename, duration, size and format
+
+        Returns:
+            list: Display rows in the order of audio_files
+        """
+        cache = self._rows
+        if len(cache) > self.max_rows:
+            cache.clear()
+
+        rows = []
+        changed = []
+        for audio in audio_files:
+            entry = cache.get(audio.id)
+            if entry is not None and entry[0] == audio:
+                rows.append(entry[1])
+            else:
+                changed.append(len(rows))
+                rows.append(audio)
+
+        if changed:
+            formatted = self._format([rows[i] for i in changed])
+            for i, row in zip(changed, formatted):
+                audio = rows[i]
+                cache[audio.id] = (audio, row)
+                rows[i] = row
+        return rows
+
+    def clear(self):
+        """Drop all formatted rows"""
+        self._rows.clear()
+
+    def _format(self, audio_files):
+        """Format records in one pass, column by column"""
+        durations = self._durations
+        duration_strs = []
+        for audio in audio_files:
+            seconds = int(audio.duration) if audio.duration else None
+            text = durations.get(seconds)
+            if text is None:
+                text = durations[seconds] = f"{seconds // 60}:{seconds % 60:02d}"
+            duration_strs.append(text)
+
+        size_strs = [f"{audio.size / (1024*1024):.2f}MB" if audio.size else UNKNOWN
+                     for audio in audio_files]
+
+        return [
+            (audio.filename, duration, size, audio.format or UNKNOWN,
+             f"{audio.filename}\nDuration: {duration}\nSize: {size}")
+            for audio, duration, size in zip(audio_files, duration_strs, size_strs)
+        ]
@@ -0,0 +1,184 @@
+import os
+import time
+from orphism.core.OrphismConstants import (
+    AUDIO_FILE_EXTENSIONS, IMPORT_RUNNING, IMPORT_PAUSED, IMPORT_DONE
+)
+from orphism.core.OrphismLogging import get_logger
+from orphism.core.OrphismProfiler import get_profiler
+
+# A checkpoint is written after this many files or seconds, whichever
+# comes first; work since the last checkpoint is all a crash can lose
+CHECKPOINT_FILES = 5000
+CHECKPOINT_SECONDS = 2.0
+
+# Queued folders read from the database at a time
+QUEUE_FETCH = 1000
+
+
+class OrphismImporter:
+    """
+    Imports folder trees as resumable jobs.
+
+    A job is a row in import_jobs with a queue of folders still to scan in
+    import_queue. Every step scans folders until the next checkpoint, then
+    writes their audio files, removes them from the queue and queues their
+    subfolders in one transaction. Files are upserted by path, so a folder
+    scanned again after a crash changes nothing. A job interrupted by a
+    crash, a closed laptop or an unplugged drive continues from its last
+    checkpoint instead of rescanning the tree.
+
+    Methods taking a db run on the thread owning that connection and can be
+    passed to OrphismDBWorker.submit, one step per job so other database
+    work is not held up by a long import.
+    """
+
+    def __init__(self, checkpoint_files=CHECKPOINT_FILES, checkpoint_seconds=CHECKPOINT_SECONDS):
+        """
+        Args:
+            checkpoint_files (int): Files written per checkpoint
+            checkpoint_seconds (float): Longest time between checkpoints
+        """
+        self.checkpoint_files = checkpoint_files
+        self.checkpoint_seconds = checkpoint_seconds
+        self.logger = get_logger('OrphismImporter')
+        self.profiler = get_profiler()
+        self._cancelled = False
+
+    def cancel(self):
+        """Stop run() at the next checkpoint; the job stays resumable"""
+        self._cancelled = True
+
+    def start(self, db, root):
+        """
+        Create an import job for a folder.
+
+        Args:
+            db (AudioDBSqlite): Connection of the calling thread
+            root (str): Folder to import
+
+        Returns:
+            int: ID of the job, or None if root is not a folder or failed
+        """
+        root = os.path.abspath(root)
+        if not os.path.isdir(root):
+            self.logger.error("Cannot import %s: not a folder", root)
+            return None
+        return db.create_import_job(root)
+
+    def unfinished(self, db):
+        """
+        Returns:
+            list: IDs of jobs left running or paused by an earlier session
+        """
+        return [job.id for job in db.get_import_jobs(unfinished=True)]
+
+    def step(self, db, job_id):
+        """
+        Scan queued folders of a job up to the next checkpoint and write it.
+
+        Args:
+            db (AudioDBSqlite): Connection of the calling thread
+            job_id (int): ID of the job
+
+        Returns:
+            str: Status of the job afterwards, or None if the checkpoint
+                could not be written
+        """
+        with self.profiler.span('import.step'):
+            return self._step(db, job_id)
+
+    def _step(self, db, job_id):
+        deadline = time.monotonic() + self.checkpoint_seconds
+        pending = db.get_import_queue(job_id, QUEUE_FETCH)
+        if not pending:
+            return IMPORT_DONE if db.checkpoint_import_job(job_id, status=IMPORT_DONE) else None
+
+        upserts, scanned, found = [], [], []
+        while pending and len(upserts) < self.checkpoint_files and time.monotonic() < deadline:
+            directory = pending.pop()
+            try:
+                entries = list(os.scandir(directory))
+            except OSError as e:
+                root = self._root(db, job_id)
+                if root is not None and not os.path.isdir(root):
+                    # The drive went away; keep the folder queued for later
+                    return self._checkpoint(db, job_id, upserts, scanned, found, IMPORT_PAUSED,
+                                            f"{root} is not available")
+                self.logger.warning("Skipping %s: %s", directory, e)
+                scanned.append(directory)
+                continue
+
+            known = db.get_directory_files(directory)
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        found.append(entry.path)
+                        pending.append(entry.path)
+                        continue
+                    if not entry.name.lower().endswith(AUDIO_FILE_EXTENSIONS):
+                        continue
+                    size = entry.stat().st_size
+                except OSError:
+                    continue
+                # Files already imported with the same size are not rewritten
+                if known.get(entry.path) != size:
+                    upserts.append({
+                        'filename': entry.name,
+                        'filepath': entry.path,
+                        'size': size,
+                        'format': os.path.splitext(entry.name)[1][1:].upper()
+                    })
+            scanned.append(directory)
+
+        return self._checkpoint(db, job_id, upserts, scanned, found, IMPORT_RUNNING)
+
+    def _checkpoint(self, db, job_id, upserts, scanned, found, status, error=None):
+        # Subfolders scanned in the same step never enter the queue
+        done = set(scanned)
+        found = [path for path in found if path not in done]
+        if not db.checkpoint_import_job(job_id, upserts, scanned, found, status, error):
+            return None
+        return status
+
+    def run(self, db, job_id, progress=None):
+        """
+        Step a job until it is finished, paused or cancelled.
+
+        Args:
+            db (AudioDBSqlite): Connection of the calling thread
+            job_id (int): ID of the job
+            progress (callable): Called as progress(job) after every checkpoint
+
+        Returns:
+            str: Status of the job, or None if a checkpoint failed
+        """
+        db.checkpoint_import_job(job_id, status=IMPORT_RUNNING)
+        status = IMPORT_RUNNING
+        try:
+            while status == IMPORT_RUNNING and not self._cancelled:
+                status = self.step(db, job_id)
+                if progress:
+                    progress(self.job(db, job_id))
+        except KeyboardInterrupt:
+            # Only work since the last checkpoint is lost
+            db.connection.rollback()
+            db.checkpoint_import_job(job_id, status=IMPORT_PAUSED)
+            raise
+        if status == IMPORT_RUNNING:
+            db.checkpoint_import_job(job_id, status=IMPORT_PAUSED)
+            status = IMPORT_PAUSED
+        return status
+
+    def job(self, db, job_id):
+        """
+        Returns:
+            Record: Job as listed by AudioDBSqlite.get_import_jobs, or None
+        """
+        for job in db.get_import_jobs():
+            if job.id == job_id:
+                return job
+        return None
+
+    def _root(self, db, job_id):
+        job = self.job(db, job_id)
+        return job.root if job else None
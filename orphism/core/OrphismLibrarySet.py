@@ -0,0 +1,441 @@
+import heapq
+import json
+import os
+import sqlite3
+from concurrent.futures import Future
+from orphism.core.OrphismDB import AudioDBSqlite, ORDER_DIRECTIONS
+from orphism.core.OrphismDBWorker import OrphismDBWorker
+from orphism.core.OrphismLogging import get_logger
+from orphism.core.OrphismRecords import AudioFile, AUDIO_FILE_COLUMNS, record_type
+
+# A library set splits one archive into shards, one database per root folder
+# or volume, e.g. ~/.audiodb/libraries.json:
+#
+#   {"shards": [{"name": "music", "root": "/mnt/music", "db": "/mnt/music/audiodb.sqlite"},
+#               {"name": "archive", "root": "/mnt/archive", "db": "/mnt/archive/audiodb.sqlite"}]}
+#
+# Every shard has its own writer thread, so imports on different drives do
+# not wait for each other, and each file can be backed up on its own.
+
+LIBRARIES_ENV = 'AUDIODB_LIBRARIES'
+DEFAULT_REGISTRY = os.path.join(os.path.expanduser('~'), '.audiodb', 'libraries.json')
+
+# Column added to federated results: index of the shard a row came from.
+# Row IDs are only unique within a shard, (shard, id) identifies a track.
+SHARD_COLUMN = 'shard'
+
+STAT_COLUMNS = ('track_count', 'total_duration', 'total_size', 'total_plays',
+                'favorite_count', 'played_count')
+
+
+class OrphismShard:
+    """One library database and the folder whose files it holds"""
+
+    __slots__ = ('name', 'root', 'db_path')
+
+    def __init__(self, name, root, db_path=None):
+        self.name = name
+        self.root = os.path.abspath(root)
+        self.db_path = db_path or os.path.join(self.root, "audiodb.sqlite")
+
+    def __repr__(self):
+        return f"OrphismShard({self.name!r}, {self.root!r}, {self.db_path!r})"
+
+
+def registry_path():
+    """
+    Returns:
+        str: Library registry file, $AUDIODB_LIBRARIES or ~/.audiodb/libraries.json
+    """
+    return os.environ.get(LIBRARIES_ENV) or DEFAULT_REGISTRY
+
+
+def load_shards(path=None):
+    """
+    Read the shards of the library registry.
+
+    Args:
+        path (str): Registry file, defaults to registry_path()
+
+    Returns:
+        list: OrphismShard objects, empty if there is no registry
+    """
+    path = path or registry_path()
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        config = json.load(f)
+    return [OrphismShard(entry['name'], entry['root'], entry.get('db'))
+            for entry in config.get('shards', [])]
+
+
+def save_shards(shards, path=None):
+    """
+    Write the shards to the library registry.
+
+    Args:
+        shards (list): OrphismShard objects
+        path (str): Registry file, defaults to registry_path()
+    """
+    path = path or registry_path()
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    config = {'shards': [{'name': shard.name, 'root': shard.root, 'db': shard.db_path}
+                         for shard in shards]}
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(config, f, indent=2)
+
+
+class OrphismLibrarySet:
+    """
+    Several library databases used as one library.
+
+    Reads go through one connection that ATTACHes every shard, so a page of
+    the whole archive is a single UNION ALL statement that SQLite answers by
+    merging the per-shard index scans. With more shards than SQLite can
+    attach, pages are merged in Python from per-shard ordered queries
+    instead. Either way rows come back in global order, ties broken by
+    id and shard.
+
+    Writes are routed by file path to the owning shard's OrphismDBWorker.
+    """
+
+    def __init__(self, shards):
+        """
+        Initialize the set.
+
+        Args:
+            shards (list): OrphismShard objects
+
+        Raises:
+            ValueError: If shard names are missing or not unique
+        """
+        names = [shard.name for shard in shards]
+        if not names or len(set(names)) != len(names):
+            raise ValueError("A library set needs at least one shard and unique shard names")
+        self.shards = list(shards)
+        self.logger = get_logger('OrphismLibrarySet')
+        self.reader = None
+        self.workers = {}
+        self._readers = None
+
+    @classmethod
+    def from_registry(cls, path=None):
+        """Create a set from the library registry"""
+        return cls(load_shards(path))
+
+    def open(self, start_workers=True):
+        """
+        Create missing shard databases and open the read connection.
+
+        Args:
+            start_workers (bool): Start a writer thread per shard
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        for shard in self.shards:
+            db = AudioDBSqlite(shard.db_path)
+            ok = db.initialize_database()
+            db.disconnect()
+            if not ok:
+                self.logger.error("Cannot open library shard %s: %s", shard.name, shard.db_path)
+                return False
+
+        self.reader = AudioDBSqlite(":memory:")
+        if not self.reader.connect():
+            return False
+        limit = self.reader.connection.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED)
+        if len(self.shards) <= limit:
+            try:
+                for i, shard in enumerate(self.shards):
+                    self.reader.connection.execute(f"ATTACH DATABASE ? AS shard{i}", (shard.db_path,))
+                self.reader.connection.execute(
+                    "CREATE TEMP VIEW all_audio_files AS " + " UNION ALL ".join(
+                        f"SELECT {', '.join(AUDIO_FILE_COLUMNS)}, {i} AS {SHARD_COLUMN} "
+                        f"FROM shard{i}.audio_files" for i in range(len(self.shards))
+                    )
+                )
+            except sqlite3.Error as e:
+                self.logger.error("Error attaching library shards: %s", e)
+                return False
+        else:
+            self.logger.info("%d shards exceed the ATTACH limit of %d, merging per-shard reads",
+                             len(self.shards), limit)
+            self._readers = [AudioDBSqlite(shard.db_path) for shard in self.shards]
+
+        if start_workers:
+            for shard in self.shards:
+                worker = self.workers[shard.name] = OrphismDBWorker(shard.db_path)
+                worker.start()
+        return True
+
+    def close(self):
+        """Stop the writers after their queued jobs and close the read connections"""
+        for worker in self.workers.values():
+            worker.stop()
+        self.workers = {}
+        for db in [self.reader] + (self._readers or []):
+            if db is not None:
+                db.disconnect()
+        self.reader = None
+        self._readers = None
+
+    @property
+    def attached(self):
+        """bool: True if all shards are queried through one connection"""
+        return self._readers is None
+
+    # Routing
+
+    def shard_for_path(self, path):
+        """
+        Find the shard owning a file.
+
+        Args:
+            path (str): File path
+
+        Returns:
+            int: Shard index, the one with the longest matching root, or None
+        """
+        path = os.path.abspath(path)
+        best, best_length = None, -1
+        for i, shard in enumerate(self.shards):
+            if (path == shard.root or path.startswith(shard.root.rstrip(os.sep) + os.sep)) \
+                    and len(shard.root) > best_length:
+                best, best_length = i, len(shard.root)
+        return best
+
+    def worker(self, shard):
+        """
+        Args:
+            shard (int|str): Shard index or name
+
+        Returns:
+            OrphismDBWorker: Writer thread of the shard
+        """
+        if isinstance(shard, int):
+            shard = self.shards[shard].name
+        return self.workers[shard]
+
+    # Writes
+
+    def apply_library_changes(self, upserts=(), deletes=(), moves=()):
+        """
+        Split a batch of library changes by shard and apply the parts in parallel.
+
+        Moves within a shard keep their row. A move to another shard copies
+        the row, play statistics included, and deletes the original.
+        Paths outside every shard root are skipped.
+
+        Args:
+            upserts, deletes, moves: See AudioDBSqlite.apply_library_changes
+
+        Returns:
+            list: Futures of the per-shard transactions
+        """
+        batches = {}
+
+        def batch(index):
+            return batches.setdefault(index, ([], [], []))
+
+        skipped = 0
+        for change in upserts:
+            index = self.shard_for_path(change['filepath'])
+            if index is None:
+                skipped += 1
+            else:
+                batch(index)[0].append(change)
+        for path in deletes:
+            index = self.shard_for_path(path)
+            if index is None:
+                skipped += 1
+            else:
+                batch(index)[1].append(path)
+
+        futures = []
+        for old, new in moves:
+            source, target = self.shard_for_path(old), self.shard_for_path(new)
+            if source is None or target is None:
+                skipped += 1
+            elif source == target:
+                batch(source)[2].append((old, new))
+            else:
+                futures.append(self._moveAcross(source, target, old, new))
+        if skipped:
+            self.logger.warning("Skipped %d library changes outside every shard root", skipped)
+
+        for index, (shard_upserts, shard_deletes, shard_moves) in batches.items():
+            futures.append(self.worker(index).submit(
+                lambda db, u=shard_upserts, d=shard_deletes, m=shard_moves:
+                    db.apply_library_changes(u, d, m)
+            ))
+        return futures
+
+    def _moveAcross(self, source, target, old, new):
+        """Copy a row to another shard, then delete it from its old shard"""
+        result = Future()
+
+        def read(db):
+            rows = db.execute_query(
+                f"SELECT {', '.join(AUDIO_FILE_COLUMNS)} FROM audio_files WHERE filepath = ?", (old,)
+            )
+            return rows[0] if rows else None
+
+        def write(db, row):
+            file_id = db.add_audio_file(os.path.basename(new), new, row.duration, row.size,
+                                        row.format, row.bitrate, row.sample_rate, row.channels)
+            return file_id is not None and db.update_audio_file(
+                file_id, date_added=row.date_added, last_played=row.last_played,
+                play_count=row.play_count, favorite=row.favorite
+            )
+
+        def copied(future):
+            if future.exception() or not future.result():
+                # The original stays in place if the copy failed
+                result.set_result(False)
+                return
+            self.worker(source).submit(
+                lambda db: db.apply_library_changes(deletes=[old])
+            ).add_done_callback(lambda f: result.set_result(not f.exception() and f.result()))
+
+        def loaded(future):
+            row = None if future.exception() else future.result()
+            if row is None:
+                result.set_result(False)
+                return
+            self.worker(target).submit(write, row).add_done_callback(copied)
+
+        self.worker(source).submit(read).add_done_callback(loaded)
+        return result
+
+    # Federated reads
+
+    def get_all_audio_files(self, limit=None, offset=0, order_by="date_added", order="DESC",
+                            columns=AUDIO_FILE_COLUMNS):
+        """
+        Get a page of audio files across all shards in global order
+
+        Args:
+            limit (int): Maximum number of records to return
+            offset (int): Number of records to skip
+            order_by (str): Column to order by
+            order (str): Order direction (ASC or DESC)
+            columns (tuple): Columns to select
+
+        Returns:
+            list: Records with the requested columns, order_by and id if not
+                requested, and the shard index
+        """
+        order = order.upper()
+        if order_by not in AUDIO_FILE_COLUMNS or order not in ORDER_DIRECTIONS:
+            self.logger.error("Invalid ordering for audio files: %s %s", order_by, order)
+            return []
+        selected = tuple(columns) + tuple(
+            column for column in dict.fromkeys((order_by, 'id')) if column not in columns
+        )
+        cls = record_type(selected + (SHARD_COLUMN,))
+
+        if self.attached:
+            return self._attachedPage(cls, selected, limit, offset, order_by, order)
+        return self._mergedPage(cls, selected, limit, offset, order_by, order)
+
+    def _attachedPage(self, cls, selected, limit, offset, order_by, order):
+        # Ordering a compound SELECT lets SQLite merge the arms read in
+        # index order instead of sorting the whole archive; the shard goes
+        # last so each arm needs no extra sort
+        query = " UNION ALL ".join(
+            f"SELECT {', '.join(selected)}, {i} AS {SHARD_COLUMN} FROM shard{i}.audio_files"
+            for i in range(len(self.shards))
+        ) + f" ORDER BY {order_by} {order}, id {order}, {SHARD_COLUMN} {order}"
+        parameters = ()
+        if limit is not None:
+            query += " LIMIT ? OFFSET ?"
+            parameters = (limit, offset)
+        try:
+            return cls.from_rows(self.reader._fetchall(query, parameters))
+        except sqlite3.Error as e:
+            self.logger.error("Error retrieving audio files across shards: %s", e)
+            return []
+
+    def _mergedPage(self, cls, selected, limit, offset, order_by, order):
+        # Every shard contributes at most offset + limit rows to the page
+        shard_limit = None if limit is None else offset + limit
+        key_index, id_index = selected.index(order_by), selected.index('id')
+
+        def tagged(i, db):
+            # heapq.merge needs every shard sorted by the full key, ties included
+            for row in db.get_all_audio_files(shard_limit, 0, order_by, order, selected, tie_break=True):
+                yield cls._new(tuple(row) + (i,))
+
+        def key(row):
+            # SQLite sorts NULL before any value
+            value = row[key_index]
+            return (value is not None, value, row[id_index], row[-1])
+
+        merged = heapq.merge(*(tagged(i, db) for i, db in enumerate(self._readers)),
+                             key=key, reverse=order == 'DESC')
+        rows = list(merged)
+        return rows[offset:] if limit is None else rows[offset:offset + limit]
+
+    def get_audio_file(self, shard, file_id):
+        """
+        Get an audio file by shard and ID
+
+        Returns:
+            AudioFile: Record, or None if not found
+        """
+        db = self._readers[shard] if not self.attached else None
+        if db is not None:
+            return db.get_audio_file(file_id)
+        rows = self.reader._fetchall(
+            f"SELECT {', '.join(AUDIO_FILE_COLUMNS)} FROM shard{int(shard)}.audio_files WHERE id = ?",
+            (file_id,)
+        )
+        return AudioFile._new(rows[0]) if rows else None
+
+    def get_library_stats(self):
+        """
+        Get library totals summed over all shards, one row read per shard
+
+        Returns:
+            Record: Same fields as AudioDBSqlite.get_library_stats
+        """
+        totals = [0] * len(STAT_COLUMNS)
+        for stats in self._shardStats():
+            if stats is not None:
+                totals = [total + (value or 0) for total, value in zip(totals, stats)]
+        return record_type(STAT_COLUMNS)._new(totals)
+
+    def get_shard_stats(self):
+        """
+        Returns:
+            list: (OrphismShard, library statistics record) per shard
+        """
+        return list(zip(self.shards, self._shardStats()))
+
+    def _shardStats(self):
+        """Yield the library statistics of every shard"""
+        if not self.attached:
+            for db in self._readers:
+                yield db.get_library_stats()
+            return
+        cls = record_type(STAT_COLUMNS)
+        for i in range(len(self.shards)):
+            rows = self.reader._fetchall(
+                f"SELECT {', '.join(STAT_COLUMNS)} FROM shard{i}.library_stats WHERE id = 1"
+            )
+            yield cls._new(rows[0]) if rows else None
+
+    def execute_query(self, query, parameters=None):
+        """
+        Run a read query on the federated connection, where the temp view
+        all_audio_files holds the rows of every shard and shardN.<table>
+        addresses a single shard
+
+        Returns:
+            list: Query results as records
+        """
+        if not self.attached:
+            self.logger.error("Federated queries need every shard attached")
+            return []
+        return self.reader.execute_query(query, parameters)
@@ -0,0 +1,287 @@
+import os
+from PySide6.QtCore import QObject, QFileSystemWatcher, QTimer, Signal
+from orphism.core.OrphismConstants import AUDIO_FILE_EXTENSIONS
+from orphism.core.OrphismLogging import get_logger
+
+
+class _ChangeSet:
+    """Changes collected while diffing directories, written as one batch"""
+
+    def __init__(self):
+        self.clear()
+
+    def __len__(self):
+        return len(self.created) + len(self.modified) + len(self.deleted)
+
+    def clear(self):
+        self.created = {}       # filepath -> size
+        self.modified = {}      # filepath -> size
+        self.deleted = {}       # filepath -> size
+        self.added_dirs = []
+        self.removed_dirs = []
+
+
+class OrphismLibraryWatcher(QObject):
+    """
+    Keeps the library in sync with watched folders.
+
+    Directory notifications come from QFileSystemWatcher (inotify on Linux).
+    Trees that need more native watches than the system allows fall back to
+    polling directory modification times. Changed directories are debounced,
+    diffed against the database and written in batches on the database
+    worker thread, so the UI thread never touches the disk.
+    """
+
+    # Emitted after a batch was written: (files added or updated, files deleted)
+    libraryChanged = Signal(int, int)
+    # Directories to start and stop watching, delivered to the GUI thread
+    _watchesChanged = Signal(list, list)
+
+    DEBOUNCE_MS = 750
+    POLL_INTERVAL_MS = 30000
+    MAX_NATIVE_WATCHES = 8192
+    BATCH_SIZE = 5000
+
+    def __init__(self, db_worker, parent=None):
+        """
+        Initialize the watcher.
+
+        Args:
+            db_worker: Running OrphismDBWorker used for all disk and database work
+            parent: Parent QObject
+        """
+        super().__init__(parent)
+        self.db_worker = db_worker
+        self.polling = False
+        self.logger = get_logger('OrphismLibraryWatcher')
+
+        # Directory state, only touched on the worker thread
+        self._dir_mtimes = {}
+        self._children = {}
+
+        # Directories reported dirty since the last flush (GUI thread)
+        self._dirty = set()
+        self._poll_in_progress = False
+
+        self._fs_watcher = QFileSystemWatcher(self)
+        self._fs_watcher.directoryChanged.connect(self._onDirectoryChanged)
+
+        self._debounce_timer = QTimer(self)
+        self._debounce_timer.setSingleShot(True)
+        self._debounce_timer.setInterval(self.DEBOUNCE_MS)
+        self._debounce_timer.timeout.connect(self._flush)
+
+        self._poll_timer = QTimer(self)
+        self._poll_timer.setInterval(self.POLL_INTERVAL_MS)
+        self._poll_timer.timeout.connect(self._poll)
+
+        self._watchesChanged.connect(self._updateWatches)
+
+    def add_folder(self, path):
+        """
+        Start keeping a folder in sync and import its current contents.
+
+        Args:
+            path (str): Folder to watch
+
+        Returns:
+            Future: Resolves once the initial import has been written
+        """
+        path = os.path.abspath(path)
+        return self.db_worker.submit(self._scanRoot, path, True)
+
+    def resume(self):
+        """Resume watching all folders registered in the database"""
+        self.db_worker.submit(self._resume)
+
+    def pending(self):
+        """
+        Returns:
+            int: Number of directories waiting for the debounce timer
+        """
+        return len(self._dirty)
+
+    def stop(self):
+        """Stop receiving notifications; queued batches still complete"""
+        self._debounce_timer.stop()
+        self._poll_timer.stop()
+        watched = self._fs_watcher.directories()
+        if watched:
+            self._fs_watcher.removePaths(watched)
+
+    # GUI thread
+
+    def _onDirectoryChanged(self, path):
+        """Coalesce notifications until the tree has been quiet for a while"""
+        self._dirty.add(path)
+        self._debounce_timer.start()
+
+    def _flush(self):
+        """Hand the coalesced directories to the worker thread"""
+        dirty, self._dirty = self._dirty, set()
+        if dirty:
+            self.db_worker.submit(self._syncDirectories, dirty)
+
+    def _poll(self):
+        """Queue a poll of directory modification times"""
+        if not self._poll_in_progress:
+            self._poll_in_progress = True
+            self.db_worker.submit(self._pollDirectories)
+
+    def _updateWatches(self, added, removed):
+        """Register native watches, switching to polling when they run out"""
+        if removed and not self.polling:
+            watched = set(self._fs_watcher.directories())
+            stale = [path for path in removed if path in watched]
+            if stale:
+                self._fs_watcher.removePaths(stale)
+
+        if not added or self.polling:
+            return
+
+        failed = []
+        if len(self._fs_watcher.directories()) + len(added) <= self.MAX_NATIVE_WATCHES:
+            failed = self._fs_watcher.addPaths(added)
+        else:
+            failed = added
+
+        if failed:
+            self.logger.info("Native watches exhausted, polling every %ds instead",
+                             self.POLL_INTERVAL_MS // 1000)
+            self.polling = True
+            watched = self._fs_watcher.directories()
+            if watched:
+                self._fs_watcher.removePaths(watched)
+            self._poll_timer.start()
+
+    # Worker thread
+
+    def _resume(self, db):
+        for root in db.get_watched_folders():
+            self._scanRoot(db, root, False)
+
+    def _scanRoot(self, db, root, register):
+        """Diff a whole folder tree against the database, written in batches"""
+        if register:
+            db.add_watched_folder(root)
+        if root in self._dir_mtimes:
+            return
+        changes = _ChangeSet()
+        self._diffDirectory(db, root, changes, recursive=True)
+        self._commit(db, changes)
+
+    def _syncDirectories(self, db, directories):
+        changes = _ChangeSet()
+        for directory in directories:
+            # A parent may already have dropped this directory from the tree
+            if directory in self._dir_mtimes:
+                self._diffDirectory(db, directory, changes)
+        self._commit(db, changes)
+
+    def _pollDirectories(self, db):
+        try:
+            dirty = []
+            for directory, mtime in list(self._dir_mtimes.items()):
+                try:
+                    if os.stat(directory).st_mtime != mtime:
+                        dirty.append(directory)
+                except OSError:
+                    dirty.append(directory)
+            if dirty:
+                self._syncDirectories(db, dirty)
+        finally:
+            self._poll_in_progress = False
+
+    def _diffDirectory(self, db, directory, changes, recursive=False):
+        """
+        Compare a directory with the database.
+        New subdirectories are always descended into; with recursive set,
+        known subdirectories are diffed as well. Every BATCH_SIZE changes
+        are written and cleared from changes, so large trees are neither
+        held in memory nor written in one long transaction.
+        """
+        stack = [directory]
+        while stack:
+            directory = stack.pop()
+            try:
+                mtime = os.stat(directory).st_mtime
+                entries = list(os.scandir(directory))
+            except OSError:
+                self._forgetDirectory(db, directory, changes)
+                continue
+
+            if directory not in self._dir_mtimes:
+                changes.added_dirs.append(directory)
+            self._dir_mtimes[directory] = mtime
+
+            known = db.get_directory_files(directory)
+            subdirs = set()
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.add(entry.path)
+                        continue
+                    if not entry.name.lower().endswith(AUDIO_FILE_EXTENSIONS):
+                        continue
+                    size = entry.stat().st_size
+                except OSError:
+                    continue
+                if entry.path not in known:
+                    changes.created[entry.path] = size
+                elif known.pop(entry.path) != size:
+                    changes.modified[entry.path] = size
+            changes.deleted.update(known)
+
+            previous = self._children.get(directory, set())
+            self._children[directory] = subdirs
+            for subdir in previous - subdirs:
+                self._forgetDirectory(db, subdir, changes)
+            stack.extend(subdir for subdir in subdirs if recursive or subdir not in previous)
+
+            if len(changes) >= self.BATCH_SIZE:
+                self._commit(db, changes)
+                changes.clear()
+
+    def _forgetDirectory(self, db, directory, changes):
+        """Drop a vanished directory and mark everything below it deleted"""
+        stack = [directory]
+        while stack:
+            current = stack.pop()
+            if self._dir_mtimes.pop(current, None) is not None:
+                changes.removed_dirs.append(current)
+            stack.extend(self._children.pop(current, ()))
+        changes.deleted.update(db.get_directory_files(directory, recursive=True))
+
+    def _commit(self, db, changes):
+        """
+        Write a change set as a single transaction. Moves are recognised
+        within one change set only.
+        """
+        # A file that disappeared and reappeared elsewhere with the same name
+        # and size was moved; keep its row so play statistics survive
+        vanished = {(os.path.basename(path), size): path
+                    for path, size in changes.deleted.items()}
+        moves = []
+        for path, size in list(changes.created.items()):
+            old_path = vanished.pop((os.path.basename(path), size), None)
+            if old_path is not None:
+                moves.append((old_path, path))
+                del changes.created[path]
+                del changes.deleted[old_path]
+
+        upserts = [
+            {
+                'filename': os.path.basename(path),
+                'filepath': path,
+                'size': size,
+                'format': os.path.splitext(path)[1][1:].upper()
+            }
+            for files in (changes.created, changes.modified)
+            for path, size in files.items()
+        ]
+
+        if upserts or moves or changes.deleted:
+            if db.apply_library_changes(upserts, changes.deleted, moves):
+                self.libraryChanged.emit(len(upserts) + len(moves), len(changes.deleted))
+        if changes.added_dirs or changes.removed_dirs:
+            self._watchesChanged.emit(changes.added_dirs, changes.removed_dirs)
@@ -1,57 +1,92 @@
 from PySide6.QtCore import QTranslator, QLocale
 import os
 
+# Compiled translations ship next to the package, found regardless of the
+# working directory
+TRANSLATIONS_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'translations'
+)
+
+DEFAULT_LANGUAGE = 'en'
+LANGUAGES = ('en', 'ru')
+
 class OrphismLocalizationManager:
     """
     Class responsible for managing application localization.
-    Handles loading and applying translations based on system locale.
+
+    Translators are loaded once per language and kept; switching installs
+    the cached translator, and Qt sends a LanguageChange event to every
+    widget so each one retranslates its own labels in place.
     """
-    
-    def __init__(self, app):
+
+    def __init__(self, app, translations_dir=TRANSLATIONS_DIR):
         """
         Initialize the localization manager.
-        
+
         Args:
             app: QApplication instance to apply translations to
+            translations_dir (str): Folder holding audiodb_<language>.qm files
         """
         self.app = app
-        self.translator = QTranslator()
-        self.app.translator = self.translator
-    
+        self.translations_dir = translations_dir
+        self.language = DEFAULT_LANGUAGE
+        self._translators = {}
+        self._installed = None
+        # Found by widgets through QApplication.instance()
+        self.app.localization = self
+
+    @classmethod
+    def instance(cls, app):
+        """
+        Get the manager of an application, creating it if needed
+
+        Args:
+            app: QApplication instance
+        """
+        return getattr(app, 'localization', None) or cls(app)
+
     def setup_localization(self):
         """
         Set up application localization based on system locale.
-        Currently supports Russian language.
-        """
-        locale = QLocale.system().name()
-        
-        if locale.startswith('ru'):
-            self._load_russian_translation()
-    
-    def _load_russian_translation(self):
-        """
-        Load Russian translation if available.
-        """
-        translation_file = os.path.join('translations', 'audiodb_ru.qm')
-        if os.path.exists(translation_file):
-            self.translator.load(translation_file)
-            self.app.installTranslator(self.translator)
-    
+        """
+        language = QLocale.system().name().split('_')[0]
+        if language in LANGUAGES:
+            self.change_language(language)
+
+    def _translator(self, language_code):
+        """Cached translator for a language, or None if it has no translation file"""
+        if language_code not in self._translators:
+            translator = QTranslator()
+            translation_file = os.path.join(self.translations_dir, f"audiodb_{language_code}.qm")
+            if not translator.load(translation_file):
+                translator = None
+            self._translators[language_code] = translator
+        return self._translators[language_code]
+
     def change_language(self, language_code):
         """
         Change application language manually.
-        
+
         Args:
             language_code: String code of the language (e.g., 'ru', 'en')
-        
+
         Returns:
             bool: True if language was changed successfully, False otherwise
         """
-        if language_code == 'ru':
-            return self._load_russian_translation()
-        elif language_code == 'en':
-            # Remove translator to use default English
-            self.app.removeTranslator(self.translator)
+        if language_code == self.language:
             return True
-        
-        return False
\ No newline at end of file
+
+        translator = None
+        if language_code != DEFAULT_LANGUAGE:
+            translator = self._translator(language_code)
+            if translator is None:
+                return False
+
+        # Installing and removing translators each post a LanguageChange event
+        if self._installed is not None:
+            self.app.removeTranslator(self._installed)
+        if translator is not None:
+            self.app.installTranslator(translator)
+        self._installed = translator
+        self.language = language_code
+        return True
@@ -0,0 +1,113 @@
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+
+# Parent logger of every AudioDB component
+ROOT_LOGGER_NAME = 'orphism'
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Environment overrides for deployments and debugging sessions
+LOG_LEVEL_ENV = 'AUDIODB_LOG_LEVEL'
+LOG_DIR_ENV = 'AUDIODB_LOG_DIR'
+
+DEFAULT_LOG_LEVEL = 'INFO'
+DEFAULT_LOG_DIR = os.path.join(os.path.expanduser('~'), '.audiodb', 'logs')
+LOG_FILE_MAX_BYTES = 5 * 1024 * 1024
+LOG_FILE_BACKUPS = 3
+
+_listener = None
+
+
+def get_logger(name):
+    """
+    Get a logger below the application root logger.
+
+    Args:
+        name (str): Component name, e.g. 'AudioDBSqlite'
+
+    Returns:
+        logging.Logger: Logger named 'orphism.<name>'
+    """
+    return logging.getLogger(f'{ROOT_LOGGER_NAME}.{name}')
+
+
+def setup_logging(level=None, log_dir=None, console=True):
+    """
+    Configure application logging once per process.
+
+    Records are put on an in-memory queue by the calling thread and formatted
+    and written by a QueueListener thread, so hot paths never wait for the
+    console or the disk. Calling this again only changes the level, and
+    only when one is passed, so connections opened later keep a level set
+    by the application.
+
+    Args:
+        level (str|int): Log level; the first call defaults to
+            $AUDIODB_LOG_LEVEL or INFO
+        log_dir (str): Directory for database.log; defaults to
+            $AUDIODB_LOG_DIR or ~/.audiodb/logs. An empty string disables
+            file logging.
+        console (bool): Also write records to stderr
+
+    Returns:
+        logging.Logger: The application root logger
+    """
+    global _listener
+
+    root = logging.getLogger(ROOT_LOGGER_NAME)
+    if level is None and _listener is None:
+        level = os.environ.get(LOG_LEVEL_ENV, DEFAULT_LOG_LEVEL)
+    if level is not None:
+        root.setLevel(level.upper() if isinstance(level, str) else level)
+
+    if _listener is not None:
+        return root
+
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers = []
+
+    if console:
+        stream_handler = logging.StreamHandler()
+        stream_handler.setFormatter(formatter)
+        handlers.append(stream_handler)
+
+    if log_dir is None:
+        log_dir = os.environ.get(LOG_DIR_ENV, DEFAULT_LOG_DIR)
+    if log_dir:
+        try:
+            os.makedirs(log_dir, exist_ok=True)
+            file_handler = logging.handlers.RotatingFileHandler(
+                os.path.join(log_dir, 'database.log'),
+                maxBytes=LOG_FILE_MAX_BYTES,
+                backupCount=LOG_FILE_BACKUPS,
+                encoding='utf-8'
+            )
+            file_handler.setFormatter(formatter)
+            handlers.append(file_handler)
+        except OSError:
+            pass
+
+    log_queue = queue.SimpleQueue()
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.propagate = False
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    return root
+
+
+def shutdown_logging():
+    """Flush pending records and stop the writer thread"""
+    global _listener
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+        root = logging.getLogger(ROOT_LOGGER_NAME)
+        for handler in list(root.handlers):
+            if isinstance(handler, logging.handlers.QueueHandler):
+                root.removeHandler(handler)
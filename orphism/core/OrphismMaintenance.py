@@ -0,0 +1,448 @@
+import glob
+import os
+import re
+import sqlite3
+import time
+from datetime import datetime, timedelta
+from itertools import islice
+from orphism.core.OrphismDB import AudioDBSqlite
+from orphism.core.OrphismLogging import get_logger
+
+# Pages copied or freed per step; between steps the database is unlocked
+# so the application keeps reading and writing
+STEP_PAGES = 256
+STEP_SLEEP = 0.005
+
+# ANALYZE samples this many rows per index, enough for the query planner
+# and fast on large libraries
+ANALYSIS_LIMIT = 1000
+
+# Free space worth returning to the file system, as a share of all pages
+VACUUM_FREE_RATIO = 0.1
+
+BACKUP_ENV = 'AUDIODB_BACKUP_DIR'
+DEFAULT_BACKUP_DIR = os.path.join(os.path.expanduser('~'), '.audiodb', 'backups')
+DEFAULT_KEEP_BACKUPS = 7
+
+BACKUP, VACUUM, ANALYZE, QUICK_CHECK, INTEGRITY_CHECK = (
+    'backup', 'incremental_vacuum', 'analyze', 'quick_check', 'integrity_check'
+)
+
+# How often run_due() performs each task
+MAINTENANCE_INTERVALS = {
+    BACKUP: timedelta(days=1),
+    VACUUM: timedelta(days=1),
+    ANALYZE: timedelta(days=7),
+    QUICK_CHECK: timedelta(days=7),
+    INTEGRITY_CHECK: timedelta(days=30),
+}
+
+
+# Databases whose schema this process has already created or checked
+_initialized_paths = set()
+
+
+class MaintenanceCancelled(Exception):
+    """Raised inside a running task after cancel() was called"""
+
+
+class OrphismMaintenance:
+    """
+    Backup and housekeeping for a library database while it is in use.
+
+    Every task opens its own connection and works in short steps, so it can
+    run on a background thread next to the GUI and the database worker.
+    Backups copy a consistent snapshot: a read transaction is held on the
+    source for the whole copy, which under WAL does not block writers, and
+    the copy is written to a temporary file renamed into place at the end.
+    """
+
+    def __init__(self, db_path="audiodb.sqlite", backup_dir=None, keep_backups=DEFAULT_KEEP_BACKUPS):
+        """
+        Initialize maintenance for a database.
+
+        Args:
+            db_path (str): Path to the SQLite database file
+            backup_dir (str): Folder for scheduled backups, defaults to
+                $AUDIODB_BACKUP_DIR or ~/.audiodb/backups
+            keep_backups (int): Number of scheduled backups to keep
+        """
+        self.db_path = db_path
+        self.backup_dir = backup_dir or os.environ.get(BACKUP_ENV) or DEFAULT_BACKUP_DIR
+        self.keep_backups = keep_backups
+        self.logger = get_logger('OrphismMaintenance')
+        self._cancelled = False
+
+    def cancel(self):
+        """Stop the running task at its next step; later tasks are skipped too"""
+        self._cancelled = True
+
+    def _check_cancelled(self):
+        if self._cancelled:
+            raise MaintenanceCancelled()
+
+    def _connect(self, read_only=False):
+        """
+        Open a connection for one task. The schema is created once per
+        process and database; read-only connections never write, so status
+        queries cannot wait for or hold up the library's writer.
+        """
+        db = AudioDBSqlite(self.db_path)
+        path = os.path.abspath(self.db_path)
+        if read_only or path in _initialized_paths:
+            ok = db.connect()
+            if ok and read_only:
+                db.connection.execute("PRAGMA query_only = ON")
+        else:
+            ok = db.initialize_database()
+            if ok:
+                _initialized_paths.add(path)
+        if not ok:
+            raise sqlite3.OperationalError(f"cannot open database {self.db_path}")
+        return db
+
+    def info(self):
+        """
+        Returns:
+            dict: page_size, page_count, freelist_count, auto_vacuum and
+                file_size, or None if the database cannot be read
+        """
+        db = None
+        try:
+            db = self._connect(read_only=True)
+            info = {name: db.connection.execute(f"PRAGMA {name}").fetchone()[0]
+                    for name in ('page_size', 'page_count', 'freelist_count', 'auto_vacuum')}
+            info['file_size'] = os.path.getsize(self.db_path)
+            return info
+        except (sqlite3.Error, OSError) as e:
+            self.logger.error("Error reading %s: %s", self.db_path, e)
+            return None
+        finally:
+            if db is not None:
+                db.disconnect()
+
+    # Backups
+
+    def backup(self, destination, compact=False, pages=STEP_PAGES, sleep=STEP_SLEEP, progress=None):
+        """
+        Copy the database while it is in use.
+
+        Args:
+            destination (str): Backup file, replaced only when the copy is complete
+            compact (bool): Write a defragmented copy with VACUUM INTO instead
+                of copying pages; smaller, but one long statement
+            pages (int): Pages copied per step
+            sleep (float): Seconds to pause between steps
+            progress (callable): Called as progress(copied_pages, total_pages)
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        partial = destination + ".partial"
+        start = time.perf_counter()
+        source = None
+        try:
+            if os.path.exists(partial):
+                os.remove(partial)
+            source = self._connect()
+            if compact:
+                source.connection.execute("VACUUM INTO ?", (partial,))
+            else:
+                def step(status, remaining, total):
+                    self._check_cancelled()
+                    if progress:
+                        progress(total - remaining, total)
+
+                # Pin a snapshot; without it every commit by another
+                # connection would restart the copy
+                source.connection.execute("BEGIN")
+                source.connection.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+                target = sqlite3.connect(partial)
+                try:
+                    source.connection.backup(target, pages=pages, progress=step, sleep=sleep)
+                finally:
+                    target.close()
+                    source.connection.rollback()
+            os.replace(partial, destination)
+            self.logger.info("Backed up %s to %s in %.1fs", self.db_path, destination,
+                             time.perf_counter() - start)
+            return True
+        except MaintenanceCancelled:
+            self.logger.info("Backup of %s cancelled", self.db_path)
+            return False
+        except (sqlite3.Error, OSError) as e:
+            self.logger.error("Error backing up %s: %s", self.db_path, e)
+            return False
+        finally:
+            if source is not None:
+                source.disconnect()
+            if os.path.exists(partial):
+                os.remove(partial)
+
+    def backup_to_directory(self, directory=None, keep=None, **kwargs):
+        """
+        Write a timestamped backup and delete the oldest ones beyond keep.
+
+        Returns:
+            str: Path of the backup, or None if failed
+        """
+        directory = directory or self.backup_dir
+        keep = self.keep_backups if keep is None else keep
+        try:
+            os.makedirs(directory, exist_ok=True)
+        except OSError as e:
+            self.logger.error("Error creating backup directory %s: %s", directory, e)
+            return None
+        name = os.path.splitext(os.path.basename(self.db_path))[0]
+        destination = os.path.join(directory, f"{name}-{datetime.now():%Y%m%d-%H%M%S}.sqlite")
+        if not self.backup(destination, **kwargs):
+            return None
+
+        # Only files named like ours; the glob alone also matches
+        # backups of another library called e.g. library-old
+        pattern = re.compile(re.escape(name) + r"-\d{8}-\d{6}\.sqlite")
+        candidates = glob.glob(os.path.join(directory, glob.escape(name) + "-*.sqlite"))
+        backups = sorted(path for path in candidates if pattern.fullmatch(os.path.basename(path)))
+        for old in backups[:max(0, len(backups) - keep)]:
+            os.remove(old)
+            self.logger.info("Removed old backup %s", old)
+        return destination
+
+    # Housekeeping
+
+    def incremental_vacuum(self, max_pages=None, pages=STEP_PAGES, sleep=STEP_SLEEP):
+        """
+        Return free pages to the file system in short write transactions.
+
+        Only libraries created with auto_vacuum=INCREMENTAL (the default for
+        new ones) support this; see enable_incremental_vacuum.
+
+        Args:
+            max_pages (int): Stop after freeing this many pages
+            pages (int): Pages freed per transaction
+            sleep (float): Seconds to pause between transactions
+
+        Returns:
+            int: Number of pages freed
+        """
+        db = None
+        freed = 0
+        try:
+            db = self._connect()
+            if db.connection.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                self.logger.warning("%s does not use incremental auto-vacuum; run "
+                                    "'compact --full' once to enable it", self.db_path)
+                return 0
+            free = db.connection.execute("PRAGMA freelist_count").fetchone()[0]
+            while free and (max_pages is None or freed < max_pages):
+                self._check_cancelled()
+                step = pages if max_pages is None else min(pages, max_pages - freed)
+                # The pragma frees one page per step of its statement;
+                # executescript runs it to completion
+                db.connection.executescript(f"PRAGMA incremental_vacuum({int(step)});")
+                remaining = db.connection.execute("PRAGMA freelist_count").fetchone()[0]
+                if remaining >= free:
+                    break
+                freed += free - remaining
+                free = remaining
+                time.sleep(sleep)
+            # Under WAL the file shrinks once the freed pages are checkpointed
+            db.connection.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchall()
+            self.logger.info("Freed %d pages of %s", freed, self.db_path)
+        except MaintenanceCancelled:
+            self.logger.info("Vacuum of %s cancelled after %d pages", self.db_path, freed)
+        except sqlite3.Error as e:
+            self.logger.error("Error vacuuming %s: %s", self.db_path, e)
+        finally:
+            if db is not None:
+                db.disconnect()
+        return freed
+
+    def enable_incremental_vacuum(self):
+        """
+        Switch an existing library to incremental auto-vacuum with one full
+        VACUUM. Writers are blocked until it finishes, so this is left to
+        the command line.
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        db = None
+        try:
+            db = self._connect()
+            db.connection.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            db.connection.execute("VACUUM")
+            self.logger.info("Enabled incremental vacuum for %s", self.db_path)
+            return True
+        except sqlite3.Error as e:
+            self.logger.error("Error vacuuming %s: %s", self.db_path, e)
+            return False
+        finally:
+            if db is not None:
+                db.disconnect()
+
+    def analyze(self, limit=ANALYSIS_LIMIT):
+        """
+        Refresh the statistics the query planner uses to pick indexes
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        db = None
+        try:
+            db = self._connect()
+            db.connection.execute(f"PRAGMA analysis_limit = {int(limit)}")
+            db.connection.execute("ANALYZE")
+            db.connection.commit()
+            self.logger.info("Analyzed %s", self.db_path)
+            return True
+        except sqlite3.Error as e:
+            self.logger.error("Error analyzing %s: %s", self.db_path, e)
+            return False
+        finally:
+            if db is not None:
+                db.disconnect()
+
+    def integrity_check(self, quick=True, max_errors=100):
+        """
+        Check the database file and foreign keys.
+
+        Args:
+            quick (bool): Skip the slower index content checks
+            max_errors (int): Maximum number of problems reported
+
+        Returns:
+            list: Problems found, empty if the database is sound
+        """
+        db = None
+        try:
+            db = self._connect(read_only=True)
+            pragma = "quick_check" if quick else "integrity_check"
+            problems = [row[0] for row in db.connection.execute(f"PRAGMA {pragma}({int(max_errors)})")
+                        if row[0] != 'ok']
+            violations = islice(db.connection.execute("PRAGMA foreign_key_check"), max_errors)
+            problems += [f"foreign key violation in {table} row {rowid} -> {parent}"
+                         for table, rowid, parent, _ in violations]
+            if problems:
+                self.logger.error("%s found %d problems in %s", pragma, len(problems), self.db_path)
+            else:
+                self.logger.info("%s passed for %s", pragma, self.db_path)
+            return problems[:max_errors]
+        except sqlite3.Error as e:
+            self.logger.error("Error checking %s: %s", self.db_path, e)
+            return [str(e)]
+        finally:
+            if db is not None:
+                db.disconnect()
+
+    # Scheduling
+
+    def last_runs(self):
+        """
+        Returns:
+            dict: Task name to datetime of its last run
+        """
+        db = None
+        try:
+            db = self._connect(read_only=True)
+            return {task: datetime.fromisoformat(last_run) for task, last_run in
+                    db.connection.execute("SELECT task, last_run FROM maintenance_log")}
+        except sqlite3.OperationalError:
+            # The log is created with the schema on the first task run;
+            # an unreadable database has no runs either
+            return {}
+        finally:
+            if db is not None:
+                db.disconnect()
+
+    def due_tasks(self, now=None):
+        """
+        Returns:
+            list: Tasks whose interval has passed, plus incremental_vacuum
+                whenever much of the file is free space
+        """
+        now = now or datetime.now()
+        last_runs = self.last_runs()
+        # A full check covers the quick one
+        if INTEGRITY_CHECK in last_runs:
+            last_runs[QUICK_CHECK] = max(last_runs[INTEGRITY_CHECK],
+                                         last_runs.get(QUICK_CHECK, last_runs[INTEGRITY_CHECK]))
+        due = [task for task, interval in MAINTENANCE_INTERVALS.items()
+               if task not in last_runs or now - last_runs[task] >= interval]
+        if VACUUM not in due:
+            info = self.info()
+            if info and info['page_count'] and info['freelist_count'] / info['page_count'] >= VACUUM_FREE_RATIO:
+                due.append(VACUUM)
+        if INTEGRITY_CHECK in due and QUICK_CHECK in due:
+            due.remove(QUICK_CHECK)
+        return due
+
+    def run_due(self, now=None, progress=None):
+        """
+        Run every due task and record its result.
+
+        Args:
+            now (datetime): Reference time
+            progress (callable): Called as progress(task, done, total) during backups
+
+        Returns:
+            list: (task, ok, message) for every task run
+        """
+        results = []
+        for task in self.due_tasks(now):
+            result = self.run_task(task, progress)
+            if result is None:
+                break
+            results.append(result)
+        return results
+
+    def run_task(self, task, progress=None):
+        """
+        Run one maintenance task and record its result.
+
+        Args:
+            task (str): One of the MAINTENANCE_INTERVALS tasks
+            progress (callable): Called as progress(task, done, total) during backups
+
+        Returns:
+            tuple: (task, ok, message), or None if cancelled
+        """
+        if self._cancelled:
+            return None
+        if task == BACKUP:
+            path = self.backup_to_directory(
+                progress=(lambda done, total: progress(task, done, total)) if progress else None
+            )
+            ok, message = path is not None, path or "backup failed"
+        elif task == VACUUM:
+            freed = self.incremental_vacuum()
+            ok, message = True, f"{freed} pages freed"
+        elif task == ANALYZE:
+            ok = self.analyze()
+            message = "statistics refreshed" if ok else "analyze failed"
+        elif task in (QUICK_CHECK, INTEGRITY_CHECK):
+            problems = self.integrity_check(quick=task == QUICK_CHECK)
+            ok = not problems
+            message = "ok" if ok else f"{len(problems)} problems, first: {problems[0]}"
+        else:
+            raise ValueError(f"Unknown maintenance task: {task}")
+        if self._cancelled:
+            return None
+        self._log(task, ok, message)
+        return task, ok, message
+
+    def _log(self, task, ok, message):
+        db = None
+        try:
+            db = self._connect()
+            db.connection.execute(
+                "INSERT INTO maintenance_log (task, last_run, result) VALUES (?, ?, ?) "
+                "ON CONFLICT (task) DO UPDATE SET last_run = excluded.last_run, result = excluded.result",
+                (task, datetime.now().isoformat(sep=' '), message if ok else "failed: " + message)
+            )
+            db.connection.commit()
+        except sqlite3.Error as e:
+            self.logger.error("Error recording maintenance of %s: %s", self.db_path, e)
+        finally:
+            if db is not None:
+                db.disconnect()
@@ -0,0 +1,668 @@
+import os
+import threading
+import time
+import wave
+from PySide6.QtCore import QObject, QThread, QTimer, Signal
+from orphism.core.OrphismLogging import get_logger
+
+# Every track is decoded to one output format, so consecutive tracks form a
+# single continuous PCM stream and play without gaps
+OUTPUT_SAMPLE_RATE = 44100
+OUTPUT_CHANNELS = 2
+OUTPUT_SAMPLE_WIDTH = 2
+FRAME_BYTES = OUTPUT_CHANNELS * OUTPUT_SAMPLE_WIDTH
+BYTES_PER_SECOND = OUTPUT_SAMPLE_RATE * FRAME_BYTES
+
+# Decoded audio kept in memory: read-ahead for the next track plus history
+# for cheap backward seeks
+DEFAULT_BUFFER_SECONDS = 20
+DECODE_CHUNK_FRAMES = 4096
+
+# A skipped or stopped track counts as played after this many seconds
+PLAY_COUNT_THRESHOLD_SECONDS = 30
+
+# Set to 'null' to play into the null sink, e.g. on headless machines
+AUDIO_SINK_ENV = 'AUDIODB_AUDIO_SINK'
+
+
+class OrphismRingBuffer:
+    """
+    Bounded PCM buffer between a decoder thread and an audio sink.
+
+    Positions are absolute byte offsets in the stream. Played bytes stay in
+    the buffer until the writer needs their space, so seeking anywhere
+    between the oldest retained byte and the decoded end only moves the
+    read position. Writers block while the buffer is full of unplayed data;
+    readers never block.
+    """
+
+    def __init__(self, capacity):
+        """
+        Initialize the buffer.
+
+        Args:
+            capacity (int): Size in bytes, rounded down to whole frames
+        """
+        self.capacity = capacity - capacity % FRAME_BYTES
+        self._data = bytearray(self.capacity)
+        self._condition = threading.Condition()
+        self._start = 0
+        self._read = 0
+        self._write = 0
+        self._closed = False
+        self._cancelled = False
+
+    @property
+    def read_position(self):
+        return self._read
+
+    @property
+    def write_position(self):
+        return self._write
+
+    def available(self):
+        """
+        Returns:
+            int: Decoded bytes not yet played
+        """
+        return self._write - self._read
+
+    def finished(self):
+        """
+        Returns:
+            bool: True when the writer closed the stream and all of it was read
+        """
+        return self._closed and self._read == self._write
+
+    def write(self, data):
+        """
+        Append decoded audio, waiting for free space.
+
+        Args:
+            data (bytes): PCM data
+
+        Returns:
+            bool: False if the buffer was cancelled while writing
+        """
+        view = memoryview(data)
+        while view:
+            with self._condition:
+                while not self._cancelled and self._write - self._read >= self.capacity:
+                    self._condition.wait()
+                if self._cancelled:
+                    return False
+                size = min(len(view), self.capacity - (self._write - self._read))
+                offset = self._write % self.capacity
+                first = min(size, self.capacity - offset)
+                self._data[offset:offset + first] = view[:first]
+                self._data[:size - first] = view[first:size]
+                self._write += size
+                # Overwritten history is no longer seekable
+                self._start = max(self._start, self._write - self.capacity)
+                view = view[size:]
+        return True
+
+    def read(self, size):
+        """
+        Take up to size bytes without waiting.
+
+        Args:
+            size (int): Maximum number of bytes
+
+        Returns:
+            bytes: Whole frames, empty when nothing is decoded yet
+        """
+        with self._condition:
+            size = min(size, self._write - self._read)
+            size -= size % FRAME_BYTES
+            if size <= 0:
+                return b''
+            offset = self._read % self.capacity
+            first = min(size, self.capacity - offset)
+            data = bytes(self._data[offset:offset + first]) + bytes(self._data[:size - first])
+            self._read += size
+            self._condition.notify_all()
+            return data
+
+    def seek(self, position):
+        """
+        Move the read position inside the buffered window.
+
+        Args:
+            position (int): Absolute stream position
+
+        Returns:
+            bool: False if the position is not buffered
+        """
+        position -= position % FRAME_BYTES
+        with self._condition:
+            if not self._start <= position <= self._write:
+                return False
+            self._read = position
+            self._condition.notify_all()
+            return True
+
+    def close(self):
+        """Mark the end of the stream"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def cancel(self):
+        """Wake and stop a blocked writer"""
+        with self._condition:
+            self._cancelled = True
+            self._condition.notify_all()
+
+    def reset(self):
+        """Drop all data so a new decoder can start from position 0"""
+        with self._condition:
+            self._start = self._read = self._write = 0
+            self._closed = False
+            self._cancelled = False
+
+
+class WaveTrackDecoder:
+    """Decoder for PCM WAV files in the output format, using only the stdlib"""
+
+    def can_decode(self, path):
+        if not path.lower().endswith('.wav'):
+            return False
+        try:
+            with wave.open(path, 'rb') as f:
+                return (f.getframerate(), f.getnchannels(), f.getsampwidth()) == \
+                    (OUTPUT_SAMPLE_RATE, OUTPUT_CHANNELS, OUTPUT_SAMPLE_WIDTH)
+        except (OSError, wave.Error, EOFError):
+            return False
+
+    def decode(self, path, start_frame, write):
+        """
+        Decode a file into the stream.
+
+        Args:
+            path (str): Audio file
+            start_frame (int): First frame to produce
+            write (callable): Receives PCM chunks, returns False to cancel
+
+        Returns:
+            bool: False if decoding was cancelled
+        """
+        with wave.open(path, 'rb') as f:
+            f.setpos(min(start_frame, f.getnframes()))
+            while True:
+                data = f.readframes(DECODE_CHUNK_FRAMES)
+                if not data:
+                    return True
+                if not write(data):
+                    return False
+
+
+class QtTrackDecoder:
+    """Decoder for every format supported by the QtMultimedia backend"""
+
+    def __init__(self):
+        from PySide6.QtMultimedia import QAudioFormat
+        self.format = QAudioFormat()
+        self.format.setSampleRate(OUTPUT_SAMPLE_RATE)
+        self.format.setChannelCount(OUTPUT_CHANNELS)
+        self.format.setSampleFormat(QAudioFormat.Int16)
+
+    def can_decode(self, path):
+        return True
+
+    def decode(self, path, start_frame, write):
+        """Decode a file, converting it to the output format; see WaveTrackDecoder.decode"""
+        from PySide6.QtCore import QEventLoop, QUrl
+        from PySide6.QtMultimedia import QAudioDecoder
+
+        loop = QEventLoop()
+        decoder = QAudioDecoder()
+        decoder.setAudioFormat(self.format)
+        decoder.setSource(QUrl.fromLocalFile(path))
+        state = {'skip': start_frame * FRAME_BYTES, 'cancelled': False}
+
+        def on_buffer_ready():
+            audio_buffer = decoder.read()
+            data = bytes(audio_buffer.constData())[:audio_buffer.byteCount()]
+            if state['skip']:
+                skipped = min(state['skip'], len(data))
+                state['skip'] -= skipped
+                data = data[skipped:]
+            if data and not write(data):
+                state['cancelled'] = True
+                decoder.stop()
+                loop.quit()
+
+        decoder.bufferReady.connect(on_buffer_ready)
+        decoder.finished.connect(loop.quit)
+        # Also fires when decoding stops because of an error
+        decoder.isDecodingChanged.connect(lambda decoding: decoding or loop.quit())
+        decoder.start()
+        loop.exec()
+        return not state['cancelled']
+
+
+class NullAudioSink:
+    """
+    Sink that discards audio, for headless machines and tests.
+    With realtime set it consumes at playback speed, otherwise as fast as
+    the decoder delivers.
+    """
+
+    def __init__(self, realtime=True):
+        self.realtime = realtime
+        self._ring = None
+        self._thread = None
+        self._running = threading.Event()
+        self._stopped = threading.Event()
+
+    def start(self, ring):
+        self.stop()
+        self._ring = ring
+        self._stopped.clear()
+        self._running.set()
+        self._thread = threading.Thread(target=self._consume, name="NullAudioSink", daemon=True)
+        self._thread.start()
+
+    def suspend(self):
+        self._running.clear()
+
+    def resume(self):
+        self._running.set()
+
+    def stop(self):
+        self._stopped.set()
+        self._running.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def notify(self):
+        """Nothing to wake; the consumer thread polls the buffer"""
+
+    def _consume(self):
+        period = 0.02
+        chunk = int(BYTES_PER_SECOND * period)
+        while not self._stopped.is_set():
+            self._running.wait()
+            if not self._ring.read(chunk if self.realtime else 1 << 20):
+                if self._ring.finished():
+                    self._stopped.wait(period)
+                    continue
+                time.sleep(0.001 if not self.realtime else period)
+            elif self.realtime:
+                time.sleep(period)
+
+
+class QtAudioSink:
+    """Sink pulling from the ring buffer through a QAudioSink"""
+
+    def __init__(self):
+        from PySide6.QtMultimedia import QAudioFormat
+        self.format = QAudioFormat()
+        self.format.setSampleRate(OUTPUT_SAMPLE_RATE)
+        self.format.setChannelCount(OUTPUT_CHANNELS)
+        self.format.setSampleFormat(QAudioFormat.Int16)
+        self._sink = None
+        self._device = None
+
+    def start(self, ring):
+        from PySide6.QtCore import QIODevice
+        from PySide6.QtMultimedia import QAudioSink, QMediaDevices
+
+        class RingDevice(QIODevice):
+            """Read-only device over the ring buffer; never blocks the GUI thread"""
+
+            def readData(self, maxlen):
+                return ring.read(maxlen)
+
+            def writeData(self, data):
+                return -1
+
+            def bytesAvailable(self):
+                return ring.available() + super().bytesAvailable()
+
+            def isSequential(self):
+                return True
+
+        self.stop()
+        self._device = RingDevice()
+        self._device.open(QIODevice.ReadOnly)
+        self._sink = QAudioSink(QMediaDevices.defaultAudioOutput(), self.format)
+        self._sink.start(self._device)
+
+    def suspend(self):
+        if self._sink is not None:
+            self._sink.suspend()
+
+    def resume(self):
+        if self._sink is not None:
+            self._sink.resume()
+
+    def stop(self):
+        if self._sink is not None:
+            self._sink.stop()
+            self._sink = None
+        if self._device is not None:
+            self._device.close()
+            self._device = None
+
+    def notify(self):
+        """Tell an idle sink that decoded data arrived"""
+        if self._device is not None:
+            self._device.readyRead.emit()
+
+
+def create_audio_sink():
+    """
+    Returns:
+        QtAudioSink or NullAudioSink: Null sink when $AUDIODB_AUDIO_SINK is
+            'null' or QtMultimedia is unavailable
+    """
+    if os.environ.get(AUDIO_SINK_ENV) != 'null':
+        try:
+            return QtAudioSink()
+        except ImportError:
+            pass
+    return NullAudioSink()
+
+
+def create_track_decoders():
+    """
+    Returns:
+        list: Decoders in order of preference
+    """
+    decoders = [WaveTrackDecoder()]
+    try:
+        decoders.append(QtTrackDecoder())
+    except ImportError:
+        pass
+    return decoders
+
+
+class _DecodeThread(QThread):
+    """Decodes the queue from one track on, writing into the ring buffer"""
+
+    def __init__(self, engine, index, start_frame):
+        super().__init__()
+        self.engine = engine
+        self.index = index
+        self.start_frame = start_frame
+
+    def run(self):
+        engine = self.engine
+        ring = engine.ring
+        start_frame = self.start_frame
+        for index in range(self.index, len(engine.queue)):
+            audio_id, path = engine.queue[index]
+            decoder = next((d for d in engine.decoders if d.can_decode(path)), None)
+            if decoder is None:
+                engine.logger.warning("No decoder for %s, skipping", path)
+                continue
+            engine._addBoundary(ring.write_position, index, start_frame * FRAME_BYTES)
+            try:
+                if not decoder.decode(path, start_frame, ring.write):
+                    return
+            except Exception as e:
+                engine.logger.error("Error decoding %s: %s", path, e)
+            start_frame = 0
+        ring.close()
+
+
+class OrphismPlaybackEngine(QObject):
+    """
+    Gapless playback of a queue of audio files.
+
+    A decoder thread converts the queue into one continuous PCM stream in a
+    bounded ring buffer, running ahead of the sink by the buffer size, so
+    the next track is already decoded when the current one ends. The sink
+    pulls from the buffer without blocking. A timer on the GUI thread maps
+    the play position to tracks and records plays through the database
+    worker.
+    """
+
+    trackStarted = Signal(int)
+    playbackFinished = Signal()
+    stateChanged = Signal(str)
+    _playlistLoaded = Signal(list, int)
+
+    STOPPED, PLAYING, PAUSED = 'stopped', 'playing', 'paused'
+    PROGRESS_INTERVAL_MS = 50
+
+    def __init__(self, db_worker=None, sink=None, decoders=None,
+                 buffer_seconds=DEFAULT_BUFFER_SECONDS, parent=None):
+        """
+        Initialize the engine.
+
+        Args:
+            db_worker: OrphismDBWorker for loading playlists and recording
+                plays; without it nothing is recorded
+            sink: Audio sink, defaults to create_audio_sink()
+            decoders (list): Track decoders, defaults to create_track_decoders()
+            buffer_seconds (float): Size of the decoded audio buffer
+            parent: Parent QObject
+        """
+        super().__init__(parent)
+        self.db_worker = db_worker
+        self.sink = sink or create_audio_sink()
+        self.decoders = decoders or create_track_decoders()
+        self.ring = OrphismRingBuffer(int(buffer_seconds * BYTES_PER_SECOND))
+        self.logger = get_logger('OrphismPlaybackEngine')
+        self.queue = []
+        self.state = self.STOPPED
+        self.current_index = None
+
+        self._thread = None
+        self._boundaries = []
+        self._boundaries_lock = threading.Lock()
+        self._current_start = 0
+        self._paused_since = 0
+        self._counted = False
+
+        self._progress_timer = QTimer(self)
+        self._progress_timer.setInterval(self.PROGRESS_INTERVAL_MS)
+        self._progress_timer.timeout.connect(self._onProgress)
+        self._playlistLoaded.connect(self.play)
+
+    # Queue
+
+    def play(self, entries, index=0):
+        """
+        Replace the queue and start playing.
+
+        Args:
+            entries (list): (audio_id, filepath) pairs
+            index (int): Entry to start with
+        """
+        # Settle the outgoing track while current_index still refers to the old queue
+        self._finishCurrent(completed=False)
+        # The decoder indexes self.queue; let it go before the list changes
+        self._stopDecoder()
+        self.current_index = None
+        self.queue = list(entries)
+        if not self.queue:
+            self.stop()
+            return
+        self._setState(self.PLAYING)
+        self._restart(index, 0)
+
+    def play_playlist(self, playlist_id, index=0):
+        """
+        Load a playlist from playlist_items on the database worker and play it.
+
+        Returns:
+            Future: Resolves to the loaded tracks
+        """
+        return self._loadAndPlay(lambda db: db.get_playlist_tracks(playlist_id), index)
+
+    def play_audio_ids(self, audio_ids, index=0):
+        """
+        Look up file paths on the database worker and play the files in order.
+
+        Returns:
+            Future: Resolves to the loaded tracks
+        """
+        audio_ids = list(audio_ids)
+        return self._loadAndPlay(
+            lambda db: db.get_audio_files_by_id(audio_ids, ('id', 'filepath')), index
+        )
+
+    def _loadAndPlay(self, load, index):
+        future = self.db_worker.submit(load)
+        # Emitted from the worker thread, delivered on the engine's thread
+        future.add_done_callback(lambda f: self._playlistLoaded.emit(
+            [] if f.exception() else [tuple(track) for track in f.result()], index
+        ))
+        return future
+
+    # Transport
+
+    def pause(self):
+        if self.state == self.PLAYING:
+            self.sink.suspend()
+            self._paused_since = time.monotonic()
+            self._setState(self.PAUSED)
+
+    def resume(self):
+        if self.state == self.PAUSED:
+            self.sink.resume()
+            # Time spent paused does not count towards a play
+            self._current_start += time.monotonic() - self._paused_since
+            self._setState(self.PLAYING)
+
+    def stop(self):
+        self._finishCurrent(completed=False)
+        self._progress_timer.stop()
+        self._stopDecoder()
+        self.sink.stop()
+        self.current_index = None
+        self._setState(self.STOPPED)
+
+    def next(self):
+        if self.current_index is not None and self.current_index + 1 < len(self.queue):
+            self.jump(self.current_index + 1)
+
+    def previous(self):
+        if self.current_index:
+            self.jump(self.current_index - 1)
+
+    def jump(self, index):
+        """Play another queue entry; instant when it is already decoded"""
+        self._finishCurrent(completed=False)
+        boundary = self._boundary(index)
+        if boundary is None or boundary[2] or not self.ring.seek(boundary[0]):
+            self._restart(index, 0)
+        else:
+            self._startTrack(index)
+
+    def seek(self, seconds):
+        """
+        Seek within the current track.
+
+        Positions inside the buffered window only move the read position;
+        others restart decoding at the target.
+
+        Args:
+            seconds (float): Position from the start of the track
+        """
+        if self.current_index is None:
+            return
+        frame = int(seconds * OUTPUT_SAMPLE_RATE)
+        stream_start, _, offset = self._boundary(self.current_index)
+        if not self.ring.seek(stream_start - offset + frame * FRAME_BYTES):
+            self._restart(self.current_index, frame)
+
+    def position(self):
+        """
+        Returns:
+            float: Seconds played of the current track
+        """
+        if self.current_index is None:
+            return 0.0
+        stream_start, _, offset = self._boundary(self.current_index)
+        return (self.ring.read_position - stream_start + offset) / BYTES_PER_SECOND
+
+    # Internals
+
+    def _setState(self, state):
+        if state != self.state:
+            self.state = state
+            self.stateChanged.emit(state)
+
+    def _addBoundary(self, stream_position, index, offset):
+        """Called by the decoder thread before the first byte of a track"""
+        with self._boundaries_lock:
+            self._boundaries.append((stream_position, index, offset))
+
+    def _boundary(self, index):
+        with self._boundaries_lock:
+            for boundary in self._boundaries:
+                if boundary[1] == index:
+                    return boundary
+        return None
+
+    def _stopDecoder(self):
+        if self._thread is not None:
+            self.ring.cancel()
+            self._thread.wait()
+            self._thread = None
+
+    def _restart(self, index, start_frame):
+        self._stopDecoder()
+        self.sink.stop()
+        self.ring.reset()
+        with self._boundaries_lock:
+            self._boundaries = []
+        self.current_index = None
+        self._thread = _DecodeThread(self, index, start_frame)
+        self._thread.start()
+        self.sink.start(self.ring)
+        if self.state == self.PAUSED:
+            self.sink.suspend()
+        self._progress_timer.start()
+
+    def _onProgress(self):
+        """Map the play position to the queue and report track changes"""
+        position = self.ring.read_position
+        with self._boundaries_lock:
+            # Boundaries are recorded in play order
+            passed = [index for stream_position, index, _ in self._boundaries
+                      if stream_position <= position]
+        if self.ring.available():
+            self.sink.notify()
+
+        if passed and passed[-1] != self.current_index:
+            # Playing on; a fast sink may cross several tracks per tick
+            if self.current_index in passed:
+                passed = passed[passed.index(self.current_index) + 1:]
+            for index in passed:
+                self._finishCurrent(completed=True)
+                self._startTrack(index)
+
+        if self.ring.finished():
+            self._finishCurrent(completed=True)
+            self._progress_timer.stop()
+            self.sink.stop()
+            self._stopDecoder()
+            self.current_index = None
+            self._setState(self.STOPPED)
+            self.playbackFinished.emit()
+
+    def _startTrack(self, index):
+        self.current_index = index
+        self._current_start = self._paused_since = time.monotonic()
+        self._counted = False
+        self.trackStarted.emit(self.queue[index][0])
+
+    def _finishCurrent(self, completed):
+        """Record a play for the current track if it finished or was heard long enough"""
+        if self.current_index is None or self._counted:
+            return
+        # Listening time; a paused track stopped counting when it was paused
+        end = self._paused_since if self.state == self.PAUSED else time.monotonic()
+        heard = end - self._current_start
+        if completed or heard >= PLAY_COUNT_THRESHOLD_SECONDS:
+            self._counted = True
+            audio_id = self.queue[self.current_index][0]
+            if self.db_worker is not None and audio_id is not None:
+                self.db_worker.submit(lambda db: db.record_play(audio_id))
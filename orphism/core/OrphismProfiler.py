@@ -0,0 +1,287 @@
+import cProfile
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+from orphism.core.OrphismQueryStats import OrphismQueryStats, format_summary
+
+# Environment switch turning instrumentation on at start-up
+PROFILE_ENV = 'AUDIODB_PROFILE'
+
+# Spans kept for the trace export and the live overlay
+MAX_EVENTS = 20000
+
+# Event loop stalls kept with the GUI thread's stack
+MAX_STALLS = 100
+
+# Allocation sites listed in an export
+TRACEMALLOC_TOP = 50
+
+
+class _NullSpan:
+    """Span used while instrumentation is off; costs one attribute check"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.record(self.name, (time.perf_counter() - self.start) * 1000, self.start)
+        return False
+
+
+class OrphismProfiler:
+    """
+    Opt-in timing of database calls, view refreshes, imports and the event
+    loop.
+
+    Spans are aggregated per name like statements in OrphismQueryStats and
+    also kept in a bounded log of recent events, exported in Chrome trace
+    format for chrome://tracing or Perfetto. A cProfile and tracemalloc
+    capture can run next to it; cProfile only sees the thread that started
+    the capture, normally the GUI thread.
+
+    Usage:
+        with get_profiler().span("view.refresh"):
+            ...
+    """
+
+    def __init__(self, max_events=MAX_EVENTS):
+        """
+        Initialize a disabled profiler.
+
+        Args:
+            max_events (int): Recent spans kept for export and the overlay
+        """
+        self.enabled = False
+        self.spans = OrphismQueryStats(slow_threshold_ms=None, explain=False)
+        self.events = deque(maxlen=max_events)
+        self.stalls = deque(maxlen=MAX_STALLS)
+        self.capturing = False
+        self._profile = None
+        self._snapshot = None
+        self._tracemalloc_started = False
+        self._origin = time.perf_counter()
+
+    def enable(self):
+        """Start recording spans"""
+        self.enabled = True
+
+    def disable(self):
+        """Stop recording spans; collected data is kept for export"""
+        self.enabled = False
+
+    def reset(self):
+        """Drop collected spans and stalls"""
+        self.spans.reset()
+        self.events.clear()
+        self.stalls.clear()
+
+    def span(self, name):
+        """
+        Time a block of code.
+
+        Args:
+            name (str): Span name, e.g. 'db.query' or 'view.refresh'
+
+        Returns:
+            Context manager recording the elapsed time on exit
+        """
+        return _Span(self, name) if self.enabled else _NULL_SPAN
+
+    def record(self, name, elapsed_ms, start=None):
+        """
+        Record a span timed elsewhere.
+
+        Args:
+            name (str): Span name
+            elapsed_ms (float): Duration
+            start (float): time.perf_counter() at the start, for the trace
+        """
+        if not self.enabled:
+            return
+        self.spans.record(name, elapsed_ms, 0)
+        if start is None:
+            start = time.perf_counter() - elapsed_ms / 1000
+        # deque.append is atomic, spans arrive from several threads
+        self.events.append((name, start, elapsed_ms, threading.get_ident()))
+
+    def record_stall(self, elapsed_ms, stack):
+        """
+        Record a period in which the event loop did not run.
+
+        Args:
+            elapsed_ms (float): How long the GUI thread was blocked
+            stack (list): GUI thread stack seen while it was blocked
+        """
+        self.stalls.append({
+            'time': time.time(),
+            'elapsed_ms': round(elapsed_ms, 3),
+            'stack': stack,
+        })
+
+    def recent(self, name, seconds):
+        """
+        Get durations of recent spans.
+
+        Args:
+            name (str): Span name
+            seconds (float): How far back to look
+
+        Returns:
+            list: Durations in ms, oldest first
+        """
+        since = time.perf_counter() - seconds
+        return [elapsed_ms for span_name, start, elapsed_ms, _ in list(self.events)
+                if span_name == name and start >= since]
+
+    # Capture
+
+    def start_capture(self):
+        """Start cProfile on the calling thread and tracemalloc"""
+        if self.capturing:
+            return
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracemalloc_started = True
+        self.capturing = True
+
+    def stop_capture(self):
+        """
+        Stop the capture started by start_capture; its results are kept
+        for export until the next capture
+
+        Returns:
+            pstats-compatible cProfile.Profile, or None if not capturing
+        """
+        if not self.capturing:
+            return None
+        self._profile.disable()
+        self._snapshot = tracemalloc.take_snapshot()
+        if self._tracemalloc_started:
+            tracemalloc.stop()
+            self._tracemalloc_started = False
+        self.capturing = False
+        return self._profile
+
+    def _allocations(self):
+        snapshot = tracemalloc.take_snapshot() if self.capturing else self._snapshot
+        if snapshot is None:
+            return []
+        return [
+            {'site': str(stat.traceback), 'size': stat.size, 'count': stat.count}
+            for stat in snapshot.statistics('lineno')[:TRACEMALLOC_TOP]
+        ]
+
+    # Export
+
+    def summary(self):
+        """
+        Returns:
+            dict: Span aggregates, event loop stalls, memory and allocations
+        """
+        spans = self.spans.summary()
+        return {
+            'histogram_bounds_ms': spans['histogram_bounds_ms'],
+            'spans': spans['statements'],
+            'stalls': list(self.stalls),
+            'memory_bytes': memory_usage(),
+            'allocations': self._allocations(),
+        }
+
+    def export(self, path):
+        """
+        Write collected data for offline analysis.
+
+        path gets the summary and the recent spans as Chrome trace events,
+        path with .txt appended a plain-text report, and, if a cProfile
+        capture ran, path with .prof appended the profile for pstats or
+        snakeviz.
+
+        Args:
+            path (str): JSON output file
+
+        Returns:
+            list: Files written
+        """
+        pid = os.getpid()
+        trace = [
+            {
+                'name': name, 'cat': name.split('.')[0], 'ph': 'X', 'pid': pid, 'tid': thread,
+                'ts': round((start - self._origin) * 1e6), 'dur': round(elapsed_ms * 1000),
+            }
+            for name, start, elapsed_ms, thread in list(self.events)
+        ]
+        summary = self.summary()
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(dict(summary, traceEvents=trace, displayTimeUnit='ms'), f, indent=1)
+        written = [path]
+
+        report = format_summary({
+            'statements': summary['spans'], 'slow_queries': [], 'slow_threshold_ms': None
+        }).replace('statement', 'span', 1)
+        for stall in summary['stalls']:
+            report += f"\n\nEvent loop stalled {stall['elapsed_ms']:.0f} ms in:\n" + "".join(stall['stack'])
+        with open(path + '.txt', 'w', encoding='utf-8') as f:
+            f.write(report + "\n")
+        written.append(path + '.txt')
+
+        if self._profile is not None and not self.capturing:
+            self._profile.dump_stats(path + '.prof')
+            written.append(path + '.prof')
+        return written
+
+
+def memory_usage():
+    """
+    Returns:
+        int: Resident memory of the process in bytes, or None if unknown
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource
+        # Peak rather than current usage; KiB on Linux, bytes on macOS
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    except (ImportError, OSError):
+        return None
+
+
+_profiler = OrphismProfiler()
+if os.environ.get(PROFILE_ENV):
+    _profiler.enable()
+
+
+def get_profiler():
+    """
+    Returns:
+        OrphismProfiler: Process-wide profiler, enabled by $AUDIODB_PROFILE
+            or from the client's View menu
+    """
+    return _profiler
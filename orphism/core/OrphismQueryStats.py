@@ -0,0 +1,231 @@
+import bisect
+import json
+import os
+import threading
+from collections import deque
+
+# Upper bounds of the latency histogram buckets in milliseconds
+HISTOGRAM_BOUNDS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+# Environment switches for collecting statistics from a running client
+QUERY_STATS_ENV = 'AUDIODB_QUERY_STATS'
+SLOW_QUERY_ENV = 'AUDIODB_SLOW_QUERY_MS'
+DEFAULT_SLOW_QUERY_MS = 100
+
+
+class _StatementStats:
+    """Aggregated timings of one statement shape"""
+
+    __slots__ = ('count', 'total_ms', 'max_ms', 'rows', 'histogram', 'plan')
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.histogram = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+        self.plan = None
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'total_ms': round(self.total_ms, 3),
+            'avg_ms': round(self.total_ms / self.count, 3) if self.count else 0.0,
+            'max_ms': round(self.max_ms, 3),
+            'rows': self.rows,
+            'histogram': self.histogram,
+            'plan': self.plan,
+        }
+
+
+class OrphismQueryStats:
+    """
+    Collects per-statement timings for an AudioDBSqlite connection.
+
+    Statements are grouped by their SQL text with whitespace collapsed, so
+    every call of a parameterized query lands in the same entry. Statements
+    slower than the threshold are kept in a bounded slow-query log together
+    with their EXPLAIN QUERY PLAN output.
+    """
+
+    def __init__(self, slow_threshold_ms=DEFAULT_SLOW_QUERY_MS, explain=True, max_slow_queries=100):
+        """
+        Initialize the collector.
+
+        Args:
+            slow_threshold_ms (float): Statements taking longer are logged as
+                slow; None disables the slow-query log
+            explain (bool): Capture the query plan of slow statements
+            max_slow_queries (int): Number of slow statements to keep
+        """
+        self.slow_threshold_ms = slow_threshold_ms
+        self.explain = explain
+        self.slow_queries = deque(maxlen=max_slow_queries)
+        self._statements = {}
+        self._keys = {}
+        self._lock = threading.Lock()
+
+    def key(self, query):
+        """
+        Returns:
+            str: Normalized statement text used to group timings
+        """
+        key = self._keys.get(query)
+        if key is None:
+            key = self._keys[query] = " ".join(query.split())
+        return key
+
+    def is_slow(self, elapsed_ms):
+        return self.slow_threshold_ms is not None and elapsed_ms >= self.slow_threshold_ms
+
+    def needs_plan(self, query):
+        """Only the first slow execution of a statement pays for EXPLAIN"""
+        if not self.explain:
+            return False
+        stats = self._statements.get(self.key(query))
+        return stats is None or stats.plan is None
+
+    def record(self, query, elapsed_ms, rows, parameters=None, plan=None):
+        """
+        Record one execution.
+
+        Args:
+            query (str): SQL text
+            elapsed_ms (float): Execution time including fetching
+            rows (int): Rows returned or affected
+            parameters: Bound parameters, kept for slow statements only
+            plan (list): EXPLAIN QUERY PLAN lines, if captured
+        """
+        key = self.key(query)
+        with self._lock:
+            stats = self._statements.get(key)
+            if stats is None:
+                stats = self._statements[key] = _StatementStats()
+            stats.count += 1
+            stats.total_ms += elapsed_ms
+            stats.rows += max(rows, 0)
+            if elapsed_ms > stats.max_ms:
+                stats.max_ms = elapsed_ms
+            stats.histogram[bisect.bisect_left(HISTOGRAM_BOUNDS_MS, elapsed_ms)] += 1
+            if plan is not None:
+                stats.plan = plan
+            if self.is_slow(elapsed_ms):
+                self.slow_queries.append({
+                    'query': key,
+                    'elapsed_ms': round(elapsed_ms, 3),
+                    'rows': rows,
+                    'parameters': repr(parameters)[:200] if parameters else None,
+                })
+
+    def reset(self):
+        """Forget all collected timings"""
+        with self._lock:
+            self._statements.clear()
+            self.slow_queries.clear()
+
+    def summary(self):
+        """
+        Returns:
+            dict: Histogram bounds, statements sorted by total time and the
+                slow-query log
+        """
+        with self._lock:
+            statements = sorted(
+                ((key, stats.to_dict()) for key, stats in self._statements.items()),
+                key=lambda item: item[1]['total_ms'],
+                reverse=True
+            )
+            return {
+                'histogram_bounds_ms': list(HISTOGRAM_BOUNDS_MS),
+                'slow_threshold_ms': self.slow_threshold_ms,
+                'statements': dict(statements),
+                'slow_queries': list(self.slow_queries),
+            }
+
+    def dump(self, path):
+        """
+        Write the summary as JSON.
+
+        Args:
+            path (str): Output file
+        """
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, indent=2)
+
+
+def merge_summaries(summaries):
+    """
+    Combine summaries of several connections or runs.
+
+    Args:
+        summaries (iterable): Dicts returned by OrphismQueryStats.summary
+
+    Returns:
+        dict: A summary in the same format
+    """
+    statements = {}
+    slow_queries = []
+    threshold = None
+    for summary in summaries:
+        threshold = summary.get('slow_threshold_ms', threshold)
+        slow_queries.extend(summary.get('slow_queries', ()))
+        for key, stats in summary.get('statements', {}).items():
+            merged = statements.get(key)
+            if merged is None:
+                statements[key] = dict(stats, histogram=list(stats['histogram']))
+                continue
+            merged['count'] += stats['count']
+            merged['total_ms'] = round(merged['total_ms'] + stats['total_ms'], 3)
+            merged['max_ms'] = max(merged['max_ms'], stats['max_ms'])
+            merged['rows'] += stats['rows']
+            merged['histogram'] = [a + b for a, b in zip(merged['histogram'], stats['histogram'])]
+            merged['plan'] = merged['plan'] or stats['plan']
+    for stats in statements.values():
+        stats['avg_ms'] = round(stats['total_ms'] / stats['count'], 3) if stats['count'] else 0.0
+    return {
+        'histogram_bounds_ms': list(HISTOGRAM_BOUNDS_MS),
+        'slow_threshold_ms': threshold,
+        'statements': dict(sorted(statements.items(), key=lambda item: item[1]['total_ms'], reverse=True)),
+        'slow_queries': sorted(slow_queries, key=lambda item: item['elapsed_ms'], reverse=True),
+    }
+
+
+def format_summary(summary, top=20):
+    """
+    Render a summary as a plain-text report.
+
+    Args:
+        summary (dict): Summary to render
+        top (int): Number of statements to list
+
+    Returns:
+        str: Report text
+    """
+    lines = [f"{'count':>8} {'total ms':>11} {'avg ms':>9} {'max ms':>9} {'rows':>10}  statement"]
+    for key, stats in list(summary['statements'].items())[:top]:
+        lines.append(f"{stats['count']:>8} {stats['total_ms']:>11.2f} {stats['avg_ms']:>9.3f} "
+                     f"{stats['max_ms']:>9.2f} {stats['rows']:>10}  {key[:100]}")
+        if stats.get('plan'):
+            lines.extend(f"{'':>52}plan: {step}" for step in stats['plan'])
+    if summary['slow_queries']:
+        lines.append("")
+        lines.append(f"Slow queries (>= {summary['slow_threshold_ms']} ms):")
+        for entry in summary['slow_queries'][:top]:
+            lines.append(f"{entry['elapsed_ms']:>11.2f} ms {entry['rows']:>8} rows  {entry['query'][:100]}")
+    return "\n".join(lines)
+
+
+def stats_from_environment():
+    """
+    Build a collector when $AUDIODB_QUERY_STATS names a dump directory.
+
+    Returns:
+        OrphismQueryStats: Collector, or None when instrumentation is off
+    """
+    if not os.environ.get(QUERY_STATS_ENV):
+        return None
+    try:
+        threshold = float(os.environ.get(SLOW_QUERY_ENV, DEFAULT_SLOW_QUERY_MS))
+    except ValueError:
+        threshold = DEFAULT_SLOW_QUERY_MS
+    return OrphismQueryStats(slow_threshold_ms=threshold)
@@ -0,0 +1,114 @@
+from functools import partial
+from operator import itemgetter
+
+# Column order of the audio_files table; statements list it explicitly so
+# rows map onto records positionally
+AUDIO_FILE_COLUMNS = (
+    'id', 'filename', 'filepath', 'duration', 'size', 'format', 'bitrate',
+    'sample_rate', 'channels', 'date_added', 'last_played', 'play_count', 'favorite'
+)
+
+# Columns needed by the library views
+AUDIO_FILE_SUMMARY_COLUMNS = ('id', 'filename', 'duration', 'size', 'format')
+
+
+class Record(tuple):
+    """
+    Immutable database row.
+
+    Records are plain tuples underneath, so they cost no more memory than the
+    fetched row. Fields can be read as attributes (audio.filename), by
+    position, or by column name (audio['filename']) like the dicts returned
+    before, and dict(record) still works.
+
+    Only lookups are dict-like: iteration, len() and the in operator follow
+    tuple semantics and see values, not column names; use
+    'filename' in record.keys() to test for a column. Columns named like a
+    tuple or Record method (count, index, get, keys) are read as
+    record.count_ instead, see record_type.
+    """
+
+    __slots__ = ()
+    _fields = ()
+    _index = {}
+
+    def __getitem__(self, key):
+        if key.__class__ is str:
+            try:
+                key = self._index[key]
+            except KeyError:
+                raise KeyError(key) from None
+        return tuple.__getitem__(self, key)
+
+    def get(self, key, default=None):
+        index = self._index.get(key)
+        return default if index is None else tuple.__getitem__(self, index)
+
+    def keys(self):
+        return self._fields
+
+    def _asdict(self):
+        return dict(zip(self._fields, self))
+
+    def __repr__(self):
+        values = ", ".join(f"{name}={value!r}" for name, value in zip(self._fields, self))
+        return f"{type(self).__name__}({values})"
+
+    @classmethod
+    def from_rows(cls, rows):
+        """
+        Build records from fetched tuples in a single pass.
+
+        Args:
+            rows (list): Tuples in the order of cls._fields
+
+        Returns:
+            list: Records
+        """
+        return list(map(cls._new, rows))
+
+
+_record_types = {}
+
+
+def record_type(fields, name="Row"):
+    """
+    Get the record class for a column list.
+
+    Classes are cached per column tuple, so every statement shape creates its
+    class once. A column whose name is taken by a tuple or Record attribute,
+    e.g. SELECT COUNT(*) AS count, gets its attribute with a trailing
+    underscore (row.count_); row['count'] works as for any column.
+
+    Args:
+        fields (tuple): Column names in result order
+        name (str): Class name used in repr
+
+    Returns:
+        type: Record subclass
+    """
+    fields = tuple(fields)
+    cls = _record_types.get(fields)
+    if cls is None:
+        namespace = {
+            '__slots__': (),
+            '_fields': fields,
+            '_index': {field: i for i, field in enumerate(fields)},
+        }
+        for i, field in enumerate(fields):
+            if not field.isidentifier():
+                continue
+            if hasattr(Record, field):
+                # Keep the method; a column actually named field_ takes precedence
+                if field + '_' in fields:
+                    continue
+                field += '_'
+            namespace[field] = property(itemgetter(i))
+        cls = type(name, (Record,), namespace)
+        cls._new = partial(tuple.__new__, cls)
+        _record_types[fields] = cls
+    return cls
+
+
+AudioFile = record_type(AUDIO_FILE_COLUMNS, "AudioFile")
+AudioFileSummary = record_type(AUDIO_FILE_SUMMARY_COLUMNS, "AudioFileSummary")
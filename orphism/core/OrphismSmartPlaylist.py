@@ -0,0 +1,322 @@
+import json
+import math
+import time
+from datetime import datetime, timedelta
+from orphism.core.OrphismRecords import AUDIO_FILE_SUMMARY_COLUMNS
+
+# Smart playlists are stored as JSON rule definitions, for example
+#
+#   {"match": "all",
+#    "rules": [{"field": "favorite", "op": "is", "value": true},
+#              {"field": "last_played", "op": "in_last_days", "value": 30},
+#              {"field": "format", "op": "=", "value": "FLAC"}],
+#    "order_by": "play_count", "order": "DESC", "limit": 100}
+#
+# Rules may nest: {"match": "any", "rules": [...]} is itself a rule.
+
+TEXT, NUMBER, TIMESTAMP, BOOLEAN, TAG = 'text', 'number', 'timestamp', 'boolean', 'tag'
+
+# Fields rules may refer to, mapped to their type
+SMART_PLAYLIST_FIELDS = {
+    'filename': TEXT,
+    'filepath': TEXT,
+    'format': TEXT,
+    'duration': NUMBER,
+    'size': NUMBER,
+    'bitrate': NUMBER,
+    'sample_rate': NUMBER,
+    'channels': NUMBER,
+    'play_count': NUMBER,
+    'date_added': TIMESTAMP,
+    'last_played': TIMESTAMP,
+    'favorite': BOOLEAN,
+    'tag': TAG,
+}
+
+_COMPARISONS = {'=': '=', '!=': '!=', '<': '<', '<=': '<=', '>': '>', '>=': '>='}
+
+_OPERATORS = {
+    TEXT: {'=', '!=', '<', '<=', '>', '>=', 'in', 'contains', 'starts_with', 'is_null', 'not_null'},
+    NUMBER: {'=', '!=', '<', '<=', '>', '>=', 'in', 'between', 'is_null', 'not_null'},
+    TIMESTAMP: {'<', '<=', '>', '>=', 'between', 'in_last_days', 'not_in_last_days',
+                'is_null', 'not_null'},
+    BOOLEAN: {'is'},
+    TAG: {'has', 'has_not'},
+}
+
+# Pseudo-columns versioned next to the real ones: row inserts and deletes,
+# and tag assignments
+ROWS_VERSION = 'rows'
+TAGS_VERSION = 'tags'
+
+# Results of rules relative to the current time are recomputed at least this often
+TIME_RULE_TTL = 60
+
+
+class SmartPlaylistError(ValueError):
+    """Raised for rule definitions that cannot be compiled"""
+
+
+class CompiledPlaylist:
+    """SQL text, parameters and column dependencies of a smart playlist"""
+
+    __slots__ = ('sql', 'parameters', 'dependencies', 'time_sensitive')
+
+    def __init__(self, sql, parameters, dependencies, time_sensitive):
+        self.sql = sql
+        self.parameters = parameters
+        self.dependencies = dependencies
+        self.time_sensitive = time_sensitive
+
+
+def parse_definition(definition):
+    """
+    Accept a definition as dict or JSON text.
+
+    Returns:
+        dict: Parsed definition
+    """
+    if isinstance(definition, str):
+        try:
+            definition = json.loads(definition)
+        except ValueError as e:
+            raise SmartPlaylistError(f"Invalid smart playlist JSON: {e}") from None
+    if not isinstance(definition, dict):
+        raise SmartPlaylistError("A smart playlist definition must be an object")
+    return definition
+
+
+# Python types accepted as rule values per field type; bool is excluded
+# from numbers explicitly since it subclasses int
+_VALUE_TYPES = {
+    TEXT: (str,),
+    NUMBER: (int, float),
+    TIMESTAMP: (str,),
+    BOOLEAN: (bool, int),
+    TAG: (str,),
+}
+
+
+def _check_value(field, field_type, value):
+    """Reject values SQLite would compare by the wrong type or that cannot be bound"""
+    if not isinstance(value, _VALUE_TYPES[field_type]) or (
+            field_type == NUMBER and (isinstance(value, bool) or not math.isfinite(value))):
+        raise SmartPlaylistError(f"Invalid value for {field}: {value!r}")
+    return value
+
+
+def _check_values(field, field_type, value, count=None):
+    if not isinstance(value, (list, tuple)) or (count is not None and len(value) != count):
+        expected = f"a list of {count} values" if count else "a list"
+        raise SmartPlaylistError(f"{field} expects {expected}, got {value!r}")
+    return [_check_value(field, field_type, item) for item in value]
+
+
+class _Compiler:
+    def __init__(self, now):
+        self.now = now
+        self.parameters = []
+        self.dependencies = {ROWS_VERSION}
+        self.time_sensitive = False
+
+    def group(self, node):
+        match = node.get('match', 'all')
+        if match not in ('all', 'any'):
+            raise SmartPlaylistError(f"Unknown match mode: {match}")
+        rules = node.get('rules', [])
+        if not isinstance(rules, list):
+            raise SmartPlaylistError("Rules must be a list")
+        for rule in rules:
+            if not isinstance(rule, dict):
+                raise SmartPlaylistError(f"A rule must be an object, got {rule!r}")
+        if not rules:
+            return "1"
+        clauses = [self.group(rule) if 'rules' in rule else self.rule(rule) for rule in rules]
+        joiner = " AND " if match == 'all' else " OR "
+        return "(" + joiner.join(clauses) + ")"
+
+    def rule(self, rule):
+        field = rule.get('field')
+        op = rule.get('op', '=')
+        value = rule.get('value')
+        field_type = SMART_PLAYLIST_FIELDS.get(field) if isinstance(field, str) else None
+        if field_type is None:
+            raise SmartPlaylistError(f"Unknown field: {field}")
+        if not isinstance(op, str) or op not in _OPERATORS[field_type]:
+            raise SmartPlaylistError(f"Operator {op} cannot be used with {field}")
+
+        if field_type == TAG:
+            self.dependencies.add(TAGS_VERSION)
+            self.parameters.append(_check_value(field, field_type, value))
+            clause = ("EXISTS (SELECT 1 FROM audio_tags at JOIN tags t ON t.id = at.tag_id "
+                      "WHERE at.audio_id = audio_files.id AND t.name = ?)")
+            return clause if op == 'has' else "NOT " + clause
+
+        self.dependencies.add(field)
+        if op == 'is':
+            _check_value(field, field_type, value)
+            return f"{field} = 1" if value else f"{field} = 0"
+        if op == 'is_null':
+            return f"{field} IS NULL"
+        if op == 'not_null':
+            return f"{field} IS NOT NULL"
+        if op in _COMPARISONS:
+            self.parameters.append(_check_value(field, field_type, value))
+            return f"{field} {_COMPARISONS[op]} ?"
+        if op == 'in':
+            values = _check_values(field, field_type, value)
+            if not values:
+                return "0"
+            self.parameters.extend(values)
+            return f"{field} IN ({', '.join('?' * len(values))})"
+        if op == 'between':
+            low, high = _check_values(field, field_type, value, 2)
+            self.parameters.extend((low, high))
+            return f"{field} BETWEEN ? AND ?"
+        if op == 'contains':
+            escaped = _check_value(field, field_type, value).replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            self.parameters.append(f"%{escaped}%")
+            return f"{field} LIKE ? ESCAPE '\\'"
+        if op == 'starts_with':
+            # A range keeps the prefix match usable by an index
+            _check_value(field, field_type, value)
+            self.parameters.extend((value, value + "\uffff"))
+            return f"({field} >= ? AND {field} < ?)"
+        if op in ('in_last_days', 'not_in_last_days'):
+            _check_value(field, NUMBER, value)
+            self.time_sensitive = True
+            try:
+                self.parameters.append(self.now - timedelta(days=value))
+            except (OverflowError, ValueError):
+                raise SmartPlaylistError(f"Invalid number of days for {field}: {value!r}") from None
+            if op == 'in_last_days':
+                return f"{field} >= ?"
+            return f"({field} IS NULL OR {field} < ?)"
+        raise SmartPlaylistError(f"Unsupported operator: {op}")
+
+
+def compile_definition(definition, columns=AUDIO_FILE_SUMMARY_COLUMNS, now=None):
+    """
+    Compile a smart playlist definition into a parameterized query.
+
+    Only whitelisted field names and operators reach the SQL text; every
+    value is bound as a parameter, so the same definition always yields the
+    same statement and comparisons stay sargable for the audio_files indexes.
+
+    Args:
+        definition (dict|str): Rule definition
+        columns (tuple): Columns to select
+        now (datetime): Reference time for relative date rules
+
+    Returns:
+        CompiledPlaylist: Query and the columns its result depends on
+
+    Raises:
+        SmartPlaylistError: If the definition is invalid
+    """
+    definition = parse_definition(definition)
+    compiler = _Compiler(now or datetime.now())
+    where = compiler.group(definition)
+
+    order_by = definition.get('order_by', 'filename')
+    order = str(definition.get('order', 'ASC')).upper()
+    if not isinstance(order_by, str) or SMART_PLAYLIST_FIELDS.get(order_by) in (None, TAG):
+        raise SmartPlaylistError(f"Cannot order by {order_by}")
+    if order not in ('ASC', 'DESC'):
+        raise SmartPlaylistError(f"Unknown order: {order}")
+    compiler.dependencies.add(order_by)
+
+    sql = f"SELECT {', '.join(columns)} FROM audio_files WHERE {where} ORDER BY {order_by} {order}, id {order}"
+    limit = definition.get('limit')
+    if limit is not None:
+        if not isinstance(limit, int) or isinstance(limit, bool) or limit < 0:
+            raise SmartPlaylistError(f"Invalid limit: {limit!r}")
+        sql += " LIMIT ?"
+        compiler.parameters.append(limit)
+
+    compiler.dependencies.update(columns)
+    compiler.dependencies.discard('id')
+    return CompiledPlaylist(sql, tuple(compiler.parameters), frozenset(compiler.dependencies),
+                            compiler.time_sensitive)
+
+
+class OrphismSmartPlaylistCache:
+    """
+    Caches smart playlist results per definition.
+
+    The database keeps a version counter per audio_files column, bumped by
+    triggers only when that column actually changes. A cached result stays
+    valid while the counters of the columns it depends on are unchanged, so
+    checking it costs one read of the small column_versions table.
+    """
+
+    def __init__(self, db, columns=AUDIO_FILE_SUMMARY_COLUMNS, max_entries=32):
+        """
+        Initialize the cache.
+
+        Args:
+            db: AudioDBSqlite instance used for reads
+            columns (tuple): Columns selected for every playlist
+            max_entries (int): Number of definitions to keep results for
+        """
+        self.db = db
+        self.columns = columns
+        self.max_entries = max_entries
+        self._entries = {}
+
+    def get(self, definition):
+        """
+        Get the tracks of a smart playlist, running the query only when the
+        underlying columns changed.
+
+        Args:
+            definition (dict|str): Rule definition
+
+        Returns:
+            list: Records; the same list object as before while unchanged
+        """
+        definition = parse_definition(definition)
+        key = json.dumps(definition, sort_keys=True)
+        versions = self.db.get_column_versions()
+        entry = self._entries.get(key)
+
+        if entry is not None:
+            compiled, snapshot, computed_at, results = entry
+            expired = compiled.time_sensitive and time.monotonic() - computed_at > TIME_RULE_TTL
+            if not expired and snapshot == self._snapshot(compiled, versions):
+                # Refresh recency so frequently shown playlists stay cached
+                self._entries[key] = self._entries.pop(key)
+                return results
+
+        compiled = compile_definition(definition, self.columns)
+        results = self.db.get_smart_playlist_tracks(compiled, self.columns)
+        self._entries.pop(key, None)
+        self._entries[key] = (compiled, self._snapshot(compiled, versions), time.monotonic(), results)
+        while len(self._entries) > self.max_entries:
+            del self._entries[next(iter(self._entries))]
+        return results
+
+    def clear(self):
+        """Drop all cached results"""
+        self._entries.clear()
+
+    @staticmethod
+    def _snapshot(compiled, versions):
+        return tuple(versions.get(column, 0) for column in sorted(compiled.dependencies))
+
+
+# Built-in playlists behind the Favorites and Recent tabs
+FAVORITES_DEFINITION = {
+    'match': 'all',
+    'rules': [{'field': 'favorite', 'op': 'is', 'value': True}],
+    'order_by': 'play_count',
+    'order': 'DESC',
+}
+
+RECENT_DEFINITION = {
+    'match': 'all',
+    'rules': [{'field': 'last_played', 'op': 'in_last_days', 'value': 30}],
+    'order_by': 'last_played',
+    'order': 'DESC',
+    'limit': 500,
+}
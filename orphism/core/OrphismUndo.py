@@ -0,0 +1,423 @@
+import os
+import sqlite3
+import threading
+from collections import deque
+from datetime import datetime
+from orphism.core.OrphismDB import UPDATABLE_COLUMNS
+from orphism.core.OrphismLogging import get_logger
+
+# Rows kept across all undo and redo entries, and the number of entries;
+# the oldest entries are dropped first
+UNDO_HISTORY_ENV = 'AUDIODB_UNDO_HISTORY'
+DEFAULT_HISTORY_ROWS = 200000
+DEFAULT_HISTORY_ENTRIES = 100
+
+# IDs per IN (...) list when reading rows before a change
+_CHUNK = 500
+
+
+def _chunks(items):
+    for start in range(0, len(items), _CHUNK):
+        yield items[start:start + _CHUNK]
+
+
+class _Entry:
+    """
+    One undoable change: the operations that apply it and the ones that
+    revert it. Operations are tuples:
+
+        ('set', table, columns, values, key_column, keys)
+            one UPDATE with the same values for every key
+        ('insert', table, columns, rows)
+        ('delete', table, key_columns, rows)
+    """
+    __slots__ = ('label', 'forward', 'inverse', 'size')
+
+    def __init__(self, label, forward, inverse):
+        self.label = label
+        self.forward = forward
+        self.inverse = inverse
+        # Both directions touch the same rows; count each of them once
+        self.size = max(sum(len(op[-1]) for op in forward), sum(len(op[-1]) for op in inverse))
+
+
+class OrphismUndoJournal:
+    """
+    Undo/redo history of library edits.
+
+    Edits go through the journal's bulk methods, which read only what is
+    needed to revert them: the old values of the updated columns, grouped
+    by value, or the rows about to be deleted. Nothing extra is written to
+    the database. Applying, undoing and redoing an entry are one
+    transaction each.
+
+    Every method taking a db runs on the thread owning that connection,
+    so they can be passed to OrphismDBWorker.submit directly:
+
+        worker.submit(journal.update_audio_files, ids, favorite=1)
+        worker.submit(journal.undo)
+    """
+
+    def __init__(self, max_rows=None, max_entries=DEFAULT_HISTORY_ENTRIES):
+        """
+        Initialize an empty history.
+
+        Args:
+            max_rows (int): Rows kept in the history, defaults to
+                $AUDIODB_UNDO_HISTORY or DEFAULT_HISTORY_ROWS
+            max_entries (int): Entries kept in the history
+        """
+        if max_rows is None:
+            max_rows = int(os.environ.get(UNDO_HISTORY_ENV) or DEFAULT_HISTORY_ROWS)
+        self.max_rows = max_rows
+        self.max_entries = max_entries
+        self.logger = get_logger('OrphismUndoJournal')
+        self._undo = deque()
+        self._redo = []
+        self._rows = 0
+        self._lock = threading.Lock()
+
+    # History
+
+    def undo_label(self):
+        """
+        Returns:
+            str: Label of the edit undo() would revert, or None
+        """
+        with self._lock:
+            return self._undo[-1].label if self._undo else None
+
+    def redo_label(self):
+        """
+        Returns:
+            str: Label of the edit redo() would apply again, or None
+        """
+        with self._lock:
+            return self._redo[-1].label if self._redo else None
+
+    def size(self):
+        """
+        Returns:
+            int: Rows held by the history
+        """
+        return self._rows
+
+    def clear(self):
+        """Forget all edits"""
+        with self._lock:
+            self._undo.clear()
+            self._redo.clear()
+            self._rows = 0
+
+    def undo(self, db):
+        """
+        Revert the latest edit.
+
+        Returns:
+            str: Label of the reverted edit, or None if nothing was reverted
+        """
+        return self._replay(db, self._undo, self._redo, 'inverse')
+
+    def redo(self, db):
+        """
+        Apply the latest reverted edit again.
+
+        Returns:
+            str: Label of the edit, or None if nothing was applied
+        """
+        return self._replay(db, self._redo, self._undo, 'forward')
+
+    def _replay(self, db, source, target, direction):
+        with self._lock:
+            if not source:
+                return None
+            entry = source.pop()
+        if not self._apply(db, getattr(entry, direction)):
+            with self._lock:
+                source.append(entry)
+            return None
+        with self._lock:
+            target.append(entry)
+        self.logger.info("%s: %s", "Undid" if direction == 'inverse' else "Redid", entry.label)
+        return entry.label
+
+    def _record(self, db, label, forward, inverse):
+        """Apply a new edit and keep it for undo"""
+        if not forward:
+            return True
+        if not self._apply(db, forward):
+            return False
+        entry = _Entry(label, forward, inverse)
+        with self._lock:
+            self._rows -= sum(old.size for old in self._redo)
+            self._redo.clear()
+            self._undo.append(entry)
+            self._rows += entry.size
+            while self._undo and (self._rows > self.max_rows or len(self._undo) > self.max_entries):
+                dropped = self._undo.popleft()
+                self._rows -= dropped.size
+                if dropped is entry:
+                    self.logger.warning("%s changed %d rows, too many to undo", label, entry.size)
+        return True
+
+    # Applying operations
+
+    def _apply(self, db, operations):
+        if not db.connection and not db.connect():
+            return False
+        try:
+            for operation in operations:
+                kind, table = operation[:2]
+                if kind == 'set':
+                    _, _, columns, values, key_column, keys = operation
+                    set_clause = ", ".join(f"{column} = ?" for column in columns)
+                    # IN lists run the triggers of many rows per statement
+                    for chunk in _chunks(keys):
+                        db._execute(f"UPDATE {table} SET {set_clause} "
+                                    f"WHERE {key_column} IN ({', '.join('?' * len(chunk))})",
+                                    values + tuple(chunk))
+                elif kind == 'insert':
+                    _, _, columns, rows = operation
+                    db._executemany(f"INSERT OR IGNORE INTO {table} ({', '.join(columns)}) "
+                                    f"VALUES ({', '.join('?' * len(columns))})", rows)
+                else:
+                    _, _, key_columns, rows = operation
+                    where = " AND ".join(f"{column} = ?" for column in key_columns)
+                    db._executemany(f"DELETE FROM {table} WHERE {where}", rows)
+            db.connection.commit()
+            return True
+        except sqlite3.Error as e:
+            db.connection.rollback()
+            self.logger.error("Error applying library edit: %s", e)
+            return False
+
+    def _select_in(self, db, query, ids, parameters=()):
+        """Run query, whose last placeholder is an IN list, for all ids"""
+        rows = []
+        for chunk in _chunks(ids):
+            rows += db._fetchall(query.format(', '.join('?' * len(chunk))), parameters + tuple(chunk))
+        return rows
+
+    def _snapshot(self, db, table, key_column, ids, where="", parameters=()):
+        """Full rows of table whose key_column is in ids, with their column names"""
+        query = f"SELECT * FROM {table} WHERE {where}{key_column} IN ({{}})"
+        rows = self._select_in(db, query, ids, parameters)
+        columns = tuple(description[0] for description in db.cursor.description) if rows else ()
+        return columns, rows
+
+    # Edits
+
+    def update_audio_files(self, db, file_ids, label=None, **kwargs):
+        """
+        Set the same values on many audio files.
+
+        Args:
+            db (AudioDBSqlite): Connection of the calling thread
+            file_ids (list): IDs of the audio files
+            label (str): Description shown in the Edit menu
+            **kwargs: Columns to set
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        if not kwargs:
+            return False
+        columns = tuple(sorted(kwargs))
+        unknown = set(columns) - UPDATABLE_COLUMNS
+        if unknown:
+            self.logger.error("Cannot update column: %s", ', '.join(sorted(unknown)))
+            return False
+        if not db.connection and not db.connect():
+            return False
+
+        file_ids = list(file_ids)
+        try:
+            rows = self._select_in(db, f"SELECT {', '.join(columns)}, id FROM audio_files WHERE id IN ({{}})",
+                                   file_ids)
+        except sqlite3.Error as e:
+            self.logger.error("Error reading audio files before update: %s", e)
+            return False
+        if not rows:
+            return True
+
+        # Old values grouped by value: a bulk edit of a column with few
+        # distinct values reverts with a handful of statements
+        old_values = {}
+        for row in rows:
+            old_values.setdefault(row[:-1], []).append(row[-1])
+        values = tuple(kwargs[column] for column in columns)
+        forward = [('set', 'audio_files', columns, values, 'id', [row[-1] for row in rows])]
+        inverse = [('set', 'audio_files', columns, old, 'id', ids) for old, ids in old_values.items()]
+        label = label or f"Edit {len(rows)} tracks"
+        return self._record(db, label, forward, inverse)
+
+    def update_audio_file(self, db, file_id, **kwargs):
+        """Undoable AudioDBSqlite.update_audio_file"""
+        return self.update_audio_files(db, [file_id], **kwargs)
+
+    def delete_audio_files(self, db, file_ids, label=None):
+        """
+        Delete audio files with their playlist entries and tags.
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        if not db.connection and not db.connect():
+            return False
+
+        file_ids = list(file_ids)
+        try:
+            # Rows removed by ON DELETE CASCADE are restored after their track
+            inverse = []
+            for table, key_column in (('audio_files', 'id'), ('playlist_items', 'audio_id'),
+                                      ('audio_tags', 'audio_id')):
+                columns, rows = self._snapshot(db, table, key_column, file_ids)
+                if rows:
+                    inverse.append(('insert', table, columns, rows))
+        except sqlite3.Error as e:
+            self.logger.error("Error reading audio files before delete: %s", e)
+            return False
+
+        if not inverse:
+            return True
+        id_index = inverse[0][2].index('id')
+        deleted = [(row[id_index],) for row in inverse[0][3]]
+        forward = [('delete', 'audio_files', ('id',), deleted)]
+        return self._record(db, label or f"Delete {len(deleted)} tracks", forward, inverse)
+
+    def delete_audio_file(self, db, file_id):
+        """Undoable AudioDBSqlite.delete_audio_file"""
+        return self.delete_audio_files(db, [file_id])
+
+    def add_to_playlist(self, db, playlist_id, audio_ids, label=None):
+        """
+        Append audio files to a playlist, skipping ones already in it.
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        if not db.connection and not db.connect():
+            return False
+
+        try:
+            playlist = db._fetchone(
+                "SELECT name, last_modified, (SELECT COALESCE(MAX(position), 0) FROM playlist_items "
+                "WHERE playlist_id = ?) FROM playlists WHERE id = ?", (playlist_id, playlist_id)
+            )
+            if playlist is None:
+                self.logger.error("No playlist with ID %s", playlist_id)
+                return False
+            name, last_modified, position = playlist
+            present = {row[0] for row in self._select_in(
+                db, "SELECT audio_id FROM playlist_items WHERE playlist_id = ? AND audio_id IN ({})",
+                list(audio_ids), (playlist_id,)
+            )}
+        except sqlite3.Error as e:
+            self.logger.error("Error reading playlist ID %s: %s", playlist_id, e)
+            return False
+
+        now = datetime.now()
+        rows = []
+        for audio_id in audio_ids:
+            if audio_id not in present:
+                present.add(audio_id)
+                position += 1
+                rows.append((playlist_id, audio_id, position, now))
+        if not rows:
+            return True
+        forward = [
+            ('insert', 'playlist_items', ('playlist_id', 'audio_id', 'position', 'date_added'), rows),
+            ('set', 'playlists', ('last_modified',), (now,), 'id', [playlist_id]),
+        ]
+        inverse = [
+            ('delete', 'playlist_items', ('playlist_id', 'audio_id'), [row[:2] for row in rows]),
+            ('set', 'playlists', ('last_modified',), (last_modified,), 'id', [playlist_id]),
+        ]
+        return self._record(db, label or f"Add {len(rows)} tracks to {name}", forward, inverse)
+
+    def remove_from_playlist(self, db, playlist_id, audio_ids, label=None):
+        """
+        Remove audio files from a playlist.
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        if not db.connection and not db.connect():
+            return False
+
+        try:
+            columns, rows = self._snapshot(db, 'playlist_items', 'audio_id', list(audio_ids),
+                                           "playlist_id = ? AND ", (playlist_id,))
+        except sqlite3.Error as e:
+            self.logger.error("Error reading playlist ID %s: %s", playlist_id, e)
+            return False
+
+        if not rows:
+            return True
+        audio_index = columns.index('audio_id')
+        forward = [('delete', 'playlist_items', ('playlist_id', 'audio_id'),
+                    [(playlist_id, row[audio_index]) for row in rows])]
+        inverse = [('insert', 'playlist_items', columns, rows)]
+        return self._record(db, label or f"Remove {len(rows)} tracks from playlist", forward, inverse)
+
+    def _tag_id(self, db, name, create):
+        if create:
+            db._execute("INSERT OR IGNORE INTO tags (name) VALUES (?)", (name,))
+        row = db._fetchone("SELECT id FROM tags WHERE name = ?", (name,))
+        return row[0] if row else None
+
+    def add_tag(self, db, audio_ids, name, label=None):
+        """
+        Tag audio files, creating the tag if needed.
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        if not db.connection and not db.connect():
+            return False
+
+        audio_ids = list(audio_ids)
+        try:
+            # The tag itself is kept on undo, only the assignments are journaled
+            tag_id = self._tag_id(db, name, create=True)
+            db.connection.commit()
+            tagged = {row[0] for row in self._select_in(
+                db, "SELECT audio_id FROM audio_tags WHERE tag_id = ? AND audio_id IN ({})",
+                audio_ids, (tag_id,)
+            )}
+        except sqlite3.Error as e:
+            db.connection.rollback()
+            self.logger.error("Error creating tag %s: %s", name, e)
+            return False
+
+        rows = [(audio_id, tag_id) for audio_id in dict.fromkeys(audio_ids) if audio_id not in tagged]
+        forward = [('insert', 'audio_tags', ('audio_id', 'tag_id'), rows)] if rows else []
+        inverse = [('delete', 'audio_tags', ('audio_id', 'tag_id'), rows)]
+        return self._record(db, label or f"Tag {len(rows)} tracks {name}", forward, inverse)
+
+    def remove_tag(self, db, audio_ids, name, label=None):
+        """
+        Remove a tag from audio files.
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        if not db.connection and not db.connect():
+            return False
+
+        audio_ids = list(audio_ids)
+        try:
+            tag_id = self._tag_id(db, name, create=False)
+            if tag_id is None:
+                return True
+            rows = [tuple(row) for row in self._select_in(
+                db, "SELECT audio_id, tag_id FROM audio_tags WHERE tag_id = ? AND audio_id IN ({})",
+                audio_ids, (tag_id,)
+            )]
+        except sqlite3.Error as e:
+            self.logger.error("Error reading tag %s: %s", name, e)
+            return False
+
+        forward = [('delete', 'audio_tags', ('audio_id', 'tag_id'), rows)] if rows else []
+        inverse = [('insert', 'audio_tags', ('audio_id', 'tag_id'), rows)]
+        return self._record(db, label or f"Untag {len(rows)} tracks {name}", forward, inverse)
@@ -0,0 +1,386 @@
+import argparse
+import glob
+import json
+import os
+import sys
+from orphism.core.OrphismConstants import IMPORT_DONE
+from orphism.core.OrphismDB import AudioDBSqlite
+from orphism.core.OrphismImport import OrphismImporter
+from orphism.core.OrphismMaintenance import OrphismMaintenance
+from orphism.core.OrphismLogging import setup_logging
+from orphism.core.OrphismLibrarySet import OrphismLibrarySet, OrphismShard, load_shards, save_shards
+from orphism.core.OrphismQueryStats import merge_summaries, format_summary
+
+# Command line entry point: python -m orphism.orphism_cli <command>
+
+
+def _load_summaries(paths):
+    """Read query statistics dumps from files or dump directories"""
+    summaries = []
+    for path in paths:
+        files = sorted(glob.glob(os.path.join(path, "querystats-*.json"))) if os.path.isdir(path) else [path]
+        for file in files:
+            with open(file, encoding='utf-8') as f:
+                summaries.append(json.load(f))
+    return summaries
+
+
+def _probe_database(db_path, slow_threshold_ms):
+    """Run the read paths used by the client against a database and time them"""
+    db = AudioDBSqlite(db_path)
+    if not db.connect():
+        return None
+    db.enable_query_stats(slow_threshold_ms=slow_threshold_ms)
+    db.get_all_audio_files()
+    db.get_all_audio_files(limit=100, offset=0)
+    db.get_all_audio_files(limit=100, offset=0, order_by="filename", order="ASC")
+    for playlist in db.execute_query("SELECT id FROM playlists LIMIT 10"):
+        db.execute_query(
+            "SELECT audio_id FROM playlist_items WHERE playlist_id = ? ORDER BY position",
+            (playlist['id'],)
+        )
+    summary = db.stats()
+    db.disconnect()
+    return summary
+
+
+def command_stats(args):
+    """Print query statistics collected by clients or measured on a database"""
+    summaries = _load_summaries(args.dumps)
+    if args.db:
+        summary = _probe_database(args.db, args.threshold)
+        if summary is None:
+            print(f"Cannot open database: {args.db}", file=sys.stderr)
+            return 1
+        summaries.append(summary)
+    if not summaries:
+        print("No query statistics found; pass dump files or --db", file=sys.stderr)
+        return 1
+
+    summary = merge_summaries(summaries)
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print(format_summary(summary, top=args.top))
+    return 0
+
+
+def command_rebuild_stats(args):
+    """Recompute the materialized library statistics"""
+    db = AudioDBSqlite(args.db)
+    if not db.initialize_database():
+        print(f"Cannot open database: {args.db}", file=sys.stderr)
+        return 1
+    ok = db.rebuild_library_stats()
+    stats = db.get_library_stats()
+    db.disconnect()
+    if not ok:
+        return 1
+    print(f"{stats.track_count} tracks, {stats.total_duration:.0f}s, {stats.total_size} bytes, "
+          f"{stats.favorite_count} favorites, {stats.played_count} played")
+    return 0
+
+
+def command_smart_playlists(args):
+    """List smart playlists or add one from a JSON rule definition"""
+    db = AudioDBSqlite(args.db)
+    if not db.initialize_database():
+        print(f"Cannot open database: {args.db}", file=sys.stderr)
+        return 1
+    try:
+        if args.add:
+            name, definition = args.add
+            playlist_id = db.create_smart_playlist(name, definition)
+            if playlist_id is None:
+                return 1
+            print(f"Created smart playlist {playlist_id}: {name}")
+        else:
+            for playlist in db.get_smart_playlists():
+                print(f"{playlist.id:>5}  {playlist.name}  {playlist.definition}")
+        return 0
+    finally:
+        db.disconnect()
+
+
+def command_libraries(args):
+    """Manage the library shards and show the federated library"""
+    shards = load_shards(args.registry)
+    if args.add:
+        name, root = args.add
+        if any(shard.name == name for shard in shards):
+            print(f"Library shard already exists: {name}", file=sys.stderr)
+            return 1
+        shards.append(OrphismShard(name, root, args.db))
+        save_shards(shards, args.registry)
+    elif args.remove:
+        remaining = [shard for shard in shards if shard.name != args.remove]
+        if len(remaining) == len(shards):
+            print(f"No such library shard: {args.remove}", file=sys.stderr)
+            return 1
+        # The shard's database file is kept
+        save_shards(remaining, args.registry)
+        return 0
+    if not shards:
+        print("No library shards registered; add one with --add NAME ROOT", file=sys.stderr)
+        return 1
+
+    library = OrphismLibrarySet(shards)
+    if not library.open(start_workers=False):
+        return 1
+    try:
+        for shard, stats in library.get_shard_stats():
+            print(f"{shard.name:<16} {stats.track_count:>9} tracks  {shard.root}  ({shard.db_path})")
+        total = library.get_library_stats()
+        print(f"{'total':<16} {total.track_count:>9} tracks, {total.total_duration:.0f}s, "
+              f"{total.total_size} bytes")
+        if args.tracks:
+            print()
+            for audio in library.get_all_audio_files(limit=args.tracks, order_by=args.order_by,
+                                                     order=args.order, columns=('id', 'filename')):
+                print(f"{shards[audio.shard].name:<16} {audio.id:>9}  {audio.filename}")
+        return 0
+    finally:
+        library.close()
+
+
+def _print_backup_progress(done, total):
+    print(f"\r{done}/{total} pages", end="", file=sys.stderr, flush=True)
+
+
+def command_backup(args):
+    """Copy the library while it may be in use"""
+    maintenance = OrphismMaintenance(args.db, backup_dir=args.dir, keep_backups=args.keep)
+    progress = _print_backup_progress if sys.stderr.isatty() else None
+    if args.destination:
+        path = args.destination if maintenance.backup(
+            args.destination, compact=args.compact, pages=args.pages, progress=progress
+        ) else None
+    else:
+        path = maintenance.backup_to_directory(compact=args.compact, pages=args.pages, progress=progress)
+    if progress:
+        print(file=sys.stderr)
+    if path is None:
+        print("Backup failed", file=sys.stderr)
+        return 1
+    print(path)
+    return 0
+
+
+def command_compact(args):
+    """Return free space to the file system"""
+    maintenance = OrphismMaintenance(args.db)
+    before = maintenance.info()
+    if before is None:
+        return 1
+    if args.full:
+        if not maintenance.enable_incremental_vacuum():
+            return 1
+    else:
+        maintenance.incremental_vacuum()
+    after = maintenance.info()
+    if after is None:
+        return 1
+    print(f"{before['file_size']} -> {after['file_size']} bytes, "
+          f"{after['freelist_count']} free pages left")
+    return 0
+
+
+def command_analyze(args):
+    """Refresh query planner statistics"""
+    return 0 if OrphismMaintenance(args.db).analyze() else 1
+
+
+def command_check(args):
+    """Check the library file for corruption and dangling references"""
+    problems = OrphismMaintenance(args.db).integrity_check(quick=not args.full)
+    for problem in problems:
+        print(problem)
+    if not problems:
+        print("ok")
+    return 1 if problems else 0
+
+
+def command_maintain(args):
+    """Run the maintenance tasks that are due"""
+    maintenance = OrphismMaintenance(args.db, backup_dir=args.backup_dir)
+    if args.list:
+        last_runs = maintenance.last_runs()
+        due = maintenance.due_tasks()
+        for task in sorted(set(last_runs) | set(due)):
+            last_run = f"{last_runs[task]:%Y-%m-%d %H:%M}" if task in last_runs else "never"
+            print(f"{task:<18} last run {last_run}{'  (due)' if task in due else ''}")
+        return 0
+    results = maintenance.run_due()
+    for task, ok, message in results:
+        print(f"{task:<18} {'ok' if ok else 'FAILED'}  {message}")
+    if not results:
+        print("Nothing due")
+    return 0 if all(ok for _, ok, _ in results) else 1
+
+
+def _print_import_progress(job):
+    print(f"\r{job.files_imported} files, {job.dirs_scanned} folders scanned, "
+          f"{job.dirs_pending} queued", end="", file=sys.stderr, flush=True)
+
+
+def command_import(args):
+    """Import folders as resumable jobs, or resume interrupted ones"""
+    db = AudioDBSqlite(args.db)
+    if not db.initialize_database():
+        return 1
+    importer = OrphismImporter()
+    try:
+        if args.list:
+            for job in db.get_import_jobs():
+                print(f"{job.id:>4}  {job.status:<8} {job.files_imported:>9} files  "
+                      f"{job.dirs_scanned:>7} scanned  {job.dirs_pending:>7} pending  {job.root}"
+                      + (f"  ({job.error})" if job.error else ""))
+            return 0
+
+        unfinished = db.get_import_jobs(unfinished=True)
+        if args.folders:
+            # Importing a folder again continues its interrupted job
+            roots = {job.root: job.id for job in unfinished}
+            job_ids = []
+            for folder in args.folders:
+                root = os.path.abspath(folder)
+                job_id = roots.get(root) or importer.start(db, root)
+                if job_id is None:
+                    return 1
+                job_ids.append(job_id)
+        else:
+            job_ids = [job.id for job in unfinished]
+            if not job_ids:
+                print("No interrupted imports")
+                return 0
+
+        progress = _print_import_progress if sys.stderr.isatty() else None
+        failed = False
+        for job_id in job_ids:
+            try:
+                status = importer.run(db, job_id, progress)
+            except KeyboardInterrupt:
+                print("\nInterrupted; run 'import' again to resume from the last checkpoint",
+                      file=sys.stderr)
+                return 130
+            if progress:
+                print(file=sys.stderr)
+            job = importer.job(db, job_id)
+            print(f"{job.root}: {status or 'failed'}, {job.files_imported} files"
+                  + (f" ({job.error})" if job.error else ""))
+            failed = failed or status != IMPORT_DONE
+        return 1 if failed else 0
+    finally:
+        db.disconnect()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="audiodb", description="AudioDB library tools")
+    parser.add_argument("--log-level", type=str.upper,
+                        choices=("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"),
+                        help="log level (default: $AUDIODB_LOG_LEVEL or INFO)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    stats = commands.add_parser(
+        "stats",
+        help="show per-statement query timings",
+        description="Merge query statistics dumped by clients started with "
+                    "AUDIODB_QUERY_STATS=<dir>, or time the client's read paths on a database."
+    )
+    stats.add_argument("dumps", nargs="*", help="dump files or directories")
+    stats.add_argument("--db", help="database to probe")
+    stats.add_argument("--threshold", type=float, default=100, help="slow query threshold in ms")
+    stats.add_argument("--top", type=int, default=20, help="number of statements to list")
+    stats.add_argument("--json", action="store_true", help="print machine-readable output")
+    stats.set_defaults(handler=command_stats)
+
+    rebuild_stats = commands.add_parser(
+        "rebuild-stats", help="recompute library statistics from the audio_files table"
+    )
+    rebuild_stats.add_argument("--db", default="audiodb.sqlite", help="library database")
+    rebuild_stats.set_defaults(handler=command_rebuild_stats)
+
+    smart_playlists = commands.add_parser("smart-playlists", help="list or add smart playlists")
+    smart_playlists.add_argument("--db", default="audiodb.sqlite", help="library database")
+    smart_playlists.add_argument("--add", nargs=2, metavar=("NAME", "JSON"),
+                                 help='e.g. --add "Loved FLAC" \'{"rules": [{"field": "format", '
+                                      '"op": "=", "value": "FLAC"}], "order_by": "play_count"}\'')
+    smart_playlists.set_defaults(handler=command_smart_playlists)
+
+    backup = commands.add_parser(
+        "backup", help="copy the library while it is in use",
+        description="Copy a consistent snapshot of the library in small steps, so clients "
+                    "keep working. Without a destination a timestamped copy is written to "
+                    "the backup folder and old copies are rotated out."
+    )
+    backup.add_argument("destination", nargs="?", help="backup file")
+    backup.add_argument("--db", default="audiodb.sqlite", help="library database")
+    backup.add_argument("--dir", help="backup folder (default: $AUDIODB_BACKUP_DIR or ~/.audiodb/backups)")
+    backup.add_argument("--keep", type=int, default=7, help="backups to keep in the folder")
+    backup.add_argument("--pages", type=int, default=256, help="pages copied per step")
+    backup.add_argument("--compact", action="store_true",
+                        help="write a defragmented copy with VACUUM INTO")
+    backup.set_defaults(handler=command_backup)
+
+    compact = commands.add_parser("compact", help="return free space to the file system")
+    compact.add_argument("--db", default="audiodb.sqlite", help="library database")
+    compact.add_argument("--full", action="store_true",
+                         help="rebuild the file once with VACUUM and enable incremental vacuum; "
+                              "blocks other clients while it runs")
+    compact.set_defaults(handler=command_compact)
+
+    analyze = commands.add_parser("analyze", help="refresh query planner statistics")
+    analyze.add_argument("--db", default="audiodb.sqlite", help="library database")
+    analyze.set_defaults(handler=command_analyze)
+
+    check = commands.add_parser("check", help="check the library for corruption")
+    check.add_argument("--db", default="audiodb.sqlite", help="library database")
+    check.add_argument("--full", action="store_true", help="also verify index contents")
+    check.set_defaults(handler=command_check)
+
+    maintain = commands.add_parser("maintain", help="run due backups and housekeeping")
+    maintain.add_argument("--db", default="audiodb.sqlite", help="library database")
+    maintain.add_argument("--backup-dir", help="backup folder")
+    maintain.add_argument("--list", action="store_true", help="only show when tasks last ran")
+    maintain.set_defaults(handler=command_maintain)
+
+    import_ = commands.add_parser(
+        "import",
+        help="import folders, resuming interrupted imports",
+        description="Import folder trees as jobs that checkpoint their progress in the "
+                    "library. An interrupted import continues where it stopped when the "
+                    "folder is imported again, or when run without folders."
+    )
+    import_.add_argument("folders", nargs="*", help="folders to import")
+    import_.add_argument("--db", default="audiodb.sqlite", help="library database")
+    import_.add_argument("--list", action="store_true", help="list import jobs")
+    import_.set_defaults(handler=command_import)
+
+    libraries = commands.add_parser(
+        "libraries",
+        help="manage library shards",
+        description="List the library databases queried together as one library, "
+                    "or register one database per root folder or volume."
+    )
+    libraries.add_argument("--registry", help="registry file (default: $AUDIODB_LIBRARIES "
+                                              "or ~/.audiodb/libraries.json)")
+    libraries.add_argument("--add", nargs=2, metavar=("NAME", "ROOT"), help="register a shard")
+    libraries.add_argument("--db", help="database of the added shard (default: ROOT/audiodb.sqlite)")
+    libraries.add_argument("--remove", metavar="NAME", help="unregister a shard")
+    libraries.add_argument("--tracks", type=int, default=0,
+                           help="list the first tracks of the merged library")
+    libraries.add_argument("--order-by", default="date_added", help="column to order tracks by")
+    libraries.add_argument("--order", default="DESC", choices=("ASC", "DESC"))
+    libraries.set_defaults(handler=command_libraries)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    setup_logging(args.log_level)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())